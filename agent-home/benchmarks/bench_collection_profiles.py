@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+集合配置档基准：对比各 CollectionProfile 的 recall@k 与检索延迟。
+
+用法（需要可访问的 Qdrant 服务，默认 QDRANT_URL）：
+    python benchmarks/bench_collection_profiles.py --points 20000 --dim 384 --queries 200 --k 10
+    python benchmarks/bench_collection_profiles.py --profiles default,int8,int8_on_disk
+
+数据为归一化后的高斯簇向量，ground truth 由 NumPy 精确计算（余弦）。
+注意：--local 使用进程内 Qdrant（:memory:），会忽略量化 / on_disk，只能用于冒烟测试。
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client import models as qmodels  # noqa: E402
+from base_tools.vertordb import (  # noqa: E402
+    COLLECTION_PROFILES,
+    _get_qdrant_client,
+    ensure_collection,
+    forget_collection,
+)
+
+
+def _make_dataset(points: int, dim: int, queries: int, clusters: int, seed: int):
+    """生成带簇结构的单位向量（比纯随机向量更接近真实 embedding 的分布）。"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=points + queries)
+    data = centers[labels] + 0.35 * rng.normal(size=(points + queries, dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data[:points], data[points:]
+
+
+def _ground_truth(base: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ base.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def _wait_green(client, name: str, timeout: float = 600.0) -> None:
+    """等待集合索引构建完成。"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(name).status == qmodels.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+
+
+def bench_profile(client, profile, base, queries, truth, k: int, batch: int) -> dict:
+    name = f"bench_profile_{profile.name}"
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    forget_collection(name)
+    ensure_collection(name, base.shape[1], client=client, profile=profile)
+
+    start = time.perf_counter()
+    for i in range(0, len(base), batch):
+        client.upsert(
+            collection_name=name,
+            points=qmodels.Batch(ids=list(range(i, min(i + batch, len(base)))), vectors=base[i:i + batch].tolist()),
+            wait=True,
+        )
+    _wait_green(client, name)
+    build_seconds = time.perf_counter() - start
+
+    latencies = []
+    hits = 0
+    params = profile.search_params()
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        res = client.query_points(collection_name=name, query=q.tolist(), limit=k, search_params=params)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        hits += len({int(p.id) for p in res.points} & set(expected.tolist()))
+
+    client.delete_collection(name)
+    forget_collection(name)
+    lat = np.array(latencies)
+    return {
+        "profile": profile.name,
+        f"recall@{k}": hits / (len(queries) * k),
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "build_s": build_seconds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--profiles", default=",".join(COLLECTION_PROFILES))
+    parser.add_argument("--local", action="store_true", help="使用进程内 Qdrant 做冒烟测试")
+    args = parser.parse_args()
+
+    base, queries = _make_dataset(args.points, args.dim, args.queries, args.clusters, args.seed)
+    truth = _ground_truth(base, queries, args.k)
+    client = QdrantClient(":memory:") if args.local else _get_qdrant_client()
+
+    rows = []
+    for name in args.profiles.split(","):
+        profile = COLLECTION_PROFILES[name.strip()]
+        print(f">>> [Bench] profile={profile.name} ...")
+        rows.append(bench_profile(client, profile, base, queries, truth, args.k, args.batch))
+
+    headers = list(rows[0].keys())
+    print("\n" + " | ".join(f"{h:>14}" for h in headers))
+    for row in rows:
+        print(" | ".join(f"{v:>14.4f}" if isinstance(v, float) else f"{v:>14}" for v in row.values()))
+
+
+if __name__ == "__main__":
+    main()
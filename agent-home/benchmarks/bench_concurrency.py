@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+并发基准：多个 SSE 客户端同时调用 /run-task 时的吞吐与延迟。
+
+用法：
+    python benchmarks/bench_concurrency.py                       # 并发 1,2,4,8,16,32，模型延迟 0.5s
+    python benchmarks/bench_concurrency.py --clients 1,8,64 --llm-latency 1.0 --requests-per-client 2
+
+不依赖真实模型：在本进程内起一个 OpenAI 兼容的假模型服务（固定延迟，支持流式），
+通过 DOUBAO_BASE_URL 指向它；后端应用通过 httpx.ASGITransport 直接在同一个事件循环里调用。
+节点与工具全部是原生异步时，吞吐随并发数增长，直到单核 CPU 跑满（LangGraph 调度 + 假模型共用一个 GIL），
+而不是像同步节点那样被默认线程池的线程数（min(32, CPU 数 + 4)）卡住。
+"""
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import asyncio
+import argparse
+import threading
+import statistics
+from pathlib import Path
+from typing import List
+
+os.environ.setdefault("QDRANT_BACKEND", "numpy")
+os.environ.setdefault("EMBEDDING_MODEL", "hash")
+os.environ.setdefault("DOUBAO_API_KEY", "bench")
+os.environ.setdefault("DOUBAO_MODEL", "bench")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+
+_DOC = "# 项目周报\n\n本周完成了向量检索链路的异步化改造，" + "并发请求不再被线程池串行化。" * 8
+
+
+def _fake_llm_app(latency: float) -> FastAPI:
+    """OpenAI 兼容的 /chat/completions：等待 latency 秒后返回固定文档（流式 / 非流式）。"""
+    app = FastAPI()
+
+    def _chunk(delta: dict, finish_reason=None) -> str:
+        body = {
+            "id": "bench", "object": "chat.completion.chunk", "created": 0, "model": "bench",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency)
+        if body.get("stream"):
+            async def _stream():
+                yield _chunk({"role": "assistant", "content": ""})
+                for i in range(0, len(_DOC), 40):
+                    yield _chunk({"content": _DOC[i:i + 40]})
+                yield _chunk({}, "stop")
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(_stream(), media_type="text/event-stream")
+        return {
+            "id": "bench", "object": "chat.completion", "created": 0, "model": "bench",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": _DOC}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+    return app
+
+
+def _start_fake_llm(latency: float) -> str:
+    """在后台线程中启动假模型服务，返回 base_url。"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(_fake_llm_app(latency), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def _one_request(client: httpx.AsyncClient, user_id: str) -> float:
+    """发起一次 /run-task 并读完整个 SSE 流，返回耗时（秒）。"""
+    start = time.perf_counter()
+    payload = {"user_id": user_id, "user_input": "帮我改写一份项目周报"}
+    async with client.stream("POST", "/run-task", json=payload) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data:") and '"type": "error"' in line:
+                raise RuntimeError(line)
+    return time.perf_counter() - start
+
+
+async def _run_level(client: httpx.AsyncClient, clients: int, per_client: int) -> dict:
+    latencies: List[float] = []
+
+    async def _client(idx: int) -> None:
+        for n in range(per_client):
+            latencies.append(await _one_request(client, f"bench-{clients}-{idx}-{n}"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(i) for i in range(clients)))
+    seconds = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "seconds": seconds,
+        "rps": len(latencies) / seconds,
+        "p50": statistics.median(latencies),
+        "max": max(latencies),
+    }
+
+
+async def _main(levels: List[int], per_client: int) -> None:
+    import backend
+
+    # 后端按 chunk 打 INFO 日志，会把 CPU 花在格式化日志上，基准里只保留警告
+    logging.getLogger().setLevel(logging.WARNING)
+
+    transport = httpx.ASGITransport(app=backend.app_server)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await backend._get_runtime()
+        # 预热一次：编译 Agent、建立到假模型的连接
+        await _one_request(client, "bench-warmup")
+        print(f"{'clients':>7} | {'requests':>8} | {'total_s':>7} | {'req/s':>6} | {'p50_s':>6} | {'max_s':>6} | scaling")
+        base_rps = None
+        for clients in levels:
+            r = await _run_level(client, clients, per_client)
+            base_rps = base_rps or r["rps"]
+            print(
+                f"{r['clients']:>7} | {r['requests']:>8} | {r['seconds']:>7.2f} | {r['rps']:>6.2f} | "
+                f"{r['p50']:>6.2f} | {r['max']:>6.2f} | {r['rps'] / base_rps:.1f}x"
+            )
+    if "base_tools.index_queue" in sys.modules:
+        from base_tools.index_queue import shutdown_index_pipeline
+
+        shutdown_index_pipeline()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="1,2,4,8,16,32", help="逗号分隔的并发客户端数")
+    parser.add_argument("--requests-per-client", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="假模型每次调用的延迟（秒）")
+    args = parser.parse_args()
+
+    os.environ["DOUBAO_BASE_URL"] = _start_fake_llm(args.llm_latency)
+    levels = [int(c) for c in args.clients.split(",") if c.strip()]
+    asyncio.run(_main(levels, args.requests_per_client))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+流式入库基准：不同文档大小下的吞吐与峰值内存。
+
+用法：
+    python benchmarks/bench_ingest.py --sizes-mb 1,4,16
+    QDRANT_BACKEND=server EMBEDDING_MODEL=hf python benchmarks/bench_ingest.py --sizes-mb 1
+
+默认使用进程内 numpy 后端与哈希 embedding，只衡量切分 / 批处理本身。
+「瞬时峰值」= tracemalloc 峰值 - 结束时仍驻留的内存（即扣除向量库本身保存的数据），
+流式路径下应基本不随文档大小增长；--compare 会同时跑一遍一次性切分 + 一次写入的旧路径作对比。
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import Iterator
+
+os.environ.setdefault("QDRANT_BACKEND", "numpy")
+os.environ.setdefault("EMBEDDING_MODEL", "hash")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from base_tools.ingest import ingest_stream  # noqa: E402
+from base_tools.vertordb import _embed_documents, _split_text_into_chunks, upsert_points  # noqa: E402
+from qdrant_client import models as qmodels  # noqa: E402
+from uuid import uuid4  # noqa: E402
+
+_PARAGRAPH = "向量检索把文本映射到稠密空间，再按相似度召回相关片段。" * 6 + "\n\n"
+
+
+def _generate(size_mb: float) -> Iterator[str]:
+    """按块生成约 size_mb MB 的文本，不在内存中拼出整篇文档。"""
+    remaining = int(size_mb * 1e6)
+    block = _PARAGRAPH * 200
+    block_bytes = len(block.encode("utf-8"))
+    while remaining > 0:
+        yield block
+        remaining -= block_bytes
+
+
+def _measure(fn) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, (peak - current) / 1e6
+
+
+def _legacy(size_mb: float, collection: str) -> int:
+    """旧路径：整篇文本 -> 全量切分 -> 全量向量化 -> 一次写入。"""
+    text = "".join(_generate(size_mb))
+    chunks = _split_text_into_chunks(text, 500)
+    vectors = _embed_documents(chunks)
+    upsert_points(collection, [
+        qmodels.PointStruct(id=str(uuid4()), vector=v, payload={"text": c}) for c, v in zip(chunks, vectors)
+    ])
+    return len(chunks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", default="1,4,16")
+    parser.add_argument("--compare", action="store_true", help="同时测量一次性写入的旧路径")
+    args = parser.parse_args()
+
+    print(f"{'size_mb':>8} | {'path':>8} | {'chunks':>8} | {'chunks/s':>10} | {'MB/s':>8} | {'transient_peak_mb':>18}")
+    for size in (float(s) for s in args.sizes_mb.split(",")):
+        stats, seconds, transient = _measure(lambda: ingest_stream(_generate(size), f"bench_ingest_{size}"))
+        print(f"{size:>8} | {'stream':>8} | {stats.chunks:>8} | {stats.chunks / seconds:>10.1f} | "
+              f"{size / seconds:>8.2f} | {transient:>18.2f}")
+        if args.compare:
+            chunks, seconds, transient = _measure(lambda: _legacy(size, f"bench_legacy_{size}"))
+            print(f"{size:>8} | {'legacy':>8} | {chunks:>8} | {chunks / seconds:>10.1f} | "
+                  f"{size / seconds:>8.2f} | {transient:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
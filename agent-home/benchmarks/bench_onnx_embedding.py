@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding 后端基准：torch（HuggingFaceEmbeddings）vs ONNX fp32 vs ONNX int8。
+
+用法（需要 pip install -e ".[onnx]" 以及 sentence-transformers / torch 作为基线）：
+    python benchmarks/bench_onnx_embedding.py --texts 2000 --threads 4
+    python benchmarks/bench_onnx_embedding.py --model shibing624/text2vec-base-chinese
+
+输出每个后端的加载耗时、吞吐（texts/s），以及与 torch 基线的一致性：
+逐条余弦相似度的均值 / 最小值，和以这些向量做 top-10 近邻检索时与基线结果的重合率。
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from base_tools.onnx_embedding import OnnxEmbeddings, export_onnx_model  # noqa: E402
+
+_SENTENCES = [
+    "向量数据库按相似度召回相关文档片段",
+    "今天北京天气晴，最高气温二十五度",
+    "The quick brown fox jumps over the lazy dog",
+    "如何在 FastAPI 中实现服务端推送事件",
+    "ONNX Runtime provides fast CPU inference for transformer models",
+    "订阅的 RSS 源每天早上八点汇总推送",
+    "把长文档切分成五百字左右的片段再做向量化",
+    "Quantization trades a little accuracy for a large speedup",
+]
+
+
+def _corpus(n: int, seed: int) -> list:
+    """由模板句随机拼接出长度不一的文本。"""
+    rng = np.random.default_rng(seed)
+    return [
+        "。".join(rng.choice(_SENTENCES, size=int(rng.integers(1, 6))))
+        for _ in range(n)
+    ]
+
+
+def _run(name: str, factory, texts: list) -> tuple:
+    start = time.perf_counter()
+    model = factory()
+    load_seconds = time.perf_counter() - start
+    model.embed_documents(texts[:32])  # 预热
+    start = time.perf_counter()
+    vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+    seconds = time.perf_counter() - start
+    return name, load_seconds, len(texts) / seconds, vectors
+
+
+def _agreement(base: np.ndarray, other: np.ndarray, k: int = 10) -> tuple:
+    """逐条余弦（均值 / 最小）与 top-k 近邻重合率。"""
+    base = base / np.linalg.norm(base, axis=1, keepdims=True)
+    other = other / np.linalg.norm(other, axis=1, keepdims=True)
+    cosine = (base * other).sum(axis=1)
+    top_base = np.argsort(-(base @ base.T), axis=1)[:, 1:k + 1]
+    top_other = np.argsort(-(other @ other.T), axis=1)[:, 1:k + 1]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(top_base, top_other)])
+    return float(cosine.mean()), float(cosine.min()), float(overlap)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op 线程数，0 为默认")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-torch", action="store_true", help="不跑 torch 基线（此时以 ONNX fp32 为基线）")
+    args = parser.parse_args()
+
+    texts = _corpus(args.texts, args.seed)
+    export_onnx_model(args.model, quantize=True)
+
+    runs = []
+    if not args.skip_torch:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        runs.append(_run("torch", lambda: HuggingFaceEmbeddings(
+            model_name=args.model,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"normalize_embeddings": True},
+        ), texts))
+    runs.append(_run("onnx-fp32", lambda: OnnxEmbeddings(args.model, intra_op_threads=args.threads), texts))
+    runs.append(_run("onnx-int8", lambda: OnnxEmbeddings(args.model, quantized=True, intra_op_threads=args.threads), texts))
+
+    baseline = runs[0]
+    print(f"\n基线: {baseline[0]}，{len(texts)} 条文本")
+    print(f"{'backend':>10} | {'load_s':>7} | {'texts/s':>9} | {'speedup':>7} | {'cos_mean':>8} | {'cos_min':>8} | {'top10_overlap':>13}")
+    for name, load_seconds, tps, vectors in runs:
+        cos_mean, cos_min, overlap = _agreement(baseline[3], vectors)
+        print(f"{name:>10} | {load_seconds:>7.2f} | {tps:>9.1f} | {tps / baseline[2]:>7.2f} | "
+              f"{cos_mean:>8.4f} | {cos_min:>8.4f} | {overlap:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
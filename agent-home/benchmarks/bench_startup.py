@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+冷启动基准：用 `python -X importtime` 统计导入某个模块（默认 backend）的耗时，
+按累计耗时列出最慢的模块，并检查是否超出预算 / 是否导入了不该在启动时加载的重模块。
+
+用法：
+    python benchmarks/bench_startup.py                       # backend，预算 STARTUP_BUDGET_MS（默认 1000ms）
+    python benchmarks/bench_startup.py --module agent.graph --budget-ms 4000 --top 30
+    python benchmarks/bench_startup.py --runs 5              # 取多次运行的中位数，降低抖动
+
+超出预算或命中 --forbid 中的模块时退出码为 1，可直接用于 CI。
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# 启动时不应加载的重依赖：应在 lifespan 后台预热或首次使用时才导入
+DEFAULT_FORBIDDEN = [
+    "agent.graph",
+    "models.model",
+    "langchain_openai",
+    "langchain_community",
+    "qdrant_client",
+    "pymongo",
+    "feedparser",
+    "sentence_transformers",
+    "torch",
+]
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def _import_profile(module: str) -> List[Tuple[str, int, int, int]]:
+    """在子进程中导入模块，返回 [(模块名, 自身耗时us, 累计耗时us, 层级)]。"""
+    env = {**os.environ, "PYTHONPATH": str(SRC) + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    env.setdefault("DOUBAO_API_KEY", "bench")
+    env.setdefault("DOUBAO_MODEL", "bench")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, cwd=SRC,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "1000")))
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--forbid", default=",".join(DEFAULT_FORBIDDEN), help="逗号分隔，空字符串表示不检查")
+    args = parser.parse_args()
+
+    totals: List[float] = []
+    cumulative: Dict[str, List[int]] = {}
+    self_time: Dict[str, List[int]] = {}
+    imported = set()
+    for _ in range(max(1, args.runs)):
+        rows = _import_profile(args.module)
+        for name, own, cum, _level in rows:
+            cumulative.setdefault(name, []).append(cum)
+            self_time.setdefault(name, []).append(own)
+            imported.add(name)
+        totals.append(next(cum for name, _, cum, level in rows if name == args.module and level == 0) / 1000)
+
+    print(f"{'cumulative_ms':>13} | {'self_ms':>8} | module")
+    ranked = sorted(cumulative, key=lambda n: statistics.median(cumulative[n]), reverse=True)
+    for name in ranked[:args.top]:
+        print(f"{statistics.median(cumulative[name]) / 1000:>13.1f} | {statistics.median(self_time[name]) / 1000:>8.1f} | {name}")
+
+    total = statistics.median(totals)
+    print(f"\n导入 {args.module}：中位数 {total:.1f}ms（{args.runs} 次: {', '.join(f'{t:.0f}' for t in totals)}），预算 {args.budget_ms:.0f}ms")
+
+    failed = False
+    forbidden = [m for m in args.forbid.split(",") if m]
+    leaked = sorted(n for n in imported if any(n == f or n.startswith(f + ".") for f in forbidden))
+    if leaked:
+        roots = sorted({n.split(".")[0] if not n.startswith(("agent.", "models.")) else n for n in leaked})
+        print(f"X 启动时导入了重模块: {', '.join(roots)}")
+        failed = True
+    if total > args.budget_ms:
+        print(f"X 超出冷启动预算 {total - args.budget_ms:.1f}ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✓ 冷启动在预算内")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,145 @@
 # 自定义 ReAct Agent 构建器：可指定「模型」节点名，流式时 langgraph_node 显示该名称而非 "model"
-from typing import Annotated, Any, Sequence
+# 工具节点：同一步的多个工具调用并发执行，每个工具单独超时，超时 / 出错的调用以错误 ToolMessage 返回给模型；
+# 模型调用次数达到 max_steps 后不再执行工具，直接返回已有的部分结果
+import os
+import time
+import asyncio
+import operator
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Annotated, Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import START, StateGraph, END
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
+
+# 单次运行最多的模型调用次数
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "8"))
+# 同一步内最多同时执行的工具调用数
+AGENT_TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+# 未单独配置的工具的超时（秒）
+AGENT_TOOL_TIMEOUT = float(os.getenv("AGENT_TOOL_TIMEOUT", "30"))
+# 各工具的默认超时（秒），按 tool.name 配置；可用 AGENT_TOOL_TIMEOUTS="web_browser=10,duckduckgo_search=8" 覆盖
+DEFAULT_TOOL_TIMEOUTS: Dict[str, float] = {
+    "get_current_location": 8,
+    "duckduckgo_search": 15,
+    "web_fetch": 15,
+    "web_browser": 20,
+    "rss_reader": 30,
+    "index_web_page_to_qdrant": 120,
+    "bulk_index_web_pages": 300,
+}
+
+
+def _parse_timeouts(spec: str) -> Dict[str, float]:
+    timeouts = dict(DEFAULT_TOOL_TIMEOUTS)
+    for item in spec.split(","):
+        name, sep, value = item.partition("=")
+        if sep and name.strip():
+            try:
+                timeouts[name.strip()] = float(value)
+            except ValueError:
+                print(f"⚠️ AGENT_TOOL_TIMEOUTS 配置无效，已忽略: {item}")
+    return timeouts
+
+
+AGENT_TOOL_TIMEOUTS = _parse_timeouts(os.getenv("AGENT_TOOL_TIMEOUTS", ""))
+
+
+def _error_message(call: Dict[str, Any], content: str) -> ToolMessage:
+    return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+
+
+def _timing(step: int, call: Dict[str, Any], seconds: float, status: str) -> Dict[str, Any]:
+    if status != "ok":
+        print(f"    X [Agent] 工具 {call['name']} {status}（{seconds:.2f}s）")
+    return {"step": step, "tool": call["name"], "id": call["id"], "seconds": round(seconds, 3), "status": status}
+
+
+def _steps(messages: Sequence[BaseMessage]) -> int:
+    """本轮（最后一条用户消息之后）已有的模型调用次数；按消息计算，同一 thread 多次运行也不会累计。"""
+    count = 0
+    for m in reversed(messages):
+        if m.type == "human":
+            break
+        if m.type == "ai":
+            count += 1
+    return count
+
+
+def _run_in_threads(jobs: Sequence[Tuple[Callable[[], Any], float]], max_concurrency: int) -> List[Tuple[str, Any, float]]:
+    """
+    在线程中执行 (函数, 超时秒数) 列表，最多 max_concurrency 个同时运行，按顺序返回 (状态, 结果或异常, 耗时)。
+
+    与异步版本一致：计时与超时从拿到并发名额、真正开始执行时算起。线程无法中断，超时的调用
+    不再等待其结果，并立即归还并发名额（相当于异步版本的取消），后续调用不会被它卡住。
+    """
+    cond = threading.Condition()
+    starts: List[Optional[float]] = [None] * len(jobs)
+    results: List[Optional[Tuple[str, Any, float]]] = [None] * len(jobs)
+    running = 0
+
+    def _worker(i: int, fn: Callable[[], Any]) -> None:
+        nonlocal running
+        with cond:
+            while running >= max_concurrency:
+                cond.wait()
+            running += 1
+            starts[i] = time.perf_counter()
+            cond.notify_all()
+        try:
+            outcome = ("ok", fn())
+        except Exception as e:
+            outcome = ("error", e)
+        with cond:
+            if results[i] is None:  # 未被判定超时
+                running -= 1
+                results[i] = (*outcome, time.perf_counter() - starts[i])
+                cond.notify_all()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, len(jobs)))
+    try:
+        for i, (fn, _) in enumerate(jobs):
+            pool.submit(_worker, i, fn)
+        with cond:
+            while any(r is None for r in results):
+                now = time.perf_counter()
+                deadlines = []
+                for i, (_, timeout) in enumerate(jobs):
+                    if results[i] is not None or starts[i] is None:
+                        continue
+                    if now - starts[i] >= timeout:
+                        running -= 1
+                        results[i] = ("timeout", None, now - starts[i])
+                        cond.notify_all()
+                    else:
+                        deadlines.append(starts[i] + timeout)
+                if any(r is None for r in results):
+                    cond.wait(timeout=min(deadlines) - now if deadlines else None)
+    finally:
+        pool.shutdown(wait=False)
+    return results
+
+
+def _partial_result(messages: Sequence[BaseMessage], max_steps: int) -> List[BaseMessage]:
+    """达到最大步数时：给未执行的工具调用补上 ToolMessage，并用已有的模型输出 / 工具结果拼出最终回复。"""
+    last = messages[-1]
+    skipped = [
+        ToolMessage(content=f"未执行：已达到最大步数 {max_steps}", name=c["name"], tool_call_id=c["id"], status="error")
+        for c in last.tool_calls
+    ]
+    partial = [m.content for m in messages if isinstance(m, AIMessage) and isinstance(m.content, str) and m.content.strip()]
+    if not partial:
+        partial = [
+            f"[{m.name}] {m.content}"
+            for m in messages
+            if isinstance(m, ToolMessage) and m.status != "error" and isinstance(m.content, str)
+        ]
+    content = f"（已达到最大步数 {max_steps}，以下为部分结果）\n" + "\n\n".join(partial)
+    return [*skipped, AIMessage(content=content)]
+
 
 def create_custom_agent(
     llm: Any,
@@ -12,34 +147,121 @@ def create_custom_agent(
     *,
     model_node_name: str = "assistant",
     tools_node_name: str = "tools",
+    max_steps: int = AGENT_MAX_STEPS,
+    tool_timeouts: Optional[Dict[str, float]] = None,
+    max_concurrency: int = AGENT_TOOL_CONCURRENCY,
+    name: Optional[str] = None,
 ):
     """
     构建与 create_agent 行为一致的 ReAct 图，但可自定义「模型」节点名。
     流式时 metadata 中的 langgraph_node 将显示 model_node_name，便于区分不同专家。
+
+    参数:
+        max_steps: 最多的模型调用次数，达到后返回部分结果
+        tool_timeouts: {工具名: 超时秒数}，未列出的工具按 AGENT_TOOL_TIMEOUTS / AGENT_TOOL_TIMEOUT
+        max_concurrency: 同一步内最多同时执行的工具调用数
+        name: Agent 名称，与 create_agent 一样写入 metadata 的 lc_agent_name（SSE 流按它区分专家）
+
+    每个工具调用的耗时与状态（ok / timeout / error）追加在 state["tool_timings"] 中。
     """
     from typing import TypedDict
 
     class _State(TypedDict):
         messages: Annotated[Sequence[BaseMessage], add_messages]
+        steps: int
+        tool_timings: Annotated[List[Dict[str, Any]], operator.add]
 
-    model_with_tools = llm.bind_tools(tools)
+    tools_by_name = {t.name: t for t in tools}
+    timeouts = {**AGENT_TOOL_TIMEOUTS, **(tool_timeouts or {})}
+    model_with_tools = llm.bind_tools(tools) if tools else llm
+
+    def _timeout(name: str) -> float:
+        return timeouts.get(name, AGENT_TOOL_TIMEOUT)
 
     def _call_model(state: _State) -> dict:
         response = model_with_tools.invoke(state["messages"])
-        return {"messages": [response]}
+        return {"messages": [response], "steps": _steps(state["messages"]) + 1}
+
+    async def _acall_model(state: _State) -> dict:
+        response = await model_with_tools.ainvoke(state["messages"])
+        return {"messages": [response], "steps": _steps(state["messages"]) + 1}
+
+    def _call_tools(state: _State) -> dict:
+        """同步版本：线程并发执行，最多 max_concurrency 个同时运行；超时的调用无法中断线程，只是不再等待其结果。"""
+        calls = state["messages"][-1].tool_calls
+        step = state.get("steps") or 0
+        known = [c for c in calls if c["name"] in tools_by_name]
+        jobs = [(partial(tools_by_name[c["name"]].invoke, c), _timeout(c["name"])) for c in known]
+        outcomes = dict(zip((c["id"] for c in known), _run_in_threads(jobs, max(1, max_concurrency))))
+        messages: List[ToolMessage] = []
+        timings: List[Dict[str, Any]] = []
+        for call in calls:
+            if call["id"] not in outcomes:
+                messages.append(_error_message(call, f"工具 {call['name']} 不存在，可用工具：{list(tools_by_name)}"))
+                timings.append(_timing(step, call, 0.0, "error"))
+                continue
+            status, value, seconds = outcomes[call["id"]]
+            if status == "timeout":
+                messages.append(_error_message(call, f"工具 {call['name']} 超时（{_timeout(call['name']):g} 秒），已跳过"))
+            elif status == "error":
+                messages.append(_error_message(call, f"工具 {call['name']} 执行出错: {value}"))
+            else:
+                messages.append(value)
+            timings.append(_timing(step, call, seconds, status))
+        return {"messages": messages, "tool_timings": timings}
+
+    async def _acall_tools(state: _State) -> dict:
+        """异步版本：同一步的工具调用并发执行，超时的调用会被取消。"""
+        calls = state["messages"][-1].tool_calls
+        step = state.get("steps") or 0
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _run(call: Dict[str, Any]):
+            tool = tools_by_name.get(call["name"])
+            async with semaphore:
+                # 计时与超时从拿到并发名额开始
+                start = time.perf_counter()
+                if tool is None:
+                    msg = _error_message(call, f"工具 {call['name']} 不存在，可用工具：{list(tools_by_name)}")
+                    return msg, _timing(step, call, 0.0, "error")
+                timeout = _timeout(call["name"])
+                try:
+                    msg = await asyncio.wait_for(tool.ainvoke(call), timeout=timeout)
+                    return msg, _timing(step, call, time.perf_counter() - start, "ok")
+                except asyncio.TimeoutError:
+                    msg = _error_message(call, f"工具 {call['name']} 超时（{timeout:g} 秒），已取消")
+                    return msg, _timing(step, call, time.perf_counter() - start, "timeout")
+                except Exception as e:
+                    seconds = time.perf_counter() - start
+                    return _error_message(call, f"工具 {call['name']} 执行出错: {e}"), _timing(step, call, seconds, "error")
+
+        results = await asyncio.gather(*(_run(c) for c in calls))
+        return {"messages": [m for m, _ in results], "tool_timings": [t for _, t in results]}
+
+    def _finalize(state: _State) -> dict:
+        return {"messages": _partial_result(state["messages"], max_steps)}
 
     def _should_continue(state: _State) -> str:
         last = state["messages"][-1]
         if getattr(last, "tool_calls", None):
-            return "continue"
+            return "continue" if _steps(state["messages"]) < max_steps else "limit"
         return "end"
 
     workflow = StateGraph(_State)
-    workflow.add_node(model_node_name, _call_model)
-    workflow.add_node(tools_node_name, ToolNode(tools, name=tools_node_name))
+    # 同时提供同步 / 异步实现：invoke 走 _call_model，ainvoke / astream 走 _acall_model
+    workflow.add_node(model_node_name, RunnableLambda(_call_model, afunc=_acall_model))
+    workflow.add_node(tools_node_name, RunnableLambda(_call_tools, afunc=_acall_tools))
+    workflow.add_node("finalize", _finalize)
 
     workflow.add_edge(START, model_node_name)
-    workflow.add_conditional_edges(model_node_name, _should_continue, {"continue": tools_node_name, "end": END})
+    workflow.add_conditional_edges(
+        model_node_name, _should_continue, {"continue": tools_node_name, "limit": "finalize", "end": END}
+    )
     workflow.add_edge(tools_node_name, model_node_name)
+    workflow.add_edge("finalize", END)
 
-    return workflow.compile()
+    # 每步 = 模型节点 + 工具节点，再加上收尾节点；不低于 LangGraph 默认的 25
+    config: Dict[str, Any] = {"recursion_limit": max(25, 2 * max_steps + 2)}
+    if name:
+        config["metadata"] = {"lc_agent_name": name}
+    return workflow.compile(name=name).with_config(config)
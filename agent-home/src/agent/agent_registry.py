@@ -0,0 +1,60 @@
+# 编译一次、全局复用的 Agent 注册表：节点里不再每次编译 Agent
+# 专家 Agent 由 create_custom_agent 构建：同一步的工具调用并发执行、每个工具单独超时、模型调用次数有上限
+import threading
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+from agent.agent_builder import create_custom_agent
+
+# 各专家节点使用的 Agent 名称（None 为天气节点的匿名 Agent）及其工具集（见 agent_tools.registry）；
+# 流式输出按 lc_agent_name 区分
+EXPERT_AGENT_PROFILES: Dict[Optional[str], str] = {
+    "assistant": "assistant",
+    "doc_expert": "doc",
+    "rewrite_doc_expert": "rewrite",
+    None: "weather",
+}
+EXPERT_AGENT_NAMES: Tuple[Optional[str], ...] = tuple(EXPERT_AGENT_PROFILES)
+
+# {(模型, 工具集, 名称): (模型, 编译好的 Agent)}；保留模型引用，保证 id(model) 不会被复用
+_agents: Dict[Tuple[Hashable, ...], Tuple[Any, Any]] = {}
+_agents_lock = threading.Lock()
+
+
+def _agent_key(model: Any, tools: Sequence[Any], name: Optional[str]) -> Tuple[Hashable, ...]:
+    """模型按实例区分，工具按名称区分（顺序无关）。"""
+    tool_names = tuple(sorted(getattr(t, "name", None) or repr(t) for t in tools))
+    return (id(model), tool_names, name)
+
+
+def get_agent(model: Any, tools: Sequence[Any], name: Optional[str] = None) -> Any:
+    """
+    获取（必要时编译）一个 Agent 图（行为与 create_agent 一致，模型节点名同为 "model"）。
+
+    编译好的图本身不保存运行状态（状态随每次 invoke 传入 / 由 checkpointer 管理），
+    可以被多个并发请求同时 invoke / stream，因此同一 (模型, 工具集, 名称) 只编译一次。
+    """
+    key = _agent_key(model, tools, name)
+    entry = _agents.get(key)
+    if entry is None:
+        with _agents_lock:
+            entry = _agents.get(key)
+            if entry is None:
+                entry = (model, create_custom_agent(model, list(tools), model_node_name="model", name=name))
+                _agents[key] = entry
+    return entry[1]
+
+
+def get_expert_agent(name: Optional[str] = None, model: Any = None) -> Any:
+    """按 EXPERT_AGENT_PROFILES 取专家 Agent：只绑定该节点的工具集；model 默认为全局 _llm。"""
+    from agent_tools.registry import get_tools
+
+    if model is None:
+        from models.model import _llm as model
+    return get_agent(model, get_tools(EXPERT_AGENT_PROFILES[name]), name)
+
+
+def warmup_agents() -> int:
+    """启动时预编译所有专家 Agent，避免首个请求承担编译开销；返回已编译的 Agent 数。"""
+    for name in EXPERT_AGENT_NAMES:
+        get_expert_agent(name)
+    return len(_agents)
@@ -1,10 +1,10 @@
 # src/agent/graph.py
 import logging
 from langgraph.graph import StateGraph, END, START
-from agent_states.states import MergeAgentState
+from agent_states.states import MergeAgentState, RssOutputState, RssState
 from agent_nodes.user_intent import intent_agent_node
 from agent_nodes.weather import weather_agent_node
-from agent_nodes.rss import rss_agent_node
+from agent_nodes.rss import rss_fetch_node, fan_out_rss_summaries, rss_summarize_node, rss_collect_node
 from agent_nodes.doc_nodes.doc import doc_agent_node
 from agent_nodes.merge_node import aggregator_node
 from langgraph.checkpoint.memory import InMemorySaver
@@ -40,13 +40,26 @@ doc_graph.add_edge(START, "doc_expert")
 doc_graph.add_edge("doc_expert", END)
 doc_graph = doc_graph.compile(checkpointer=checkpointer)
 
+#rss子图：并发抓取 → Send 并行摘要 → 合并
+# 使用独立的 state，只输出 rss_summaries：子图返回的是整个最终 state，若沿用 MergeAgentState，
+# 主图会按 operator.add 把 messages 再追加一遍
+rss_graph = StateGraph(RssState, output_schema=RssOutputState)
+rss_graph.add_node("rss_fetch", rss_fetch_node)
+rss_graph.add_node("rss_summarize", rss_summarize_node)
+rss_graph.add_node("rss_collect", rss_collect_node)
+rss_graph.add_edge(START, "rss_fetch")
+rss_graph.add_conditional_edges("rss_fetch", fan_out_rss_summaries, ["rss_summarize", "rss_collect"])
+rss_graph.add_edge("rss_summarize", "rss_collect")
+rss_graph.add_edge("rss_collect", END)
+rss_graph = rss_graph.compile()
+
 # --- 3. 构建图 (Intent Routing Graph) ---
 workflow = StateGraph(MergeAgentState)
 
 # 添加节点
 workflow.add_node("intent_expert", intent_agent_node)
 workflow.add_node("weather_expert", weather_agent_node)
-workflow.add_node("rss_expert", rss_agent_node)
+workflow.add_node("rss_expert", rss_graph)
 workflow.add_node("aggregator", aggregator_node)
 workflow.add_node("doc_graph", doc_graph)
 # 起点：先做意图理解
@@ -4,9 +4,8 @@ import logging
 from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
-from langchain.agents import create_agent
-from agent_tools.tools import ALL_TOOLS
-from models.model import _llm
+from agent.agent_registry import EXPERT_AGENT_PROFILES, get_expert_agent
+from agent_tools.registry import record_agent_run
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +17,7 @@ class RewriteState(TypedDict):
     result: str
 
 
-def _rewrite_node(state: RewriteState, config: RunnableConfig) -> dict:
+async def _rewrite_node(state: RewriteState, config: RunnableConfig) -> dict:
     """调用 LLM 改写选中内容。可读取 doc 作为上下文，确保改写与文档风格一致。"""
     text = (state.get("text") or "").strip()
     hint = (state.get("hint") or "").strip()
@@ -38,9 +37,10 @@ def _rewrite_node(state: RewriteState, config: RunnableConfig) -> dict:
         {text}
         {extra_block}
     """
-    agent = create_agent(model=_llm, tools=ALL_TOOLS, name="rewrite_doc_expert")
-    result = agent.invoke({"messages": [HumanMessage(content=prompt)]}, 
+    agent = get_expert_agent("rewrite_doc_expert")
+    result = await agent.ainvoke({"messages": [HumanMessage(content=prompt)]}, 
         config={"configurable": {"langgraph_node": "rewrite_doc_expert", "thread_id": "vue_user"}})
+    record_agent_run(EXPERT_AGENT_PROFILES["rewrite_doc_expert"], result)
     logger.info(f"    -> 改写结果: {result}")
     content = result["messages"][-1].content
     return {"result": content}
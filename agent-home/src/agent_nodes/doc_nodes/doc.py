@@ -2,14 +2,12 @@ import re
 import os
 import time
 import logging
-import threading
 from typing import Any
 from models.model import _llm, api_key
-from agent_tools.tools import ALL_TOOLS
-from langchain.agents import create_agent
+from agent.agent_registry import EXPERT_AGENT_PROFILES, get_expert_agent
+from agent_tools.registry import record_agent_run
 from agent_states.states import MergeAgentState
 from langchain_core.messages import HumanMessage
-from base_tools.vertordb import index_generated_doc_to_qdrant
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +15,14 @@ base_url = os.environ.get("DOUBAO_BASE_URL")
 api_key = os.environ.get("DOUBAO_API_KEY")
 
 # Node D: 文档专家（单次调用 + 超时标记，真正的重试由 graph 中的 doc_retry 节点完成）
-def doc_agent_node(state: MergeAgentState) -> dict[str, Any]:
+async def doc_agent_node(state: MergeAgentState) -> dict[str, Any]:
     logger.info(">>> [Doc Agent] 开始工作")
     doc_logs: list[str] = []
     doc_retry_count = int(state.get("doc_retry_count") or 0)
     doc_status = "running"
     doc_last_error = ""
 
-    def _run_doc() -> str:
+    async def _run_doc() -> str:
         """执行文档查询的核心逻辑（不包含重试，仅单次调用）。"""
         user_intent = state.get("user_intent", "")
         if not user_intent:
@@ -53,8 +51,9 @@ def doc_agent_node(state: MergeAgentState) -> dict[str, Any]:
         try:
             logger.info(f"    -> 开始调用工具生成文档内容…\n\n{prompt}")
             doc_logs.append("开始调用工具生成内容…")
-            agent = create_agent(model=_llm, tools=ALL_TOOLS, name="doc_expert")
-            result = agent.invoke({"messages": [HumanMessage(content=prompt)]}, config={"configurable": {"thread_id": "vue_user"}})
+            agent = get_expert_agent("doc_expert")
+            result = await agent.ainvoke({"messages": [HumanMessage(content=prompt)]}, config={"configurable": {"thread_id": "vue_user"}})
+            record_agent_run(EXPERT_AGENT_PROFILES["doc_expert"], result)
             content = result["messages"][-1].content
             log_msg = f"正在获取文档信息的结果预览：{content[:100]}..."
             logger.info(f"    -> {log_msg}")
@@ -68,15 +67,13 @@ def doc_agent_node(state: MergeAgentState) -> dict[str, Any]:
             doc_logs.append("文档查询完成")
     start_time = time.time()
     try:
-        final_msg = _run_doc()
+        final_msg = await _run_doc()
         doc_title = _extract_title_from_markdown(final_msg)
         if doc_title:
             logger.info(f"    <- 从 Markdown 提取标题: {doc_title[:80]}...")
-            _save_doc_to_qdrant(final_msg, state.get("user_intent", ""), doc_title)
         else:
-            logger.info(f"    <- 未提取到标题，使用默认标题")
-            doc_title = "未命名文档"
-            _save_doc_to_qdrant(final_msg, state.get("user_intent", ""), doc_title)
+            logger.info(f"    <- 未提取到标题，按用户需求区分文档")
+        _save_doc_to_qdrant(final_msg, state.get("user_intent", ""), doc_title)
         elapsed = time.time() - start_time
         msg = f"文档节点本次调用成功（用时 {elapsed:.1f}秒）"
         logger.info(f"    <- [Doc] {msg}")
@@ -103,21 +100,19 @@ def _extract_title_from_markdown(doc: str) -> str | None:
         return m.group(1).strip()
     return None
 
-#保存文章到向量数据库的辅助函数
-def _save_doc_to_qdrant(text: str, user_intent: str, doc_title: str):
+#保存文章到向量数据库的辅助函数（提交到有界的后台索引流水线，不阻塞节点）
+#doc_key 由标题 + 用户需求生成：同名 / 无标题的不同文档不会互相覆盖
+def _save_doc_to_qdrant(text: str, user_intent: str, doc_title: str | None):
+    from base_tools.index_queue import get_index_pipeline
+    from base_tools.vertordb import generated_doc_key
+
     try:
-        threading.Thread(
-            target=index_generated_doc_to_qdrant, 
-            args=(
-                text, 
-                user_intent, 
-                doc_title
-                )
-            ).start()
+        if get_index_pipeline().submit(text, user_intent, doc_key=generated_doc_key(user_intent, doc_title)):
+            logger.info(f"    -> 已提交到索引队列")
+        else:
+            logger.warning(f"    ! [Doc] 索引队列繁忙，任务已落盘稍后重放")
     except Exception as e:
-        logger.error(f"    X [Doc] 索引到 Qdrant 失败: {str(e)}")
-    finally:
-        logger.info(f"    -> 索引到 Qdrant 完成")
+        logger.error(f"    X [Doc] 提交索引任务失败: {str(e)}")
 
 #封装好的结果返回函数
 def _doc_result(doc: str, doc_logs: list[str], doc_retry_count: int, doc_status: str, doc_last_error: str)->dict[str, Any]:
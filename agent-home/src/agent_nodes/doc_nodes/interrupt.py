@@ -1,9 +1,10 @@
 from typing import Any
 from langchain_core.messages import HumanMessage
-from models.model import _agent
+from models.model import get_assistant_agent
+from agent_tools.registry import record_agent_run
 from agent_states.states import MergeAgentState
 
-def rewrite_doc_node(state: MergeAgentState) -> dict[str, Any]:
+async def rewrite_doc_node(state: MergeAgentState) -> dict[str, Any]:
     """
     根据 rewrite_instruction 改写 doc，返回新文档。
     仅在中断后用户通过 update_state 传入 rewrite_instruction 时才会进入此节点。
@@ -17,6 +18,7 @@ def rewrite_doc_node(state: MergeAgentState) -> dict[str, Any]:
 原文档：
 {doc}
 """
-    result = _agent.invoke({"messages": [HumanMessage(content=prompt)]}, config={"configurable": {"thread_id": "vue_user"}})
+    result = await get_assistant_agent().ainvoke({"messages": [HumanMessage(content=prompt)]}, config={"configurable": {"thread_id": "vue_user"}})
+    record_agent_run("assistant", result)
     new_doc = result["messages"][-1].content
     return {"doc": new_doc, "rewrite_instruction": ""}  # 清空指令避免重复改写
\ No newline at end of file
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+分层意图路由：能不调用 LLM 就不调用。
+
+1. 关键字规则：只命中一类关键字时直接给出路由（微秒级）；
+2. 向量最近质心：用 _get_default_embedding() 对每个路由的示例句求质心，
+   查询与质心的余弦相似度足够高、且领先第二名足够多时直接给出路由（毫秒级，命中 embedding 缓存时更快）；
+3. LLM 兜底：前两层都没把握时，才用不带工具的结构化输出调用一次模型，同时得到意图总结。
+
+每一层的命中次数 / 耗时都会计入统计，按 LLM 层的实测平均耗时估算快速层节省的时间（见 intent_router_stats）。
+"""
+import os
+import time
+import asyncio
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+INTENT_ROUTES: Tuple[str, ...] = ("weather", "rss", "doc")
+
+# 质心层的置信度门槛：最高相似度不低于 MIN_SCORE，且比第二名高出 MIN_MARGIN
+INTENT_CENTROID_MIN_SCORE = float(os.getenv("INTENT_CENTROID_MIN_SCORE", "0.55"))
+INTENT_CENTROID_MIN_MARGIN = float(os.getenv("INTENT_CENTROID_MIN_MARGIN", "0.05"))
+# 是否启用质心层（哈希回退 embedding 没有语义，无论如何都会跳过）
+INTENT_CENTROID_ENABLED = os.getenv("INTENT_CENTROID_ENABLED", "true").lower() in ("1", "true", "yes")
+
+_WEATHER_KEYWORDS = ("天气", "气温", "下雨", "温度")
+_RSS_KEYWORDS = ("rss", "新闻", "资讯", "头条", "热点")
+_DOC_KEYWORDS = ("文档续写", "重写", "重新续写", "改写")
+
+# 每个路由的示例句，用来构建质心；可按线上误判样本补充
+INTENT_EXEMPLARS: Dict[str, List[str]] = {
+    "weather": [
+        "明天北京会下雨吗",
+        "今天出门需要带伞吗",
+        "上海这周天气怎么样",
+        "现在外面冷不冷，穿什么合适",
+        "周末适合户外爬山吗，会不会刮大风",
+        "广州今天最高多少度",
+    ],
+    "rss": [
+        "给我看看今天的科技新闻",
+        "最近有什么热点事件",
+        "帮我读一下这个 RSS 订阅源",
+        "汇总一下今天的行业资讯",
+        "今天的头条有哪些",
+        "最新的 AI 领域动态",
+    ],
+    "doc": [
+        "帮我写一篇关于向量数据库的技术文档",
+        "把这段内容改写得更正式一些",
+        "继续续写上面的文章",
+        "写一份项目周报",
+        "帮我整理一份接口设计说明",
+        "起草一封给客户的邮件",
+    ],
+}
+
+
+@dataclass
+class IntentDecision:
+    """一次路由结果：route 为路由，tier 为给出结果的层（keyword/centroid/llm/default）。"""
+    route: str
+    tier: str
+    summary: str = ""
+    confidence: float = 1.0
+    seconds: float = 0.0
+
+
+class IntentRouteOutput(BaseModel):
+    """LLM 兜底层的结构化输出。"""
+    summary: str = Field(description="用 1-2 句中文总结用户的核心意图，不要出现“用户意图为”这类前缀")
+    route: Literal["weather", "rss", "doc"] = Field(
+        description="weather: 关心天气、温度、下雨、穿衣；rss: 想看新闻、资讯、热点、RSS；doc: 与天气和新闻都无关"
+    )
+
+
+def _keyword_route(text: str) -> Optional[str]:
+    """只命中一类关键字时返回对应路由，否则返回 None（交给下一层）。"""
+    text = text.lower()
+    hits = [
+        route
+        for route, keywords in (("weather", _WEATHER_KEYWORDS), ("rss", _RSS_KEYWORDS), ("doc", _DOC_KEYWORDS))
+        if any(k in text for k in keywords)
+    ]
+    return hits[0] if len(hits) == 1 else None
+
+
+class _CentroidClassifier:
+    """每个路由一个 L2 归一化质心，查询向量与质心做点积即余弦相似度。"""
+
+    def __init__(self, embedding, exemplars: Dict[str, List[str]]):
+        self.embedding = embedding
+        self.routes = [r for r in INTENT_ROUTES if exemplars.get(r)]
+        centroids = []
+        for route in self.routes:
+            vectors = self._normalize(np.asarray(embedding.embed_documents(exemplars[route]), dtype=np.float32))
+            centroids.append(vectors.mean(axis=0))
+        self.centroids = self._normalize(np.vstack(centroids))
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        return matrix / np.clip(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12, None)
+
+    def classify(self, text: str) -> Tuple[str, float, float]:
+        """返回 (最相近的路由, 相似度, 领先第二名的差值)。"""
+        query = self._normalize(np.asarray(self.embedding.embed_query(text), dtype=np.float32))
+        scores = self.centroids @ query
+        order = np.argsort(scores)[::-1]
+        margin = float(scores[order[0]] - scores[order[1]]) if len(order) > 1 else float(scores[order[0]])
+        return self.routes[int(order[0])], float(scores[order[0]]), margin
+
+
+_classifier: Optional[_CentroidClassifier] = None
+_classifier_failed = False
+_classifier_lock = threading.Lock()
+
+
+def _get_centroid_classifier() -> Optional[_CentroidClassifier]:
+    """延迟构建质心分类器；不可用（关闭 / 哈希回退 / 构建失败）时返回 None。"""
+    global _classifier, _classifier_failed
+    if _classifier is None and not _classifier_failed and INTENT_CENTROID_ENABLED:
+        with _classifier_lock:
+            if _classifier is None and not _classifier_failed:
+                try:
+                    from base_tools.vertordb import _SimpleHashEmbeddings, _get_default_embedding
+
+                    embedding = _get_default_embedding()
+                    if isinstance(embedding, _SimpleHashEmbeddings):
+                        print("⚠️ [Intent Router] 当前为哈希回退 embedding，跳过质心分类层")
+                        _classifier_failed = True
+                    else:
+                        _classifier = _CentroidClassifier(embedding, INTENT_EXEMPLARS)
+                except Exception as e:
+                    print(f"⚠️ [Intent Router] 质心分类器构建失败，跳过该层: {e}")
+                    _classifier_failed = True
+    return _classifier
+
+
+@lru_cache(maxsize=1)
+def _get_structured_llm():
+    """不绑定任何工具的结构化输出模型：一次往返即可拿到路由与意图总结。"""
+    from models.model import _llm
+
+    return _llm.with_structured_output(IntentRouteOutput)
+
+
+async def _allm_route(text: str) -> IntentRouteOutput:
+    prompt = f"你是一个“用户意图理解助手 + 路由器”。请总结下面这段用户输入的核心意图，并选择路由。\n\n用户输入：\n{text}"
+    return await _get_structured_llm().ainvoke(prompt)
+
+
+class _RouterStats:
+    """各层命中次数与累计耗时（线程安全）。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits: Dict[str, int] = {}
+            self.seconds: Dict[str, float] = {}
+
+    def record(self, tier: str, seconds: float) -> None:
+        with self._lock:
+            self.hits[tier] = self.hits.get(tier, 0) + 1
+            self.seconds[tier] = self.seconds.get(tier, 0.0) + seconds
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = sum(self.hits.values())
+            tiers = {
+                tier: {
+                    "hits": n,
+                    "hit_rate": round(n / total, 4),
+                    "avg_ms": round(self.seconds[tier] / n * 1000, 2),
+                }
+                for tier, n in self.hits.items()
+            }
+            llm_hits = self.hits.get("llm", 0)
+            llm_avg = self.seconds.get("llm", 0.0) / llm_hits if llm_hits else None
+            saved = None
+            if llm_avg is not None:
+                # 快速层每命中一次，约等于省下一次 LLM 调用（减去快速层自身的耗时）
+                saved = sum(
+                    self.hits[t] * llm_avg - self.seconds[t] for t in ("keyword", "centroid") if t in self.hits
+                )
+            return {
+                "total": total,
+                "tiers": tiers,
+                "llm_avg_ms": round(llm_avg * 1000, 2) if llm_avg is not None else None,
+                "estimated_saved_seconds": round(saved, 3) if saved is not None else None,
+            }
+
+
+_stats = _RouterStats()
+
+
+def warmup_intent_router() -> bool:
+    """启动时预先构建质心（会加载 embedding 模型）；返回质心层是否可用。"""
+    return _get_centroid_classifier() is not None
+
+
+def intent_router_stats() -> Dict:
+    """返回各层命中率 / 平均耗时，以及按 LLM 实测耗时估算的节省时间（尚无 LLM 样本时为 None）。"""
+    return _stats.stats()
+
+
+async def aroute_intent(text: str) -> IntentDecision:
+    """按 关键字 → 质心 → LLM 的顺序路由，返回第一个有把握的结果。"""
+    start = time.perf_counter()
+
+    def _done(decision: IntentDecision) -> IntentDecision:
+        decision.seconds = time.perf_counter() - start
+        _stats.record(decision.tier, decision.seconds)
+        return decision
+
+    route = _keyword_route(text)
+    if route is not None:
+        return _done(IntentDecision(route=route, tier="keyword", summary=text))
+
+    guess: Optional[Tuple[str, float, float]] = None
+    # 构建质心 / 计算查询向量可能阻塞（加载模型、微批等待），放到线程里，不卡事件循环
+    classifier = await asyncio.to_thread(_get_centroid_classifier)
+    if classifier is not None:
+        try:
+            guess = await asyncio.to_thread(classifier.classify, text)
+            route, score, margin = guess
+            if score >= INTENT_CENTROID_MIN_SCORE and margin >= INTENT_CENTROID_MIN_MARGIN:
+                return _done(IntentDecision(route=route, tier="centroid", summary=text, confidence=score))
+        except Exception as e:
+            print(f"⚠️ [Intent Router] 质心分类失败: {e}")
+
+    try:
+        output = await _allm_route(text)
+        return _done(IntentDecision(route=output.route, tier="llm", summary=output.summary.strip() or text))
+    except Exception as e:
+        print(f"    X [Intent Router] LLM 路由失败: {e}")
+    # LLM 也失败时：有质心猜测就用猜测，否则走文档节点
+    route, confidence = (guess[0], guess[1]) if guess else ("doc", 0.0)
+    return _done(IntentDecision(route=route, tier="default", summary=text, confidence=confidence))
@@ -1,10 +1,23 @@
-from typing import Any
-from models.model import _llm
-from agent_tools.tools import ALL_TOOLS
-from agent_states.states import MergeAgentState
-from langchain.agents import create_agent
+# RSS 流水线：并发抓取所有订阅源 → 按批 Send 并行摘要 → 按源合并
+# 不再为每个源起一个带工具的 Agent（再由它决定调用 rss_reader），总耗时取决于最慢的源而不是各源之和
+import os
+import re
+import asyncio
+from typing import Any, Dict, List, Union
+from langgraph.types import Send
 from langchain_core.messages import HumanMessage
-from agent.agent_builder import create_custom_agent
+from models.model import _llm
+from agent_states.states import RssState
+from agent_tools.subscribe import afetch_feed_entries
+
+# 每个源取前多少篇文章
+RSS_MAX_ENTRIES = int(os.getenv("RSS_MAX_ENTRIES", "10"))
+# 单个源的抓取超时（秒），超时的源记为失败，不拖慢其它源
+RSS_FEED_TIMEOUT = float(os.getenv("RSS_FEED_TIMEOUT", "20"))
+# 每次摘要调用处理的文章数，同一个源的多批也会并行
+RSS_SUMMARY_BATCH = int(os.getenv("RSS_SUMMARY_BATCH", "5"))
+# 送给模型的单篇正文最大字符数
+RSS_ENTRY_CHARS = int(os.getenv("RSS_ENTRY_CHARS", "600"))
 
 # 数据源列表
 _rss_urls = [
@@ -15,38 +28,96 @@ _rss_urls = [
     # "https://plink.anyfeeder.com/wsj/cn",
 ]
 
+_NUMBERED_LINE = re.compile(r"^\s*(\d+)[.、．)]\s*(.+)$")
+
+
+async def _fetch_feed(url: str) -> Dict[str, Any]:
+    """抓取一个源，失败 / 超时不抛异常，记录在 error 中。"""
+    try:
+        entries = await asyncio.wait_for(
+            afetch_feed_entries(url, limit=RSS_MAX_ENTRIES, max_chars=RSS_ENTRY_CHARS), timeout=RSS_FEED_TIMEOUT
+        )
+        print(f"    <- 抓取完成: {url}，{len(entries)} 篇")
+        return {"url": url, "entries": entries, "error": ""}
+    except asyncio.TimeoutError:
+        error = f"抓取超时（{RSS_FEED_TIMEOUT:.0f} 秒）"
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    print(f"    X 失败: {url} | 错误: {error}")
+    return {"url": url, "entries": [], "error": error}
+
 
-def _process_single_url(url: str) -> str:
-    """处理单个 RSS URL，返回摘要。"""
-    prompt = f"""
-    请读取 RSS 源 {url}。
-    请列出前 10 篇文章，严格按照以下 Markdown 格式输出，不要包含其他废话：
+# Node B1: 并发抓取所有 RSS 源
+async def rss_fetch_node(state: RssState) -> dict[str, Any]:
+    print(f">>> [RSS Agent] 开始工作 (并发抓取 {len(_rss_urls)} 个源...)")
+    feeds = list(await asyncio.gather(*(_fetch_feed(url) for url in _rss_urls)))
+    # rss_batches=None：清空上一轮（同一 thread）的摘要结果
+    return {"rss_feeds": feeds, "rss_batches": None}
 
-    1. [文章标题](文章链接)
-       - 摘要：简述内容...
 
-    注意：
-    - 必须使用 [标题](链接) 的格式隐藏长链接。
-    - 摘要部分换行并缩进。
-    - 请严格使用 Markdown 格式输出链接，格式为：[标题](URL)。注意：不要在方括号 [] 和圆括号 () 之间加空格。如果标题中包含方括号，请将其转义或替换为其他符号。
-    """
-    local_executor = create_agent(model=_llm, tools=ALL_TOOLS, name="rss_expert")
+def fan_out_rss_summaries(state: RssState) -> Union[List[Send], str]:
+    """每 RSS_SUMMARY_BATCH 篇文章发一个摘要任务；没有任何文章时直接进入合并节点。"""
+    sends = []
+    for feed in state.get("rss_feeds") or []:
+        entries = feed["entries"]
+        for start in range(0, len(entries), RSS_SUMMARY_BATCH):
+            batch = {"url": feed["url"], "start": start, "entries": entries[start:start + RSS_SUMMARY_BATCH]}
+            sends.append(Send("rss_summarize", batch))
+    return sends or "rss_collect"
+
+
+def _parse_numbered(text: str) -> Dict[int, str]:
+    """解析模型输出的「编号. 摘要」行。"""
+    result = {}
+    for line in (text or "").splitlines():
+        m = _NUMBERED_LINE.match(line)
+        if m:
+            result[int(m.group(1))] = m.group(2).strip()
+    return result
+
+
+# Node B2: 摘要一批文章（不带工具，一次模型调用）
+async def rss_summarize_node(batch: Dict[str, Any]) -> dict[str, Any]:
+    entries, start = batch["entries"], batch["start"]
+    articles = "\n\n".join(
+        f"{start + i}. 标题：{e['title']}\n   正文：{e['content']}" for i, e in enumerate(entries, 1)
+    )
+    prompt = f"""请用 1-2 句中文概括下面每篇文章的核心内容。
+每篇一行，严格按「编号. 摘要」格式输出，编号与原文一致，不要输出其他内容。
+
+{articles}
+"""
     try:
-        print(f"    -> 正在抓取: {url}")
-        res = local_executor.invoke({"messages": [HumanMessage(content=prompt)]}, config={"configurable": {"langgraph_node": "rss_expert"}})
-        content = res["messages"][-1].content
-        print(f"    <- 完成: {url}, {content[:60]}...")
-        return content
+        res = await _llm.ainvoke([HumanMessage(content=prompt)])
+        summaries = _parse_numbered(getattr(res, "content", ""))
     except Exception as e:
-        print(f"    X 失败: {url} | 错误: {e}")
-        return f"读取 {url} 失败"
+        print(f"    X 摘要失败: {batch['url']}#{start} | 错误: {e}")
+        summaries = {}
+
+    lines = []
+    for i, entry in enumerate(entries, start + 1):
+        # 链接由代码拼接，保证 [标题](URL) 格式正确；模型没给出摘要时退回正文开头
+        title = entry["title"].replace("[", "【").replace("]", "】")
+        summary = summaries.get(i) or entry["content"][:120]
+        lines.append(f"{i}. [{title}]({entry['link']})\n   - 摘要：{summary}")
+    return {"rss_batches": [{"url": batch["url"], "start": start, "text": "\n".join(lines)}]}
+
 
+# Node B3: 按订阅源顺序合并各批摘要
+def rss_collect_node(state: RssState) -> dict[str, Any]:
+    by_url: Dict[str, List[Dict[str, Any]]] = {}
+    for item in state.get("rss_batches") or []:
+        by_url.setdefault(item["url"], []).append(item)
 
-# Node B: RSS 专家（同步顺序调用）
-def rss_agent_node(state: MergeAgentState) -> dict[str, Any]:
-    print(">>> [RSS Agent] 开始工作 (同步顺序处理...)")
     summaries = []
-    for url in _rss_urls:
-        summaries.append(_process_single_url(url))
+    for feed in state.get("rss_feeds") or []:
+        url = feed["url"]
+        if feed["error"]:
+            summaries.append(f"读取 {url} 失败：{feed['error']}")
+        elif url not in by_url:
+            summaries.append(f"{url} 暂无文章")
+        else:
+            summaries.append("\n".join(b["text"] for b in sorted(by_url[url], key=lambda b: b["start"])))
     print(">>> [RSS Agent] 所有 RSS 任务处理完毕")
-    return {"rss_summaries": summaries}
\ No newline at end of file
+    # 合并后清空中间结果
+    return {"rss_summaries": summaries, "rss_batches": None}
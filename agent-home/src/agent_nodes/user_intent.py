@@ -1,12 +1,9 @@
 from typing import Any
-from models.model import _llm
 from agent_states.states import MergeAgentState
 from langchain_core.messages import HumanMessage
-from langchain.agents import create_agent
-from agent_tools.tools import ALL_TOOLS
-from models.model import _agent
+from agent_nodes.intent_router import aroute_intent
 
-def intent_agent_node(state: MergeAgentState) -> dict[str, Any]:
+async def intent_agent_node(state: MergeAgentState) -> dict[str, Any]:
     print(">>> [Intent Agent] 开始解析用户意图")
     raw_input = state.get("user_input", "") or ""
 
@@ -16,71 +13,24 @@ def intent_agent_node(state: MergeAgentState) -> dict[str, Any]:
         # 没有明确输入时，不强制跑天气或 RSS，由后续默认逻辑决定
         return {"user_intent": intent_text, "intent_route": "rss"}
 
-    prompt = f"""
-        你是一个“用户意图理解助手 + 路由器”。现在给你一段用户输入，请你：
-        1. 先用 1-2 句话用中文总结用户的核心意图（不要出现“用户意图为”这类前缀）。
-        2. 然后根据意图判断用户更像是在要「天气」还是「RSS 新闻」，或者两者都不是。
-        3. 如果用户需求与天气和新闻都无关，则选择 ROUTE=doc
-
-        你必须在最后一行，单独输出一个路由标签，格式严格为（只能四选一）：
-        - ROUTE=weather
-        - ROUTE=rss
-        - ROUTE=doc
-        其中：
-        - 当用户主要关心天气、温度、下雨、穿衣等信息时，选择 ROUTE=weather
-        - 当用户想看新闻、资讯、热点、RSS 等内容时，选择 ROUTE=rss
-        - 当用户需求与天气和新闻都无关时，选择 ROUTE=doc
-
-        用户输入：
-        {raw_input}
-        """
-    try:
-        res = _agent.invoke({"messages": [HumanMessage(content=prompt)]}, config={"configurable": {"thread_id": "vue_user"}})
-        full_text = getattr(res, "content", str(res)) or ""
-        lines = [line for line in full_text.splitlines() if line.strip()]
-
-        route = "none"
-        # 从最后一行中解析 ROUTE
-        if lines:
-            last_line = lines[-1].strip()
-            if last_line.upper().startswith("ROUTE="):
-                route = last_line.split("=", 1)[1].strip().lower() or "doc"
-                lines = lines[:-1]  # 剩余部分作为意图总结
-
-        intent_text = "\n".join(lines).strip() or "未能解析出清晰的用户意图。"
-
-        # 至少用意图总结作为 user_intent，供 doc 等节点使用；若有上次用户消息则追加（支持 HumanMessage 或 ('user', content) 元组）
-        history = state.get("messages", [])
-        user_intent_value = intent_text
-        if history:
-            last_human = next((m for m in reversed(history) if isinstance(m, HumanMessage)), None)
-            if isinstance(last_human, HumanMessage):
-                user_intent_value = intent_text + "\n\n上一次用户消息：" + last_human.content
-            else:
-                # 兼容 tuple 形式，如 ('user', content)
-                for m in reversed(history):
-                    if isinstance(m, (list, tuple)) and len(m) >= 2 and (m[0] == "user" or str(m[0]).lower() == "human"):
-                        user_intent_value = intent_text + "\n\n用户消息：" + str(m[1])
-                        break
-                
-        # 基于关键字进行一次“纠错式”路由判断，避免模型选错
-        text_for_rule = (raw_input + "\n" + intent_text).lower()
-        has_weather_kw = any(k in text_for_rule for k in ["天气", "气温", "下雨", "温度"])
-        has_rss_kw = any(k in text_for_rule for k in ["rss", "新闻", "资讯", "头条", "热点"])
-        has_doc_kw = any(k in text_for_rule for k in ["文档续写", "重写", "重新续写", "改写"])
-
-        if has_weather_kw and not has_rss_kw:
-            route = "weather"
-        elif has_rss_kw and not has_weather_kw:
-            route = "rss"
+    # 分层路由：关键字 → 向量质心 → LLM（仅在前两层没把握时调用，且不带工具）
+    decision = await aroute_intent(raw_input)
+    intent_text = decision.summary or raw_input
+
+    # 至少用意图总结作为 user_intent，供 doc 等节点使用；若有上次用户消息则追加（支持 HumanMessage 或 ('user', content) 元组）
+    history = state.get("messages", [])
+    user_intent_value = intent_text
+    if history:
+        last_human = next((m for m in reversed(history) if isinstance(m, HumanMessage)), None)
+        if isinstance(last_human, HumanMessage):
+            user_intent_value = intent_text + "\n\n上一次用户消息：" + last_human.content
         else:
-            route = "doc"
-
-        print(f"    <- 解析到的用户意图：{intent_text[:80]}...")
-        print(f"    <- 路由决策：{route}")
-    except Exception as e:
-        intent_text = f"意图理解失败：{e}"
-        route = "none"
-        print(f"    X [Intent Agent] 发生错误: {e}")
-
-    return {"user_intent": user_intent_value, "intent_route": route}
\ No newline at end of file
+            # 兼容 tuple 形式，如 ('user', content)
+            for m in reversed(history):
+                if isinstance(m, (list, tuple)) and len(m) >= 2 and (m[0] == "user" or str(m[0]).lower() == "human"):
+                    user_intent_value = intent_text + "\n\n用户消息：" + str(m[1])
+                    break
+
+    print(f"    <- 解析到的用户意图：{intent_text[:80]}...")
+    print(f"    <- 路由决策：{decision.route}（{decision.tier} 层，耗时 {decision.seconds * 1000:.1f}ms）")
+    return {"user_intent": user_intent_value, "intent_route": decision.route}
\ No newline at end of file
@@ -1,16 +1,15 @@
 # -*- coding: utf-8 -*-
-import concurrent.futures
+import asyncio
 from typing import Any
-from models.model import _llm
-from agent_tools.tools import ALL_TOOLS
 from agent_states.states import MergeAgentState
-from langchain.agents import create_agent
+from agent.agent_registry import EXPERT_AGENT_PROFILES, get_expert_agent
+from agent_tools.registry import record_agent_run
 from langchain_core.messages import HumanMessage
 
 # Node A: 天气专家
-def weather_agent_node(state: MergeAgentState) -> dict[str, Any]:
+async def weather_agent_node(state: MergeAgentState) -> dict[str, Any]:
     print(">>> [Weather Agent] 开始工作")
-    def _run_weather():
+    async def _run_weather():
         prompt = """
         你是天气助手。需要根据定位来展示实时气温和24小时预报。
         如果发现是国内IP，则无需修改查询城市，如果发现IP是不在中国大陆，则强制修正为北京。
@@ -19,23 +18,21 @@ def weather_agent_node(state: MergeAgentState) -> dict[str, Any]:
         用中文显示。
         """
         try:
-            weather_executor = create_agent(_llm, ALL_TOOLS)
+            weather_executor = get_expert_agent(None)
             # 执行子任务
-            result = weather_executor.invoke({"messages": [HumanMessage(content=prompt)]})
+            result = await weather_executor.ainvoke({"messages": [HumanMessage(content=prompt)]})
+            record_agent_run(EXPERT_AGENT_PROFILES[None], result)
             print(f"    -> 正在获取天气信息的结果是：{result['messages'][-1].content[:160]}.")
             return result["messages"][-1].content
         except Exception as e:
             return f"天气查询出错: {str(e)}"
-        # 使用线程池 + 超时控制 (最多只等 8 秒)
+    # 超时控制：240秒没结果就取消并跳过，防止卡死整个系统
     try:
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(_run_weather)
-            # 240秒没结果就强制跳过，防止卡死整个系统
-            final_msg = future.result(timeout=240)
-            print(f"    <- [Weather] 获取成功:{final_msg[:120]}...")
-            return {"weather_report": final_msg}
+        final_msg = await asyncio.wait_for(_run_weather(), timeout=240)
+        print(f"    <- [Weather] 获取成功:{final_msg[:120]}...")
+        return {"weather_report": final_msg}
 
-    except concurrent.futures.TimeoutError:
+    except asyncio.TimeoutError:
         print("    X [Weather] 超时！跳过天气查询")
         return {"weather_report": "⚠️ 天气服务响应超时 (跳过)"}
     except Exception as e:
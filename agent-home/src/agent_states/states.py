@@ -2,6 +2,14 @@ import operator
 from typing_extensions import TypedDict, Annotated, List, Dict
 from langchain_core.messages import BaseMessage
 
+
+def extend_or_reset(left: list, right: list | None) -> list:
+    """并行分支结果的归并器：追加 right；right 为 None 时清空（新一轮任务开始时使用）。"""
+    if right is None:
+        return []
+    return (left or []) + right
+
+
 # 1. 定义自定义 State
 class MergeAgentState(TypedDict):
     # messages 是标准字段，使用 addReducer (operator.add) 使得并行分支的消息能合并
@@ -10,7 +18,7 @@ class MergeAgentState(TypedDict):
     # 自定义字段：存放 RSS 列表
     # 如果两个分支都写入这个字段，可以用 operator.add；这里只有一个分支写，直接定义即可
     rss_summaries: List[str] 
-    
+
     # 自定义字段：存放天气报告
     weather_report: str
 
@@ -55,4 +63,18 @@ class MergeAgentState(TypedDict):
 
     chat_node: str
 
-    chat_route: str
\ No newline at end of file
+    chat_route: str
+
+
+class RssOutputState(TypedDict):
+    """RSS 子图的输出：只把合并后的摘要交回主图（不能带 messages，否则主图的 operator.add 会把历史消息再追加一遍）。"""
+    rss_summaries: List[str]
+
+
+class RssState(RssOutputState):
+    """RSS 子图内部的 state。"""
+    # 本轮抓取到的各 RSS 源（url / entries / error），顺序与订阅列表一致
+    rss_feeds: List[Dict]
+
+    # 并行摘要的结果（每批一条：url / start / text），由 rss_collect 按源合并
+    rss_batches: Annotated[List[Dict], extend_or_reset]
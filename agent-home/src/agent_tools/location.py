@@ -1,5 +1,8 @@
-import requests
 from langchain_core.tools import tool
+
+# 使用 ip-api.com 的免费接口
+_LOCATION_API = 'http://ip-api.com/json/?lang=zh-CN'
+
 # 5. 原有的定位工具
 @tool(description="Get the current city location based on IP address.")
 def get_current_location():
@@ -8,13 +11,31 @@ def get_current_location():
     通过 IP 地址获取当前的城市名称。
     返回格式例如：Beijing, China 或 Shanghai
     """
+    from base_tools.http_client import http_get
+
     try:
-        # 使用 ip-api.com 的免费接口
-        response = requests.get('http://ip-api.com/json/?lang=zh-CN', timeout=5)
-        data = response.json()
-        if data['status'] == 'success':
-            return f"{data['city']}, {data['country']}"
-        else:
-            return "Unknown Location"
+        response = http_get(_LOCATION_API, timeout=5)
+        return _format_location(response.json())
     except Exception as e:
         return f"定位失败: {str(e)}"
+
+
+async def _aget_current_location():
+    """get_current_location 的异步版本：走共享的 httpx 连接池。"""
+    from base_tools.http_client import ahttp_get
+
+    print(">>> [Location Tool] 正在获取当前城市信息...")
+    try:
+        response = await ahttp_get(_LOCATION_API, timeout=5)
+        return _format_location(response.json())
+    except Exception as e:
+        return f"定位失败: {str(e)}"
+
+
+get_current_location.coroutine = _aget_current_location
+
+
+def _format_location(data: dict) -> str:
+    if data['status'] == 'success':
+        return f"{data['city']}, {data['country']}"
+    return "Unknown Location"
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+按节点划分的工具集（tool profile）。
+
+以前每个 Agent 都绑定 ALL_TOOLS：每次模型调用都要带上全部工具的 schema
+（save_vectors_to_qdrant 的参数还是原始浮点数组），模型也更容易去调无关的工具。
+现在每个节点只绑定自己需要的工具：
+- weather：定位 + 搜索；
+- doc：搜索 + 读网页；
+- rewrite / assistant：改写类任务，不带工具（一次模型调用即结束）；
+- all：全部工具（兼容 model_with_tools 等旧入口）。
+RSS 流水线已经不经过 Agent（见 agent_nodes/rss.py），不需要 profile。
+
+单个 profile 可用 TOOL_PROFILE_<NAME>=工具名,工具名 覆盖；TOOL_PROFILES_ENABLED=false 时所有 profile 退回全部工具，便于对比。
+profile_stats() 给出每个 profile 的 schema 体积、相对 ALL_TOOLS 每次调用省下的 prompt token（估算），
+以及各节点实际运行中的模型调用次数、工具调用次数和实际输入 token。
+"""
+import os
+import json
+import threading
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+
+from agent_tools.tools import ALL_TOOLS
+
+TOOL_PROFILES_ENABLED = os.getenv("TOOL_PROFILES_ENABLED", "true").lower() not in ("0", "false", "no")
+
+_DEFAULT_PROFILES: Dict[str, Tuple[str, ...]] = {
+    "weather": ("get_current_location", "duckduckgo_search"),
+    "doc": ("duckduckgo_search", "web_browser", "web_fetch"),
+    "rewrite": (),
+    "assistant": (),
+    "all": tuple(t.name for t in ALL_TOOLS),
+}
+
+
+def _load_profiles() -> Dict[str, Tuple[str, ...]]:
+    profiles = dict(_DEFAULT_PROFILES)
+    for name in profiles:
+        override = os.getenv(f"TOOL_PROFILE_{name.upper()}")
+        if override is not None:
+            profiles[name] = tuple(n.strip() for n in override.split(",") if n.strip())
+    return profiles
+
+
+TOOL_PROFILES: Dict[str, Tuple[str, ...]] = _load_profiles()
+
+_TOOLS_BY_NAME = {t.name: t for t in ALL_TOOLS}
+
+
+def get_tools(profile: str) -> List[Any]:
+    """返回 profile 对应的工具列表（顺序与 ALL_TOOLS 一致）；未知 profile 抛 KeyError。"""
+    names = TOOL_PROFILES[profile]
+    if not TOOL_PROFILES_ENABLED:
+        return list(ALL_TOOLS)
+    unknown = [n for n in names if n not in _TOOLS_BY_NAME]
+    if unknown:
+        print(f"⚠️ [Tool Profile] {profile} 中的工具不存在，已忽略: {unknown}")
+    return [t for t in ALL_TOOLS if t.name in names]
+
+
+# {(模型, profile): (模型, 绑定了工具的模型)}；保留模型引用，保证 id(model) 不会被复用
+_bound: Dict[Tuple[Hashable, str], Tuple[Any, Any]] = {}
+_bound_lock = threading.Lock()
+
+
+def get_bound_model(model: Any, profile: str) -> Any:
+    """获取（必要时创建）绑定了 profile 工具的模型；没有工具时直接返回原模型。"""
+    key = (id(model), profile)
+    entry = _bound.get(key)
+    if entry is None:
+        with _bound_lock:
+            entry = _bound.get(key)
+            if entry is None:
+                tools = get_tools(profile)
+                entry = (model, model.bind_tools(tools) if tools else model)
+                _bound[key] = entry
+    return entry[1]
+
+
+def _estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：ASCII 约 4 字符 / token，中文等约 1.5 字符 / token（不依赖分词器下载）。"""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return round(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5)
+
+
+def _schema_tokens(tools: Sequence[Any]) -> int:
+    """工具 schema（OpenAI function 格式）随每次模型调用发送的估算 token 数。"""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    if not tools:
+        return 0
+    return _estimate_tokens(json.dumps([convert_to_openai_tool(t) for t in tools], ensure_ascii=False))
+
+
+class _ProfileStats:
+    """各 profile 的运行统计（线程安全）。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[str, Dict[str, int]] = {}
+        self._schema: Dict[str, int] = {}
+
+    def schema_tokens(self, profile: str) -> int:
+        if profile not in self._schema:
+            self._schema[profile] = _schema_tokens(get_tools(profile))
+        return self._schema[profile]
+
+    def record(self, profile: str, messages: Sequence[Any]) -> None:
+        """按一次 Agent 运行的消息记录模型调用、工具调用与实际输入 token。"""
+        ai_messages = [m for m in messages if getattr(m, "type", "") == "ai"]
+        tool_calls = sum(len(getattr(m, "tool_calls", None) or []) for m in ai_messages)
+        input_tokens = sum((getattr(m, "usage_metadata", None) or {}).get("input_tokens", 0) for m in ai_messages)
+        with self._lock:
+            runs = self._runs.setdefault(profile, {"runs": 0, "model_calls": 0, "tool_calls": 0, "input_tokens": 0})
+            runs["runs"] += 1
+            runs["model_calls"] += len(ai_messages)
+            runs["tool_calls"] += tool_calls
+            runs["input_tokens"] += input_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        full = self.schema_tokens("all")
+        result = {}
+        for profile in TOOL_PROFILES:
+            tokens = self.schema_tokens(profile)
+            with self._lock:
+                runs = dict(self._runs.get(profile, {}))
+            item = {
+                "tools": [t.name for t in get_tools(profile)],
+                "schema_tokens": tokens,
+                "saved_tokens_per_call": full - tokens,
+            }
+            if runs:
+                item.update(runs)
+                item["tool_calls_per_run"] = round(runs["tool_calls"] / runs["runs"], 2)
+                item["estimated_saved_tokens"] = runs["model_calls"] * (full - tokens)
+            result[profile] = item
+        return {"enabled": TOOL_PROFILES_ENABLED, "profiles": result}
+
+
+_stats = _ProfileStats()
+
+
+def record_agent_run(profile: str, result: Dict[str, Any]) -> None:
+    """节点在 Agent 运行结束后调用，记录该 profile 的调用情况。"""
+    try:
+        _stats.record(profile, result.get("messages") or [])
+    except Exception as e:
+        print(f"⚠️ [Tool Profile] 统计失败: {e}")
+
+
+def profile_stats() -> Dict[str, Any]:
+    """返回各 profile 的 schema 体积、估算节省的 token 以及运行统计。"""
+    return _stats.stats()
@@ -1,74 +1,193 @@
 import re
-import requests
-import feedparser
+import time
+import asyncio
+import hashlib
+from typing import Dict, List
 from langchain_core.tools import tool
 
+_RSS_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+
 # 4. 原有的 RSS Reader 工具
 @tool(description="Read and summarize the latest content from an RSS feed URL.")
 def rss_reader(url: str) -> str:
     print(">>> [RSS Reader Tool] 正在读取 RSS 内容...")
     """
     读取 RSS 订阅源的最新内容。
-    增强版：自动处理编码问题、模拟浏览器、处理重定向。
+    增强版：自动处理编码问题、模拟浏览器、处理重定向；经过订阅源缓存（条件请求）。
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-        "Cache-Control": "no-cache",
-        "Connection": "keep-alive"
-    }
+    try:
+        return _format_entries(fetch_feed_entries(url))
+    except Exception as e:
+        return f"读取发生错误: {str(e)}"
+
 
+async def _arss_reader(url: str) -> str:
+    """rss_reader 的异步版本：走共享的 httpx 连接池（不校验证书，与同步版一致）。"""
+    print(">>> [RSS Reader Tool] 正在读取 RSS 内容...")
     try:
+        return _format_entries(await afetch_feed_entries(url))
+    except Exception as e:
+        return f"读取发生错误: {str(e)}"
+
+
+rss_reader.coroutine = _arss_reader
+
+
+def _store_response(record, url: str, status_code: int, headers, content: bytes) -> List[Dict[str, str]]:
+    """
+    处理一次（条件）请求的响应并更新缓存，返回缓存粒度（FEED_CACHE_MAX_ENTRIES 篇）的文章列表。
+    304 或响应体未变化时直接复用旧记录的文章，不调用 feedparser。
+    """
+    from base_tools.feed_cache import (
+        FEED_CACHE_ENTRY_CHARS, FEED_CACHE_MAX_ENTRIES, FeedRecord, get_feed_cache,
+    )
+
+    cache = get_feed_cache()
+    if status_code == 304:
+        if record is None:
+            raise ValueError("服务端返回 304，但本地没有缓存记录")
+        cache.count("not_modified")
+        record.fetched_at = time.time()
+        record.etag = headers.get("etag") or record.etag
+        record.last_modified = headers.get("last-modified") or record.last_modified
+        cache.put(record)
+        return record.entries
+
+    content_hash = hashlib.sha1(content).hexdigest()
+    if record is not None and record.content_hash == content_hash:
+        cache.count("unchanged")
+        entries = record.entries
+    else:
+        cache.count("parsed")
+        entries = _parse_feed(content, FEED_CACHE_MAX_ENTRIES, FEED_CACHE_ENTRY_CHARS)
+    cache.put(FeedRecord(
+        url=url,
+        entries=entries,
+        etag=headers.get("etag", ""),
+        last_modified=headers.get("last-modified", ""),
+        content_hash=content_hash,
+        fetched_at=time.time(),
+    ))
+    return entries
+
+
+def fetch_feed_entries(url: str, limit: int = 5, max_chars: int = 1000) -> List[Dict[str, str]]:
+    """抓取并解析一个 RSS 源：新鲜期内直接用缓存，过期后发条件请求，失败时退回旧记录。"""
+    from base_tools.feed_cache import FEED_CACHE_ENABLED, get_feed_cache, slice_entries
+    from base_tools.http_client import http_get
+
+    if not FEED_CACHE_ENABLED:
         # verify=False 防止 SSL 证书报错
-        response = requests.get(url, headers=headers, timeout=20, verify=False)
-        
-        # 智能编码检测
-        if response.encoding == 'ISO-8859-1' or response.encoding == 'latin-1':
-            response.encoding = 'utf-8'
-        
-        content_data = response.content
-        feed = feedparser.parse(content_data)
-        
-        # 二次尝试解析
-        if not feed.entries and feed.bozo:
-             try:
-                 feed = feedparser.parse(content_data.decode('utf-8'))
-             except:
-                 pass
-
-        if not feed.entries:
-            return f"连接成功 (Status: {response.status_code})，但未解析到文章。可能原因：RSS 格式不标准或被反爬拦截。"
-
-        results = []
-        for entry in feed.entries[:5]:
-            title = entry.get('title', '无标题')
-            link = entry.get('link', '#')
-            published = entry.get('published', entry.get('updated', entry.get('created', '时间未知')))
-            
-            content = ""
-            if 'content' in entry:
-                content = entry.content[0].value
-            elif 'summary_detail' in entry:
-                content = entry.summary_detail.value
-            else:
-                content = entry.get('summary', entry.get('description', '无内容'))
-
-            text_content = re.sub('<[^<]+?>', '', content)
-            text_content = re.sub(r'\s+', ' ', text_content).strip()
-            
-            preview = text_content[:1000]
-            if len(text_content) > 1000:
-                preview += "..."
-
-            results.append(f"""
-            【文章标题】{title}
-            【发布时间】{published}
-            【原文链接】{link}
-            【文章内容】{preview}
-            """)
-            
-        return "\n-----------------\n".join(results)
+        response = http_get(url, verify=False, headers=_RSS_HEADERS, timeout=20)
+        response.raise_for_status()
+        return _parse_feed(response.content, limit, max_chars)
 
+    cache = get_feed_cache()
+    record = cache.get(url)
+    if record is not None and record.is_fresh():
+        cache.count("fresh_hits")
+        return slice_entries(record.entries, limit, max_chars)
+    try:
+        headers = {**_RSS_HEADERS, **(record.validators() if record else {})}
+        response = http_get(url, verify=False, headers=headers, timeout=20)
+        if response.status_code != 304:
+            response.raise_for_status()
+        entries = _store_response(record, url, response.status_code, response.headers, response.content)
     except Exception as e:
-        return f"读取发生错误: {str(e)}"
+        if record is None:
+            raise
+        print(f"⚠️ [RSS] 拉取 {url} 失败（{e}），返回缓存中的旧内容")
+        cache.count("stale_served")
+        entries = record.entries
+    return slice_entries(entries, limit, max_chars)
+
+
+async def afetch_feed_entries(url: str, limit: int = 5, max_chars: int = 1000) -> List[Dict[str, str]]:
+    """fetch_feed_entries 的异步版本（供 RSS 流水线直接调用，不经过 Agent）。"""
+    from base_tools.feed_cache import FEED_CACHE_ENABLED, get_feed_cache, slice_entries
+    from base_tools.http_client import ahttp_get
+
+    if not FEED_CACHE_ENABLED:
+        response = await ahttp_get(url, verify=False, headers=_RSS_HEADERS, timeout=20)
+        response.raise_for_status()
+        # feedparser 解析是纯 CPU 计算，大订阅源可能耗时数十毫秒，放到线程里不卡事件循环
+        return await asyncio.to_thread(_parse_feed, response.content, limit, max_chars)
+
+    cache = get_feed_cache()
+    # 持久层可能是 sqlite / Mongo，读写都放到线程里
+    record = await asyncio.to_thread(cache.get, url)
+    if record is not None and record.is_fresh():
+        cache.count("fresh_hits")
+        return slice_entries(record.entries, limit, max_chars)
+    try:
+        headers = {**_RSS_HEADERS, **(record.validators() if record else {})}
+        response = await ahttp_get(url, verify=False, headers=headers, timeout=20)
+        if response.status_code != 304:
+            response.raise_for_status()
+        entries = await asyncio.to_thread(
+            _store_response, record, url, response.status_code, response.headers, response.content
+        )
+    except Exception as e:
+        if record is None:
+            raise
+        print(f"⚠️ [RSS] 拉取 {url} 失败（{e}），返回缓存中的旧内容")
+        cache.count("stale_served")
+        entries = record.entries
+    return slice_entries(entries, limit, max_chars)
+
+
+def _parse_feed(content_data: bytes, limit: int = 5, max_chars: int = 1000) -> List[Dict[str, str]]:
+    """解析 RSS 内容，返回前 limit 篇文章（title/link/published/content，正文去标签并截断）。"""
+    import feedparser
+
+    feed = feedparser.parse(content_data)
+    # 二次尝试解析
+    if not feed.entries and feed.bozo:
+        try:
+            feed = feedparser.parse(content_data.decode('utf-8'))
+        except Exception:
+            pass
+
+    entries = []
+    for entry in feed.entries[:limit]:
+        if 'content' in entry:
+            content = entry.content[0].value
+        elif 'summary_detail' in entry:
+            content = entry.summary_detail.value
+        else:
+            content = entry.get('summary', entry.get('description', '无内容'))
+
+        text_content = re.sub('<[^<]+?>', '', content)
+        text_content = re.sub(r'\s+', ' ', text_content).strip()
+        preview = text_content[:max_chars]
+        if len(text_content) > max_chars:
+            preview += "..."
+
+        entries.append({
+            "title": entry.get('title', '无标题'),
+            "link": entry.get('link', '#'),
+            "published": entry.get('published', entry.get('updated', entry.get('created', '时间未知'))),
+            "content": preview,
+        })
+    return entries
+
+
+def _format_entries(entries: List[Dict[str, str]]) -> str:
+    """格式化文章列表（同步 / 异步版本共用）。"""
+    if not entries:
+        return "连接成功，但未解析到文章。可能原因：RSS 格式不标准或被反爬拦截。"
+
+    results = []
+    for entry in entries:
+        results.append(f"""
+            【文章标题】{entry['title']}
+            【发布时间】{entry['published']}
+            【原文链接】{entry['link']}
+            【文章内容】{entry['content']}
+            """)
+
+    return "\n-----------------\n".join(results)
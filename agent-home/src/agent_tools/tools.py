@@ -1,11 +1,13 @@
-from langchain_community.tools import DuckDuckGoSearchRun
+from langchain_community.tools.ddg_search.tool import DuckDuckGoSearchRun
 from agent_tools.web_process import web_fetch
 from agent_tools.web_process import web_browser
 from agent_tools.web_process import index_web_page_to_qdrant
+from agent_tools.web_process import bulk_index_web_pages
 from agent_tools.subscribe import rss_reader
 from agent_tools.location import get_current_location
 from agent_tools.weather import get_weather
 from agent_tools.vectordb import save_vectors_to_qdrant
+from base_tools.tool_cache import cache_tools
 
 
 
@@ -14,7 +16,8 @@ from agent_tools.vectordb import save_vectors_to_qdrant
 search = DuckDuckGoSearchRun() 
 
 # --- 汇总导出 ---
-ALL_TOOLS = [
+# 按工具套上结果缓存（TTL 见 base_tools.tool_cache.DEFAULT_TOOL_TTLS），写向量库的工具原样导出
+ALL_TOOLS = cache_tools([
     web_browser,
     rss_reader,
     search,
@@ -23,4 +26,5 @@ ALL_TOOLS = [
     get_weather,
     save_vectors_to_qdrant,
     index_web_page_to_qdrant,
-]
\ No newline at end of file
+    bulk_index_web_pages,
+])
@@ -1,7 +1,6 @@
 from langchain_core.tools import tool
 from typing import List, Optional, Dict
 from uuid import uuid4
-from base_tools.vertordb import _get_qdrant_client
 @tool(
     description=(
         "将已经计算好的向量写入 Qdrant 向量数据库。\n"
@@ -20,29 +19,58 @@ def save_vectors_to_qdrant(
 ) -> str:
     """
     将一批向量写入 Qdrant：
-    - 如果集合不存在，会自动根据首个向量的维度创建集合（使用 COSINE 距离）。
+    - 如果集合不存在，会自动根据首个向量的维度创建集合（使用 COSINE 距离）；
+      已存在的集合会校验维度，不会被重建。
     - 写入完成后返回写入的向量条数。
     """
     print(f">>> [Qdrant] 正在将向量写入集合{collection_name}...")
     print(f">>> [Qdrant] 向量数量: {len(vectors)}")
-    print(f">>> [Qdrant] 向量维度: {len(vectors[0])}")
-    print(f">>> [Qdrant] 向量payloads: {payloads}")
-    print(f">>> [Qdrant] 向量ids: {ids}")      
     if not vectors:
         print(">>> [Qdrant] 未收到任何向量，已跳过写入。")
         return "未收到任何向量，已跳过写入。"
+    print(f">>> [Qdrant] 向量维度: {len(vectors[0])}")
+    from base_tools.vertordb import upsert_points
+
+    points = _build_points(vectors, payloads, ids)
+    # 集合不存在时自动创建；已存在时只做本地维度校验，不额外请求
+    try:
+        upsert_points(collection_name, points)
+    except ValueError as e:
+        return f"写入失败：{e}"
+    return f"成功写入 {len(points)} 条向量到 Qdrant 集合 `{collection_name}` 中。"
 
-    dim = len(vectors[0])
-    client = _get_qdrant_client()
 
-    # 确保集合存在
+async def _asave_vectors_to_qdrant(
+    collection_name: str,
+    vectors: List[List[float]],
+    payloads: Optional[List[Dict]] = None,
+    ids: Optional[List[str]] = None,
+) -> str:
+    """save_vectors_to_qdrant 的异步版本：使用异步 Qdrant 客户端写入。"""
+    print(f">>> [Qdrant] 正在将向量写入集合{collection_name}...")
+    if not vectors:
+        print(">>> [Qdrant] 未收到任何向量，已跳过写入。")
+        return "未收到任何向量，已跳过写入。"
+    from base_tools.vertordb import aupsert_points
+
+    points = _build_points(vectors, payloads, ids)
     try:
-        client.get_collection(collection_name)
-    except Exception:
-        client.recreate_collection(
-            collection_name,
-            vectors_config = client.models.VectorParams(size=dim, distance=client.models.Distance.COSINE),
-        )
+        await aupsert_points(collection_name, points)
+    except ValueError as e:
+        return f"写入失败：{e}"
+    return f"成功写入 {len(points)} 条向量到 Qdrant 集合 `{collection_name}` 中。"
+
+
+save_vectors_to_qdrant.coroutine = _asave_vectors_to_qdrant
+
+
+def _build_points(
+    vectors: List[List[float]],
+    payloads: Optional[List[Dict]],
+    ids: Optional[List[str]],
+) -> List:
+    """把向量 / payload / ID 组装成 PointStruct 列表（缺失的 ID 自动生成，payload 长度对齐）。"""
+    from qdrant_client import models as qmodels
 
     # 处理 IDs
     if ids is None or len(ids) != len(vectors):
@@ -55,11 +83,8 @@ def save_vectors_to_qdrant(
         # 长度不一致时，简单截断或填充
         payloads = (payloads + [{}] * len(vectors))[: len(vectors)]
 
-    points = [
-        client.models.PointStruct(id=pid, vector=vec, payload=pl)
+    return [
+        qmodels.PointStruct(id=pid, vector=vec, payload=pl)
         for pid, vec, pl in zip(ids, vectors, payloads)
     ]
 
-    client.upsert(collection_name=collection_name, points=points)
-    return f"成功写入 {len(points)} 条向量到 Qdrant 集合 `{collection_name}` 中。"
-
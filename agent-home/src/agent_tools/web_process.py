@@ -1,8 +1,91 @@
-import requests
+import os
+import codecs
+import asyncio
 from langchain_core.tools import tool
-from langchain_community.document_loaders import WebBaseLoader
-from base_tools.vertordb import _split_text_into_chunks, _embed_documents
-from agent_tools.vectordb import save_vectors_to_qdrant
+from typing import List, Optional
+
+# web_fetch / web_browser 返回的最大字符数
+WEB_MAX_CHARS = 5000
+# 单个网页最多读取的字节数：正文没收集够也不再继续下载
+WEB_MAX_BYTES = int(os.getenv("WEB_MAX_BYTES", str(1024 * 1024)))
+
+
+class _RawText:
+    """web_fetch 用：按响应头字符集增量解码原始内容，攒够 max_chars 个字符即停止。"""
+
+    def __init__(self, max_chars: int, encoding: Optional[str]):
+        self.max_chars = max_chars
+        self._decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        self._parts: List[str] = []
+        self._chars = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        text = self._decoder.decode(chunk)
+        self._parts.append(text)
+        self._chars += len(text)
+        return self._chars >= self.max_chars
+
+    def close(self) -> str:
+        self._parts.append(self._decoder.decode(b"", final=True))
+        return "".join(self._parts)[:self.max_chars]
+
+
+def _raw_sink(response):
+    return _RawText(WEB_MAX_CHARS, response.charset_encoding)
+
+
+def _main_text_sink(response):
+    from base_tools.html_text import MainTextExtractor
+
+    return MainTextExtractor(WEB_MAX_CHARS, response.charset_encoding)
+
+
+class NotTextContent(Exception):
+    """响应不是文本内容（PDF / 图片 / 二进制等）：不读取响应体，调用方跳过该网页。"""
+
+    def __init__(self, url: str, content_type: str):
+        self.url = url
+        self.content_type = content_type
+        super().__init__(f"跳过 {url}：不是文本内容（{content_type}）")
+
+
+def _read_page(url: str, make_sink, check_status: bool = False, **kwargs) -> str:
+    """
+    流式读取网页：sink 收集够内容或达到 WEB_MAX_BYTES 即停止下载。
+
+    异常:
+        NotTextContent: 非文本类型（不读响应体）
+        httpx.HTTPError: 网络错误 / check_status 时的非 2xx 状态
+    """
+    from base_tools.http_client import http_stream, is_text_content, iter_bounded
+
+    with http_stream(url, **kwargs) as response:
+        if check_status:
+            response.raise_for_status()
+        if not is_text_content(response):
+            raise NotTextContent(url, response.headers.get("content-type", ""))
+        sink = make_sink(response)
+        for chunk in iter_bounded(response, WEB_MAX_BYTES):
+            if sink.feed(chunk):
+                break
+    return sink.close()
+
+
+async def _aread_page(url: str, make_sink, check_status: bool = False, **kwargs) -> str:
+    """_read_page 的异步版本。"""
+    from base_tools.http_client import ahttp_stream, aiter_bounded, is_text_content
+
+    async with ahttp_stream(url, **kwargs) as response:
+        if check_status:
+            response.raise_for_status()
+        if not is_text_content(response):
+            raise NotTextContent(url, response.headers.get("content-type", ""))
+        sink = make_sink(response)
+        async for chunk in aiter_bounded(response, WEB_MAX_BYTES):
+            if sink.feed(chunk):
+                break
+    return sink.close()
+
 
 # 2. 定义 Web Fetch 工具
 @tool(description="Fetch the content of a web page directly.")
@@ -12,14 +95,36 @@ def web_fetch(url: str) -> str:
     Fetch the content of a web page directly.
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        return response.text[:5000]  # 返回前5000字符
+        return _read_page(url, _raw_sink, timeout=10)  # 返回前5000字符
+    except NotTextContent as e:
+        return str(e)
+    except Exception as e:
+        return f"Failed to fetch {url}: {e}"
+
+
+async def _aweb_fetch(url: str) -> str:
+    """web_fetch 的异步版本：走共享的 httpx 连接池。"""
+    print(f">>> [Web Fetch Tool] 正在抓取网页内容{url}...")
+    try:
+        return await _aread_page(url, _raw_sink, timeout=10)
+    except NotTextContent as e:
+        return str(e)
     except Exception as e:
         return f"Failed to fetch {url}: {e}"
 
+
+web_fetch.coroutine = _aweb_fetch
+
+def _browse(url: str) -> str:
+    """读取网页正文（边下载边提取，去掉导航 / 页脚 / 侧栏等模板内容，够 5000 字符就停止下载）；失败时抛异常。"""
+    return " ".join(_read_page(url, _main_text_sink, check_status=True).split())
+
+
+async def _abrowse(url: str) -> str:
+    """_browse 的异步版本。"""
+    return " ".join((await _aread_page(url, _main_text_sink, check_status=True)).split())
+
+
 # 3. 原有的 Web Browser 工具
 @tool(description="Browse and read the content of a web page.")
 def web_browser(url: str) -> str:
@@ -29,14 +134,26 @@ def web_browser(url: str) -> str:
     当用户想要了解某个网页、链接或文章的内容时，使用此工具。
     """
     try:
-        loader = WebBaseLoader(url)
-        docs = loader.load()
-        content = docs[0].page_content
-        content = " ".join(content.split())
-        return content[:5000]
+        return _browse(url)
+    except NotTextContent as e:
+        return str(e)
     except Exception as e:
         return f"无法读取该网页，错误信息: {e}"
 
+
+async def _aweb_browser(url: str) -> str:
+    """web_browser 的异步版本。"""
+    print(f">>> [Web Browser Tool] 正在访问网页P{url}...")
+    try:
+        return await _abrowse(url)
+    except NotTextContent as e:
+        return str(e)
+    except Exception as e:
+        return f"无法读取该网页，错误信息: {e}"
+
+
+web_browser.coroutine = _aweb_browser
+
 @tool(
     description=(
         "抓取指定网页内容，进行简单切分和向量化，并将结果写入本地 Qdrant 向量数据库。\n"
@@ -50,27 +167,107 @@ def index_web_page_to_qdrant(url: str, collection_name: str = "web_pages") -> st
     print(f">>> [Index Web] 开始抓取并索引网页{url}...")
     """
     流程：
-    1. 使用 web_browser 抓取网页正文；
+    1. 抓取网页正文（非文本 / 出错时直接返回，不会把提示信息当作正文入库）；
     2. 将正文切分为多个片段；
-    3. 对每个片段做简单向量化；
-    4. 调用 save_vectors_to_qdrant 写入 Qdrant。
+    3. 按批向量化片段；
+    4. 按批写入 Qdrant（见 base_tools.ingest.ingest_stream）。
     """
+    from base_tools.ingest import ingest_stream
+
+    print(">>> [Index Web] 开始抓取并索引网页:", url)
+    try:
+        raw_text = _browse(url)
+    except NotTextContent as e:
+        return str(e)
+    except Exception as e:
+        return f"抓取网页失败: {e}"
+    if not raw_text:
+        return "网页抓取成功，但未得到有效文本内容。"
+
+    try:
+        stats = ingest_stream(raw_text, collection_name, payload={"url": url}, max_len=500)
+    except ValueError as e:
+        return f"写入失败：{e}"
+    if not stats.chunks:
+        return "网页抓取成功，但未得到有效文本内容。"
+    return f"成功写入 {stats.chunks} 条向量到 Qdrant 集合 `{collection_name}` 中，网页共切分为 {stats.chunks} 个片段。"
+
+
+async def _aindex_web_page_to_qdrant(url: str, collection_name: str = "web_pages") -> str:
+    """index_web_page_to_qdrant 的异步版本：异步抓取，切分 / 向量化 / 写入放到线程里执行。"""
+    from base_tools.ingest import ingest_stream
+
     print(">>> [Index Web] 开始抓取并索引网页:", url)
-    raw_text = web_browser(url)
-    if not raw_text or "错误" in str(raw_text):
-        return f"抓取网页失败: {raw_text}"
+    try:
+        raw_text = await _abrowse(url)
+    except NotTextContent as e:
+        return str(e)
+    except Exception as e:
+        return f"抓取网页失败: {e}"
+    if not raw_text:
+        return "网页抓取成功，但未得到有效文本内容。"
 
-    chunks = _split_text_into_chunks(str(raw_text), max_len=500)
-    if not chunks:
+    try:
+        stats = await asyncio.to_thread(ingest_stream, raw_text, collection_name, payload={"url": url}, max_len=500)
+    except ValueError as e:
+        return f"写入失败：{e}"
+    if not stats.chunks:
         return "网页抓取成功，但未得到有效文本内容。"
+    return f"成功写入 {stats.chunks} 条向量到 Qdrant 集合 `{collection_name}` 中，网页共切分为 {stats.chunks} 个片段。"
+
 
-    # 使用批量向量化（更高效）
-    vectors = _embed_documents(chunks)
-    payloads = [{"url": url, "text": chunk} for chunk in chunks]
+index_web_page_to_qdrant.coroutine = _aindex_web_page_to_qdrant
 
-    summary = save_vectors_to_qdrant(
-        collection_name=collection_name,
-        vectors=vectors,
-        payloads=payloads,
+
+@tool(
+    description=(
+        "批量抓取网页并写入 Qdrant 向量数据库（并发抓取、流水线索引、断点续传，已索引的 URL 自动跳过）。\n"
+        "参数：\n"
+        "- urls: 需要索引的网页地址列表\n"
+        "- sitemap: 可选的 sitemap.xml 地址，其中的页面会一并索引\n"
+        "- collection_name: 向量集合名称，默认 'web_pages'"
     )
-    return f"{summary} 网页共切分为 {len(chunks)} 个片段。"
+)
+def bulk_index_web_pages(
+    urls: Optional[List[str]] = None,
+    sitemap: str = "",
+    collection_name: str = "web_pages",
+) -> str:
+    print(f">>> [Bulk Index] 开始批量索引 {len(urls or [])} 个 URL，sitemap={sitemap or '无'}")
+    if not urls and not sitemap:
+        return "未提供任何 URL 或 sitemap。"
+    from base_tools.web_crawler import bulk_index
+
+    try:
+        stats = bulk_index(urls or [], collection_name, sitemap=sitemap or None)
+    except Exception as e:
+        return f"批量索引失败: {e}"
+    return _bulk_index_summary(stats)
+
+
+async def _abulk_index_web_pages(
+    urls: Optional[List[str]] = None,
+    sitemap: str = "",
+    collection_name: str = "web_pages",
+) -> str:
+    """bulk_index_web_pages 的异步版本：直接在当前事件循环上运行爬虫。"""
+    print(f">>> [Bulk Index] 开始批量索引 {len(urls or [])} 个 URL，sitemap={sitemap or '无'}")
+    if not urls and not sitemap:
+        return "未提供任何 URL 或 sitemap。"
+    from base_tools.web_crawler import abulk_index
+
+    try:
+        stats = await abulk_index(urls or [], collection_name, sitemap=sitemap or None)
+    except Exception as e:
+        return f"批量索引失败: {e}"
+    return _bulk_index_summary(stats)
+
+
+def _bulk_index_summary(stats) -> str:
+    return (
+        f"批量索引完成：共 {stats.total} 个 URL，新索引 {stats.indexed} 个（{stats.chunks} 个片段），"
+        f"跳过 {stats.skipped} 个，失败 {stats.failed} 个，耗时 {stats.seconds:.1f} 秒。"
+    )
+
+
+bulk_index_web_pages.coroutine = _abulk_index_web_pages
@@ -1,5 +1,7 @@
 # src/backend.py
 import os
+import sys
+import time
 import asyncio
 import uvicorn
 import logging
@@ -7,8 +9,9 @@ import json
 import urllib3
 import langchain
 from time import sleep
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from typing import Optional
+from typing import Any, Dict, Optional
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from fastapi.responses import StreamingResponse
@@ -19,19 +22,91 @@ from fastapi.middleware.cors import CORSMiddleware
 # 这样所有模块都可以通过 os.getenv() 访问这些变量
 load_dotenv()
 
-from agent.graph import graph
-from agent.rewrite_graph import rewrite_graph
-from models.model import _llm
-
 os.environ["USER_AGENT"] = "MyAIUserAgent/1.0"
-langchain.debug = True
+# LangChain 全局调试日志（每个 chunk 都会打印，开销很大），默认关闭
+langchain.debug = os.getenv("LANGCHAIN_DEBUG", "false").lower() in ("1", "true", "yes")
 # 屏蔽警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app_server = FastAPI()
+# 图、模型、工具、向量库等重依赖不在导入时加载，而是在 lifespan 中后台预热；
+# 探活接口立即可用，业务接口在预热完成前会等待它完成。
+_runtime_task: Optional["asyncio.Future[Dict[str, Any]]"] = None
+_runtime_loaded_in: Optional[float] = None
+
+
+def _load_runtime() -> Dict[str, Any]:
+    """导入图与依赖、预编译专家 Agent、拉起后台索引流水线（并重放上次未完成的任务）。"""
+    global _runtime_loaded_in
+    start = time.perf_counter()
+    from agent.graph import graph
+    from agent.rewrite_graph import rewrite_graph
+    from agent.agent_registry import warmup_agents
+    from agent_nodes.intent_router import warmup_intent_router
+    from base_tools.index_queue import get_index_pipeline
+
+    compiled = warmup_agents()
+    warmup_intent_router()
+    get_index_pipeline()
+    _runtime_loaded_in = time.perf_counter() - start
+    logger.info(f"后台预热完成：已预编译 {compiled} 个 Agent，耗时 {_runtime_loaded_in:.2f}s")
+    return {"graph": graph, "rewrite_graph": rewrite_graph}
+
+
+def _runtime_failed(task: "asyncio.Future[Dict[str, Any]]") -> bool:
+    """预热任务已结束但没有拿到结果（抛异常或被取消）。"""
+    return task.done() and (task.cancelled() or task.exception() is not None)
+
+
+async def _get_runtime() -> Dict[str, Any]:
+    """获取预热结果；预热尚未开始（如未走 lifespan）时立即开始，尚未完成时等待。
+
+    预热失败不会被缓存：本次调用抛出原异常，下一次调用重新预热。
+    """
+    global _runtime_task
+    if _runtime_task is None or _runtime_failed(_runtime_task):
+        _runtime_task = asyncio.ensure_future(asyncio.to_thread(_load_runtime))
+    task = _runtime_task
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        if _runtime_task is task and _runtime_failed(task):
+            _runtime_task = None
+        raise
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时在后台预热（不阻塞服务就绪），退出时排空索引队列、停止 embedding 微批 worker、关闭连接。"""
+    global _runtime_task
+    _runtime_task = asyncio.ensure_future(asyncio.to_thread(_load_runtime))
+    yield
+    try:
+        if _runtime_task is not None and not _runtime_task.cancelled():
+            await _runtime_task
+    except Exception as e:
+        logger.error(f"后台预热失败: {e}")
+    if "base_tools.index_queue" in sys.modules:
+        from base_tools.index_queue import shutdown_index_pipeline
+
+        logger.info("服务退出中，正在排空索引队列…")
+        await asyncio.to_thread(shutdown_index_pipeline)
+    if "base_tools.vertordb" in sys.modules:
+        from base_tools.vertordb import aclose_qdrant_client, close_embedding_batcher, close_qdrant_client
+
+        await asyncio.to_thread(close_embedding_batcher)
+        await aclose_qdrant_client()
+        close_qdrant_client()
+    if "base_tools.http_client" in sys.modules:
+        from base_tools.http_client import aclose_http_clients, close_http_clients
+
+        await aclose_http_clients()
+        close_http_clients()
+
+
+app_server = FastAPI(lifespan=lifespan)
 
 app_server.add_middleware(
     CORSMiddleware,
@@ -68,8 +143,33 @@ class TaskResponse(BaseModel):
 
 @app_server.get("/")
 def health_check():
-    """探活专用"""
-    return {"status": "running"}
+    """探活专用：不依赖任何重模块，ready 表示后台预热是否完成"""
+    task = _runtime_task
+    ready = task is not None and task.done() and not _runtime_failed(task)
+    return {"status": "running", "ready": ready, "warmup_seconds": _runtime_loaded_in}
+
+
+@app_server.get("/metrics")
+async def metrics():
+    """运行时指标：各级缓存的命中统计等"""
+    await _get_runtime()
+    from base_tools.embedding_cache import embedding_cache_stats
+    from base_tools.vertordb import embedding_batcher_stats
+    from base_tools.index_queue import index_queue_metrics
+    from agent_nodes.intent_router import intent_router_stats
+    from base_tools.feed_cache import feed_cache_stats
+    from base_tools.tool_cache import tool_cache_stats
+    from agent_tools.registry import profile_stats
+
+    return {
+        "embedding_cache": embedding_cache_stats(),
+        "embedding_batcher": embedding_batcher_stats(),
+        "index_queue": index_queue_metrics(),
+        "intent_router": intent_router_stats(),
+        "feed_cache": feed_cache_stats(),
+        "tool_cache": tool_cache_stats(),
+        "tool_profiles": profile_stats(),
+    }
 
 
 
@@ -98,6 +198,7 @@ async def run_agent_task(request: TriggerRequest):
 
         config = {"configurable": {"thread_id": thread_id}}
         try:
+            graph = (await _get_runtime())["graph"]
             async for named_event, messages_event, msg_chunks in graph.astream(
                 inputs,
                 stream_mode=["messages", "updates"],
@@ -114,7 +215,7 @@ async def run_agent_task(request: TriggerRequest):
                         yield f"data: {json.dumps({'type': 'chunk', 'content': msg_data.content}, ensure_ascii=False)}\n\n"
 
             # 流结束后检查是否处于中断（文档生成完成，等待改写）
-            state = graph.get_state(config)
+            state = await graph.aget_state(config)
             if state.next:  # 有待执行节点，说明是 interrupt_after 暂停
                 doc = (state.values or {}).get("doc", "")
                 logger.info("[interrupt] 文档生成完成，等待用户改写指令，doc 长度=%d", len(doc))
@@ -145,11 +246,14 @@ async def rewrite_selection(request: RewriteRequest):
             media_type="text/event-stream",
         )
 
+    runtime = await _get_runtime()
+    graph, rewrite_graph = runtime["graph"], runtime["rewrite_graph"]
     # 通过 thread 从主图读取 doc 上下文
     doc = ""
+    config = {}
     if thread_id:
         config = {"configurable": {"thread_id": thread_id}}
-        state = graph.get_state(config)
+        state = await graph.aget_state(config)
         logger.info("[rewrite-selection] 从 thread=%s 读取 state: %s", thread_id, state)
         doc = (state.values or {}).get("doc", "")
 
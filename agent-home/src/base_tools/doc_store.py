@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+文档级元数据存储（MongoDB）。
+
+向量库中每个片段只保留检索与过滤必需的字段（doc_id / chunk_id / chunk_hash / source / created_at / text），
+标题、用户意图、片段数等文档级信息每篇文档只存一份，放在 Mongo 中，以 doc_id 为 _id。
+未配置 MONGO_URI 时退回到向量库：每篇文档在 DOC_META_COLLECTION 集合中存一个点
+（point ID 即 doc_id，向量只是 1 维占位，元数据全部在 payload 中）；
+DOC_META_COLLECTION 设为空时不保存，并在每次跳过时打印日志。
+"""
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+from base_tools.mongo import _get_mongo_db
+
+# 文档元数据集合名
+MONGO_DOC_COLLECTION = os.getenv("MONGO_DOC_COLLECTION", "generated_docs")
+# 未配置 MONGO_URI 时存放文档元数据的向量库集合，为空表示不保存
+DOC_META_COLLECTION = os.getenv("DOC_META_COLLECTION", "doc_meta")
+
+_warned = False
+
+
+def _get_doc_collection():
+    """返回元数据集合；未配置 MONGO_URI 时返回 None。"""
+    global _warned
+    if not os.getenv("MONGO_URI"):
+        if not _warned:
+            target = f"向量库集合 `{DOC_META_COLLECTION}`" if DOC_META_COLLECTION else "任何地方（DOC_META_COLLECTION 为空）"
+            print(f"⚠️ 未设置 MONGO_URI，文档元数据将保存到{target}")
+            _warned = True
+        return None
+    return _get_mongo_db()[MONGO_DOC_COLLECTION]
+
+
+def _upsert_doc_point(doc_id: str, fields: Dict[str, Any]) -> bool:
+    """无 Mongo 时的退路：把文档记录写成 DOC_META_COLLECTION 中的一个点。"""
+    from qdrant_client import models as qmodels
+    from base_tools.vertordb import _get_qdrant_client, ensure_collection, upsert_points
+
+    if not DOC_META_COLLECTION:
+        print(f"    X [Doc Store] 未配置 MONGO_URI 与 DOC_META_COLLECTION，跳过文档 {doc_id} 的元数据写入")
+        return False
+    try:
+        client = _get_qdrant_client()
+        ensure_collection(DOC_META_COLLECTION, 1, client=client)
+        now = datetime.utcnow().isoformat() + "Z"
+        existing = client.retrieve(DOC_META_COLLECTION, ids=[doc_id], with_payload=["created_at"])
+        created_at = (existing[0].payload or {}).get("created_at", now) if existing else now
+        upsert_points(DOC_META_COLLECTION, [qmodels.PointStruct(
+            id=doc_id,
+            vector=[1.0],
+            payload={**fields, "doc_id": doc_id, "created_at": created_at, "updated_at": now},
+        )], client)
+        return True
+    except Exception as e:
+        print(f"    X [Doc Store] 写入文档元数据（{DOC_META_COLLECTION}）失败，已跳过: {e}")
+        return False
+
+
+def _get_doc_point(doc_id: str) -> Optional[Dict[str, Any]]:
+    """从 DOC_META_COLLECTION 读取文档记录，返回与 Mongo 文档相同的结构（含 _id）。"""
+    from base_tools.vertordb import _get_qdrant_client
+
+    if not DOC_META_COLLECTION:
+        return None
+    try:
+        client = _get_qdrant_client()
+        if not client.collection_exists(DOC_META_COLLECTION):
+            return None
+        points = client.retrieve(DOC_META_COLLECTION, ids=[doc_id], with_payload=True)
+    except Exception as e:
+        print(f"    X [Doc Store] 读取文档元数据（{DOC_META_COLLECTION}）失败: {e}")
+        return None
+    return {"_id": doc_id, **(points[0].payload or {})} if points else None
+
+
+def upsert_doc_metadata(doc_id: str, **fields: Any) -> bool:
+    """
+    写入 / 更新一篇文档的元数据。
+
+    参数:
+        doc_id: 文档 ID（与向量库 payload 中的 doc_id 一致）
+        **fields: 需要保存的字段，如 doc_key、user_intent、chunk_count
+
+    返回:
+        是否写入成功
+    """
+    collection = _get_doc_collection()
+    if collection is None:
+        return _upsert_doc_point(doc_id, fields)
+    now = datetime.utcnow()
+    try:
+        collection.update_one(
+            {"_id": doc_id},
+            {"$set": {**fields, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+            upsert=True,
+        )
+        return True
+    except Exception as e:
+        print(f"    X [Doc Store] 写入文档元数据失败: {e}")
+        return False
+
+
+def get_doc_metadata(doc_id: str) -> Optional[Dict[str, Any]]:
+    """读取一篇文档的元数据（未配置 Mongo 时读 DOC_META_COLLECTION），不存在时返回 None。"""
+    collection = _get_doc_collection()
+    if collection is None:
+        return _get_doc_point(doc_id)
+    try:
+        return collection.find_one({"_id": doc_id})
+    except Exception as e:
+        print(f"    X [Doc Store] 读取文档元数据失败: {e}")
+        return None
+
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding 内容寻址缓存。
+
+以 (模型名, 归一化文本哈希) 为 key 缓存向量，分两级：
+- 进程内 LRU（OrderedDict），命中时零拷贝返回；
+- 磁盘 SQLite（float32 BLOB），跨进程 / 重启后依然有效。
+
+只有两级都未命中的文本才会交给真正的 embedding 模型。
+"""
+import os
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from langchain_core.embeddings import Embeddings
+
+# 磁盘缓存路径，设置为空字符串则只使用内存缓存
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "agent-home", "embeddings.sqlite3"),
+)
+# 内存 LRU 最多保存的向量条数
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+# 总开关
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+def _normalize_text(text: str) -> str:
+    """归一化文本：NFKC + 折叠空白，避免仅空白不同的片段重复向量化。"""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def _chunk_hash(text: str) -> str:
+    """计算归一化文本的 sha256，作为内容寻址的 key。"""
+    return hashlib.sha256(_normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    两级 embedding 缓存（线程安全）。
+
+    参数:
+        path: SQLite 文件路径，None 或空字符串表示不启用磁盘层
+        max_items: 内存 LRU 最多保存的向量条数
+    """
+
+    def __init__(self, path: Optional[str] = None, max_items: int = 10000):
+        self.path = path or None
+        self.max_items = max(0, max_items)
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.path:
+            self._open_disk()
+
+    def _open_disk(self) -> None:
+        """打开（必要时创建）SQLite 磁盘层，失败时降级为纯内存缓存。"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " hash TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, hash)"
+                ") WITHOUT ROWID"
+            )
+            conn.commit()
+            self._conn = conn
+        except Exception as e:
+            print(f"⚠️ Embedding 磁盘缓存不可用（{self.path}）: {e}，仅使用内存缓存")
+            self._conn = None
+
+    def _remember(self, key: Tuple[str, str], vector: List[float]) -> None:
+        """写入内存 LRU（调用方需持有锁）。"""
+        if self.max_items == 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """
+        批量查询缓存。
+
+        参数:
+            model: 模型名
+            hashes: 文本哈希列表（可重复）
+
+        返回:
+            {hash: vector}，只包含命中的条目
+        """
+        found: Dict[str, List[float]] = {}
+        pending: List[str] = []
+        with self._lock:
+            for h in dict.fromkeys(hashes):
+                key = (model, h)
+                vec = self._memory.get(key)
+                if vec is not None:
+                    self._memory.move_to_end(key)
+                    found[h] = vec
+                    self.memory_hits += 1
+                else:
+                    pending.append(h)
+
+            if pending and self._conn is not None:
+                # SQLite 单条语句的变量数有上限，分批查询
+                for start in range(0, len(pending), 500):
+                    part = pending[start:start + 500]
+                    placeholders = ",".join("?" * len(part))
+                    rows = self._conn.execute(
+                        f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                        (model, *part),
+                    ).fetchall()
+                    for h, blob in rows:
+                        vec = array("f")
+                        vec.frombytes(blob)
+                        found[h] = vec.tolist()
+                        self._remember((model, h), found[h])
+                        self.disk_hits += 1
+
+            self.misses += sum(1 for h in pending if h not in found)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        """批量写入缓存（内存 + 磁盘）。"""
+        if not items:
+            return
+        with self._lock:
+            for h, vec in items.items():
+                self._remember((model, h), list(vec))
+            if self._conn is not None:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, hash, dim, vector) VALUES (?, ?, ?, ?)",
+                        [(model, h, len(vec), array("f", vec).tobytes()) for h, vec in items.items()],
+                    )
+                    self._conn.commit()
+                except Exception as e:
+                    print(f"⚠️ Embedding 磁盘缓存写入失败: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """返回命中 / 未命中计数与命中率。"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "memory_items": len(self._memory),
+                "disk_enabled": self._conn is not None,
+            }
+
+    def clear(self, disk: bool = False) -> None:
+        """清空内存层与计数器；disk=True 时同时清空磁盘层。"""
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = self.disk_hits = self.misses = 0
+            if disk and self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.commit()
+
+
+class _CachedEmbeddings(Embeddings):
+    """
+    带缓存的 Embeddings 包装器：先查缓存，只把未命中的文本交给底层模型。
+    查询向量与文档向量分开缓存（部分模型对 query 有不同的前缀处理）。
+    """
+
+    def __init__(self, inner: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.inner = inner
+        self.model_name = model_name
+        self.cache = cache
+
+    def _split_hits(self, texts: List[str], namespace: str) -> Tuple[List[str], Dict[str, List[float]], Dict[str, str]]:
+        """计算哈希并查缓存，返回 (哈希列表, 命中结果, 需要计算的 {哈希: 文本})。"""
+        hashes = [_chunk_hash(t) for t in texts]
+        found = self.cache.get_many(namespace, hashes)
+        todo: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in todo:
+                todo[h] = t
+        return hashes, found, todo
+
+    def _merge(self, namespace: str, hashes: List[str], found: Dict[str, List[float]],
+               todo: Dict[str, str], vectors: List[List[float]]) -> List[List[float]]:
+        """把新算出的向量写回缓存，并按原始顺序组装结果。"""
+        fresh = dict(zip(todo.keys(), vectors))
+        self.cache.put_many(namespace, fresh)
+        found.update(fresh)
+        return [found[h] for h in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """嵌入文档列表，仅对缓存未命中的文本调用底层模型。"""
+        if not texts:
+            return []
+        hashes, found, todo = self._split_hits(texts, self.model_name)
+        vectors = self.inner.embed_documents(list(todo.values())) if todo else []
+        return self._merge(self.model_name, hashes, found, todo, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        """嵌入查询文本（带缓存）。"""
+        namespace = f"{self.model_name}#query"
+        hashes, found, todo = self._split_hits([text], namespace)
+        vectors = [self.inner.embed_query(text)] if todo else []
+        return self._merge(namespace, hashes, found, todo, vectors)[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """异步版本的 embed_documents。"""
+        if not texts:
+            return []
+        hashes, found, todo = self._split_hits(texts, self.model_name)
+        vectors = await self.inner.aembed_documents(list(todo.values())) if todo else []
+        return self._merge(self.model_name, hashes, found, todo, vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """异步版本的 embed_query。"""
+        namespace = f"{self.model_name}#query"
+        hashes, found, todo = self._split_hits([text], namespace)
+        vectors = [await self.inner.aembed_query(text)] if todo else []
+        return self._merge(namespace, hashes, found, todo, vectors)[0]
+
+
+# 全局缓存实例（延迟初始化）
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """获取进程级共享的 embedding 缓存。"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE)
+    return _default_cache
+
+
+def embedding_cache_stats() -> Dict[str, float]:
+    """返回全局 embedding 缓存的命中统计。"""
+    return get_embedding_cache().stats()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+跨请求的动态微批 embedding 服务。
+
+各个调用方（文档索引线程、网页索引工具、异步节点）把待向量化的文本提交到同一个队列，
+后台 worker 把一段时间窗口内到达的请求拼成一个批次，只做一次前向计算，
+再把结果按请求拆分回各自的 Future。
+这样既能提高每秒向量数，也避免多个线程同时调用模型导致 CPU 过度订阅。
+"""
+import os
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+
+# 单批最多文本条数
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# 凑批最长等待时间（毫秒）
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+# worker 线程数（CPU 推理建议保持 1，由模型自身的 intra-op 线程并行）
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+# 总开关
+EMBEDDING_BATCHING_ENABLED = os.getenv("EMBEDDING_BATCHING", "true").lower() not in ("0", "false", "no")
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """
+    动态微批器：收集并发请求，按 max_batch_size / max_wait_ms 组批后统一向量化。
+
+    参数:
+        embedding: 底层 embedding 模型
+        max_batch_size: 单批最多文本条数（单个请求超过该值时独立成批）
+        max_wait_ms: 第一个请求到达后最多等待多久去凑批
+        num_workers: worker 线程数
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        max_batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_wait_ms: float = EMBEDDING_BATCH_WAIT_MS,
+        num_workers: int = EMBEDDING_WORKERS,
+    ):
+        self.embedding = embedding
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[object]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._texts = 0
+        self._requests = 0
+        self._busy_seconds = 0.0
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"embedding-batcher-{i}", daemon=True)
+            for i in range(max(1, num_workers))
+        ]
+        for t in self._workers:
+            t.start()
+
+    def submit(self, texts: List[str]) -> "Future[List[List[float]]]":
+        """提交一组文本，返回结果 Future（顺序与输入一致）。"""
+        future: "Future[List[List[float]]]" = Future()
+        if not texts:
+            future.set_result([])
+            return future
+        if self._closed:
+            future.set_exception(RuntimeError("EmbeddingBatcher 已关闭"))
+            return future
+        self._queue.put((list(texts), future))
+        return future
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """同步接口：提交并阻塞等待结果。"""
+        return self.submit(texts).result()
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """异步接口：提交后在事件循环中等待，不阻塞 loop。"""
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def _collect(self, first: Tuple[List[str], Future]) -> Tuple[List[Tuple[List[str], Future]], Optional[object]]:
+        """
+        以第一个请求为起点，在等待窗口内继续收集请求直到凑满一批。
+
+        返回:
+            (本批请求, 放不进本批、需要作为下一批起点的队列项)
+        """
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP or size + len(item[0]) > self.max_batch_size:
+                # 停止信号或放不下的请求留给下一轮，保证批大小上限且不打乱顺序
+                return batch, item
+            batch.append(item)
+            size += len(item[0])
+        return batch, None
+
+    def _worker_loop(self) -> None:
+        carry: Optional[object] = None
+        while True:
+            item, carry = (carry if carry is not None else self._queue.get()), None
+            if item is _STOP:
+                self._queue.put(_STOP)
+                return
+            collected, carry = self._collect(item)
+            batch = [(texts, fut) for texts, fut in collected if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            all_texts = [t for texts, _ in batch for t in texts]
+            start = time.perf_counter()
+            try:
+                vectors = self.embedding.embed_documents(all_texts)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            finally:
+                with self._stats_lock:
+                    self._batches += 1
+                    self._requests += len(batch)
+                    self._texts += len(all_texts)
+                    self._busy_seconds += time.perf_counter() - start
+            offset = 0
+            for texts, fut in batch:
+                fut.set_result(vectors[offset:offset + len(texts)])
+                offset += len(texts)
+
+    def stats(self) -> Dict[str, float]:
+        """返回批处理统计：批次数、平均批大小、吞吐等。"""
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "texts": self._texts,
+                "avg_batch_size": round(self._texts / self._batches, 2) if self._batches else 0.0,
+                "texts_per_second": round(self._texts / self._busy_seconds, 2) if self._busy_seconds else 0.0,
+                "queue_depth": self._queue.qsize(),
+            }
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """停止 worker（已入队的请求会先处理完）。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        for t in self._workers:
+            t.join(timeout)
+
+
+class _BatchingEmbeddings(Embeddings):
+    """
+    把 embed_documents / aembed_documents 转交给 EmbeddingBatcher 的包装器。
+    查询向量通常是单条且对延迟敏感，直接调用底层模型。
+    """
+
+    def __init__(self, batcher: EmbeddingBatcher):
+        self.batcher = batcher
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """经由微批 worker 嵌入文档列表。"""
+        return self.batcher.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """嵌入查询文本。"""
+        return self.batcher.embedding.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """异步嵌入文档列表（等待 Future，不阻塞事件循环）。"""
+        return await self.batcher.aembed(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """异步嵌入查询文本（在线程中执行，避免阻塞事件循环）。"""
+        return await asyncio.to_thread(self.batcher.embedding.embed_query, text)
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+RSS 订阅源缓存（条件请求 + 解析结果缓存）。
+
+每个 url 保存一条记录：ETag / Last-Modified、上次拉取时间、响应体哈希和「已解析、已清洗」的文章列表。
+- FEED_CACHE_TTL 秒内直接返回缓存的文章，不发请求；
+- 过期后带 If-None-Match / If-Modified-Since 发条件请求，304 时直接复用缓存的文章（不下载、不解析）；
+- 服务端不支持条件请求时，响应体哈希不变也跳过 feedparser 解析；
+- 拉取失败时有旧记录就返回旧记录（宁可旧一点，也不让早报空掉）。
+
+两级存储：进程内 dict + 持久层（FEED_CACHE_BACKEND=sqlite 默认 / mongo / memory）。
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+# 持久层：sqlite（本地文件）/ mongo（复用 MONGO_URI）/ memory（只在进程内）
+FEED_CACHE_BACKEND = os.getenv("FEED_CACHE_BACKEND", "sqlite").lower()
+FEED_CACHE_PATH = os.getenv(
+    "FEED_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "agent-home", "feeds.sqlite3"),
+)
+MONGO_FEED_COLLECTION = os.getenv("MONGO_FEED_COLLECTION", "feed_cache")
+# 新鲜期（秒）：期间不发任何请求
+FEED_CACHE_TTL = float(os.getenv("FEED_CACHE_TTL", "600"))
+# 缓存中每个源最多保存的文章数与单篇正文字符数（读取时再按调用方的 limit / max_chars 截取）
+FEED_CACHE_MAX_ENTRIES = int(os.getenv("FEED_CACHE_MAX_ENTRIES", "30"))
+FEED_CACHE_ENTRY_CHARS = int(os.getenv("FEED_CACHE_ENTRY_CHARS", "2000"))
+# 总开关
+FEED_CACHE_ENABLED = os.getenv("FEED_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+@dataclass
+class FeedRecord:
+    """一个订阅源的缓存记录。"""
+    url: str
+    entries: List[Dict[str, str]] = field(default_factory=list)
+    etag: str = ""
+    last_modified: str = ""
+    content_hash: str = ""
+    fetched_at: float = 0.0
+
+    def is_fresh(self, ttl: Optional[float] = None) -> bool:
+        return time.time() - self.fetched_at < (FEED_CACHE_TTL if ttl is None else ttl)
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求头。"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def slice_entries(entries: List[Dict[str, str]], limit: int, max_chars: int) -> List[Dict[str, str]]:
+    """按调用方的 limit / max_chars 截取缓存的文章（不修改缓存本身）。"""
+    result = []
+    for entry in entries[:limit]:
+        content = entry.get("content", "")
+        if len(content) > max_chars:
+            entry = {**entry, "content": content[:max_chars].rstrip(".") + "..."}
+        result.append(entry)
+    return result
+
+
+class _SqliteFeedStore:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS feeds (url TEXT PRIMARY KEY, record TEXT NOT NULL)")
+        self._conn.commit()
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT record FROM feeds WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, record: Dict[str, Any]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO feeds (url, record) VALUES (?, ?)",
+            (record["url"], json.dumps(record, ensure_ascii=False)),
+        )
+        self._conn.commit()
+
+
+class _MongoFeedStore:
+    def __init__(self):
+        from base_tools.mongo import _get_mongo_db
+
+        self._collection = _get_mongo_db()[MONGO_FEED_COLLECTION]
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        doc = self._collection.find_one({"_id": url})
+        if doc:
+            doc.pop("_id", None)
+        return doc
+
+    def save(self, record: Dict[str, Any]) -> None:
+        self._collection.replace_one({"_id": record["url"]}, record, upsert=True)
+
+
+class FeedCache:
+    """
+    订阅源缓存（线程安全）。持久层读写失败只打印警告，不影响抓取。
+
+    参数:
+        backend: sqlite / mongo / memory
+        path: sqlite 文件路径
+    """
+
+    def __init__(self, backend: str = "sqlite", path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._memory: Dict[str, FeedRecord] = {}
+        self._store = None
+        # fresh_hits: 新鲜期内未发请求；not_modified: 304；unchanged: 200 但内容未变（跳过解析）；
+        # parsed: 下载并解析；stale_served: 拉取失败，返回旧记录
+        self.counters = {"fresh_hits": 0, "not_modified": 0, "unchanged": 0, "parsed": 0, "stale_served": 0}
+        try:
+            if backend == "sqlite" and path:
+                self._store = _SqliteFeedStore(path)
+            elif backend == "mongo" and os.getenv("MONGO_URI"):
+                self._store = _MongoFeedStore()
+        except Exception as e:
+            print(f"⚠️ 订阅源缓存持久层不可用（{backend}）: {e}，仅使用内存缓存")
+
+    def get(self, url: str) -> Optional[FeedRecord]:
+        """先查内存，再查持久层（命中后回填内存）。"""
+        with self._lock:
+            record = self._memory.get(url)
+            if record is not None or self._store is None:
+                return record
+            try:
+                data = self._store.load(url)
+            except Exception as e:
+                print(f"⚠️ 订阅源缓存读取失败: {e}")
+                return None
+            if data:
+                record = FeedRecord(**data)
+                self._memory[url] = record
+            return record
+
+    def put(self, record: FeedRecord) -> None:
+        """写入内存与持久层。"""
+        with self._lock:
+            self._memory[record.url] = record
+            if self._store is not None:
+                try:
+                    self._store.save(asdict(record))
+                except Exception as e:
+                    print(f"⚠️ 订阅源缓存写入失败: {e}")
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """各类命中次数；network_saved_rate 为没有下载响应体的占比，parse_saved_rate 为没有重新解析的占比。"""
+        with self._lock:
+            total = sum(self.counters.values())
+            no_body = self.counters["fresh_hits"] + self.counters["not_modified"]
+            return {
+                **self.counters,
+                "feeds": len(self._memory),
+                "network_saved_rate": round(no_body / total, 4) if total else 0.0,
+                "parse_saved_rate": round(1 - self.counters["parsed"] / total, 4) if total else 0.0,
+                "backend": type(self._store).__name__ if self._store is not None else "memory",
+            }
+
+
+_default_cache: Optional[FeedCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_feed_cache() -> FeedCache:
+    """获取进程级共享的订阅源缓存。"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = FeedCache(FEED_CACHE_BACKEND, FEED_CACHE_PATH)
+    return _default_cache
+
+
+def feed_cache_stats() -> Dict[str, Any]:
+    """返回全局订阅源缓存的统计。"""
+    return get_feed_cache().stats()
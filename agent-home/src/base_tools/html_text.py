@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+增量式网页正文提取（web_browser 使用）。
+
+不再先下载完整 HTML、构建 BeautifulSoup 树再截断，而是边下载边解析：
+- 解析器是事件驱动的（lxml 的 target 解析器，C 实现；未安装 lxml 时退回标准库 html.parser），不构建 DOM；
+- 脚本 / 样式 / 导航 / 表单等标签，以及 class / id / role 像导航、页脚、侧栏、评论、广告的区块整体跳过；
+- 页面有 <article> / <main> 时优先取其中的文字；
+- 收集到足够的正文（max_chars）后 feed() 返回 True，调用方即可停止读取响应体。
+"""
+import re
+import codecs
+import importlib.util
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+LXML_AVAILABLE = importlib.util.find_spec("lxml") is not None
+
+# 整体跳过的标签
+_SKIP_TAGS = {
+    "head", "title", "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "footer", "aside", "form", "button", "select", "textarea",
+}
+# 前后换行的块级标签
+_BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "dl", "dt", "dd", "tr", "table", "section", "article", "main",
+    "header", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "figure", "figcaption", "hr",
+}
+_MAIN_TAGS = {"article", "main"}
+_BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog"}
+# class / id 中出现这些词（按 - _ 空格分词）的区块视为模板内容
+_BOILERPLATE_ATTR = re.compile(
+    r"(?:^|[\s_-])(?:nav|navbar|menu|footer|sidebar|breadcrumbs?|comments?|share|social|"
+    r"ads?|advert|banner|cookie|popup|modal|related|recommend)(?:$|[\s_-])",
+    re.IGNORECASE,
+)
+# <article> / <main> 中的文字少于该值时，认为正文识别失败，改用全页文字
+_MIN_MAIN_CHARS = 200
+
+
+def _is_boilerplate(tag: str, attrs: Dict[str, Optional[str]]) -> bool:
+    if tag in _SKIP_TAGS:
+        return True
+    if (attrs.get("role") or "").lower() in _BOILERPLATE_ROLES:
+        return True
+    marker = f"{attrs.get('class') or ''} {attrs.get('id') or ''}".strip()
+    return bool(marker) and _BOILERPLATE_ATTR.search(marker) is not None
+
+
+class _TextCollector:
+    """解析事件的接收方（接口与 lxml target 一致：start / end / data / close）。"""
+
+    def __init__(self, max_chars: Optional[int]):
+        self.max_chars = max_chars
+        self._all: List[str] = []
+        self._main: List[str] = []
+        self._all_chars = 0
+        self._main_chars = 0
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+        self._main_depth = 0
+
+    @property
+    def done(self) -> bool:
+        if self.max_chars is None:
+            return False
+        # 全页文字多留一倍余量：后面还可能出现 <article>
+        return self._main_chars >= self.max_chars or self._all_chars >= 2 * self.max_chars
+
+    def _newline(self) -> None:
+        self._all.append("\n")
+        if self._main_depth:
+            self._main.append("\n")
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        tag = tag.lower()
+        if self._skip_tag is not None:
+            # 只统计同名标签的嵌套，容忍区块内部不闭合的 <p> / <li>
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if _is_boilerplate(tag, attrs):
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+        if tag in _MAIN_TAGS:
+            self._main_depth += 1
+        if tag in _BLOCK_TAGS:
+            self._newline()
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower()
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag in _BLOCK_TAGS:
+            self._newline()
+        if tag in _MAIN_TAGS and self._main_depth:
+            self._main_depth -= 1
+
+    def data(self, text: str) -> None:
+        if self._skip_tag is not None or self.done:
+            return
+        self._all.append(text)
+        self._all_chars += len(text)
+        if self._main_depth:
+            self._main.append(text)
+            self._main_chars += len(text)
+
+    def close(self) -> str:
+        parts = self._main if self._main_chars >= _MIN_MAIN_CHARS else self._all
+        lines = (" ".join(line.split()) for line in "".join(parts).splitlines())
+        text = "\n".join(line for line in lines if line)
+        return text[:self.max_chars] if self.max_chars is not None else text
+
+
+class _StdlibParser(HTMLParser):
+    """未安装 lxml 时的回退：把标准库解析器的回调转给 _TextCollector。"""
+
+    def __init__(self, target: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+class MainTextExtractor:
+    """
+    增量正文提取器：按块 feed() 原始字节，close() 得到正文（空白规整、保留段落换行）。
+
+    参数:
+        max_chars: 正文字符上限，收集够之后 feed() 返回 True；None 表示不限制
+        encoding: 响应头里的字符集；None 时 lxml 按 <meta charset> 自动识别，回退解析器按 UTF-8 解码
+    """
+
+    def __init__(self, max_chars: Optional[int] = None, encoding: Optional[str] = None):
+        self._collector = _TextCollector(max_chars)
+        self._decoder = None
+        if LXML_AVAILABLE:
+            from lxml import etree
+
+            self._parser = etree.HTMLParser(
+                target=self._collector, encoding=encoding, remove_comments=True, no_network=True
+            )
+        else:
+            self._parser = _StdlibParser(self._collector)
+            self._decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+
+    @property
+    def done(self) -> bool:
+        return self._collector.done
+
+    def feed(self, chunk: bytes) -> bool:
+        """喂入一块响应体，返回是否已经收集到足够的正文。"""
+        if chunk and not self.done:
+            self._parser.feed(self._decoder.decode(chunk) if self._decoder else chunk)
+        return self.done
+
+    def close(self) -> str:
+        if self._decoder is not None:
+            self._parser.feed(self._decoder.decode(b"", final=True))
+            self._parser.close()
+            return self._collector.close()
+        # lxml 的 close() 返回 target.close() 的结果；空文档时会抛 XMLSyntaxError
+        try:
+            return self._parser.close()
+        except Exception:
+            return self._collector.close()
+
+
+def extract_main_text(html, max_chars: Optional[int] = None, encoding: Optional[str] = None) -> str:
+    """一次性提取正文（html 可以是 str 或 bytes）。"""
+    if isinstance(html, str):
+        html, encoding = html.encode("utf-8"), "utf-8"
+    extractor = MainTextExtractor(max_chars, encoding)
+    extractor.feed(html)
+    return extractor.close()
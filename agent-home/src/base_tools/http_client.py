@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+agent_tools 共用的 HTTP 层（httpx 连接池）。
+
+- 同步：http_get() 使用进程级共享的 httpx.Client（线程安全），各工具的同步路径都走这里；
+- 异步：ahttp_get() 使用按事件循环共享的 httpx.AsyncClient，ainvoke 路径不占用线程池；
+- 连接复用：按 host 保持 keep-alive 连接，Agent 循环里反复调用工具不再每次重新握手 TCP / TLS；
+- HTTP/2：安装了 h2 时默认开启（HTTP_HTTP2），服务端不支持时自动回落到 HTTP/1.1；
+- 重试：连接错误 / 超时 / 429 / 5xx 按指数退避 + 全抖动重试（HTTP_RETRIES），遵守 Retry-After；
+- 单 host 并发上限（HTTP_PER_HOST），避免 Agent 并发调用把同一个站点打满；
+- 流式读取：http_stream() / ahttp_stream() + iter_bounded() / aiter_bounded()，
+  读够字节预算（HTTP_MAX_BYTES）或调用方已拿到所需内容即停止，非文本类型可以不读响应体。
+
+服务退出时由 lifespan 调用 aclose_http_clients() / close_http_clients() 关闭连接池。
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+import importlib.util
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+# 空闲 keep-alive 连接保留时间（秒）
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+# 失败后的最大重试次数（不含首次请求）与退避基数（秒）
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+# 单个 host 的最大并发请求数
+HTTP_PER_HOST = int(os.getenv("HTTP_PER_HOST", "8"))
+# 流式读取时单个响应体最多读取的字节数
+HTTP_MAX_BYTES = int(os.getenv("HTTP_MAX_BYTES", str(2 * 1024 * 1024)))
+# 需要安装 h2；未安装时即使开启也只用 HTTP/1.1
+HTTP_HTTP2 = (
+    os.getenv("HTTP_HTTP2", "true").lower() in ("1", "true", "yes")
+    and importlib.util.find_spec("h2") is not None
+)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+
+# 这些状态码视为暂时性错误，可以重试
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+# 视为文本的 Content-Type（其余如图片、PDF、压缩包不读取响应体）
+_TEXT_TYPES = ("text/", "application/xhtml", "application/xml", "application/json",
+               "application/rss", "application/atom", "application/javascript")
+
+
+def _client_kwargs(verify: bool) -> Dict:
+    return dict(
+        headers=DEFAULT_HEADERS,
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+        verify=verify,
+        http2=HTTP_HTTP2,
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_SIZE,
+            max_keepalive_connections=HTTP_POOL_SIZE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """第 attempt 次重试前的等待时间：优先 Retry-After，否则指数退避 + 全抖动。"""
+    if response is not None:
+        retry_after = response.headers.get("retry-after", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), 30.0)
+    return random.uniform(0, HTTP_BACKOFF * 2 ** attempt)
+
+
+def is_text_content(response: httpx.Response) -> bool:
+    """响应是否为文本类型；没有 Content-Type 时按文本处理。"""
+    content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+    return not content_type or content_type.startswith(_TEXT_TYPES) or content_type.endswith(("+xml", "+json"))
+
+
+# ---------------- 同步 ----------------
+
+_sync_clients: Dict[bool, httpx.Client] = {}
+_sync_lock = threading.Lock()
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+
+def get_http_client(verify: bool = True) -> httpx.Client:
+    """获取进程级共享的同步客户端。"""
+    client = _sync_clients.get(verify)
+    if client is None or client.is_closed:
+        with _sync_lock:
+            client = _sync_clients.get(verify)
+            if client is None or client.is_closed:
+                client = httpx.Client(**_client_kwargs(verify))
+                _sync_clients[verify] = client
+    return client
+
+
+def _host_semaphore(host: str) -> threading.BoundedSemaphore:
+    sem = _host_semaphores.get(host)
+    if sem is None:
+        with _sync_lock:
+            sem = _host_semaphores.setdefault(host, threading.BoundedSemaphore(max(1, HTTP_PER_HOST)))
+    return sem
+
+
+def http_get(url: str, verify: bool = True, retries: int = HTTP_RETRIES, **kwargs) -> httpx.Response:
+    """
+    带重试与单 host 并发上限的 GET（同步）。
+
+    参数:
+        url: 请求地址
+        verify: 是否校验证书（RSS 等场景沿用原来的 verify=False）
+        retries: 最大重试次数
+        **kwargs: 透传给 httpx.Client.get，如 headers / timeout
+
+    返回:
+        最后一次的响应（不自动 raise_for_status，由调用方决定如何处理状态码）
+    """
+    client = get_http_client(verify)
+    for attempt in range(retries + 1):
+        response = None
+        try:
+            with _host_semaphore(_host(url)):
+                response = client.get(url, **kwargs)
+            if response.status_code not in _RETRY_STATUS or attempt == retries:
+                return response
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+        time.sleep(_retry_delay(attempt, response))
+    raise RuntimeError("unreachable")
+
+
+@contextmanager
+def http_stream(url: str, verify: bool = True, retries: int = HTTP_RETRIES, **kwargs) -> Iterator[httpx.Response]:
+    """
+    流式 GET：只读取响应头就交给调用方，响应体由调用方按需读取（配合 iter_bounded）。
+
+    重试规则与 http_get 相同，但只针对建立连接 / 响应头阶段；读取响应体时出错直接抛出。
+    单 host 并发名额一直占用到调用方退出 with 块。
+    """
+    client = get_http_client(verify)
+    request = client.build_request("GET", url, **kwargs)
+    for attempt in range(retries + 1):
+        response = None
+        with _host_semaphore(_host(url)):
+            try:
+                response = client.send(request, stream=True)
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+            else:
+                if response.status_code not in _RETRY_STATUS or attempt == retries:
+                    try:
+                        yield response
+                    finally:
+                        response.close()
+                    return
+                response.close()
+        time.sleep(_retry_delay(attempt, response))
+
+
+def iter_bounded(response: httpx.Response, max_bytes: int = HTTP_MAX_BYTES) -> Iterator[bytes]:
+    """逐块返回（已解压的）响应体，累计达到 max_bytes 后停止。"""
+    remaining = max_bytes
+    for chunk in response.iter_bytes():
+        if len(chunk) >= remaining:
+            yield chunk[:remaining]
+            return
+        remaining -= len(chunk)
+        yield chunk
+
+
+def close_http_clients() -> None:
+    """关闭同步客户端。"""
+    with _sync_lock:
+        for client in _sync_clients.values():
+            client.close()
+        _sync_clients.clear()
+
+
+# ---------------- 异步 ----------------
+
+# {(事件循环, 是否校验证书): 客户端}；httpx 的连接绑定在创建它的事件循环上，不能跨循环复用
+_clients: Dict[Tuple[asyncio.AbstractEventLoop, bool], httpx.AsyncClient] = {}
+_async_host_semaphores: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Semaphore] = {}
+
+
+def get_async_http_client(verify: bool = True) -> httpx.AsyncClient:
+    """获取当前事件循环上的共享客户端（必须在协程中调用）。"""
+    loop = asyncio.get_running_loop()
+    key = (loop, verify)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        # 清理已关闭事件循环留下的客户端与信号量
+        for stale in [k for k in _clients if k[0].is_closed()]:
+            _clients.pop(stale, None)
+        for stale in [k for k in _async_host_semaphores if k[0].is_closed()]:
+            _async_host_semaphores.pop(stale, None)
+        client = httpx.AsyncClient(**_client_kwargs(verify))
+        _clients[key] = client
+    return client
+
+
+def _async_host_semaphore(host: str) -> asyncio.Semaphore:
+    key = (asyncio.get_running_loop(), host)
+    sem = _async_host_semaphores.get(key)
+    if sem is None:
+        sem = _async_host_semaphores[key] = asyncio.Semaphore(max(1, HTTP_PER_HOST))
+    return sem
+
+
+async def ahttp_get(url: str, verify: bool = True, retries: int = HTTP_RETRIES, **kwargs) -> httpx.Response:
+    """http_get 的异步版本。"""
+    client = get_async_http_client(verify)
+    for attempt in range(retries + 1):
+        response = None
+        try:
+            async with _async_host_semaphore(_host(url)):
+                response = await client.get(url, **kwargs)
+            if response.status_code not in _RETRY_STATUS or attempt == retries:
+                return response
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+        await asyncio.sleep(_retry_delay(attempt, response))
+    raise RuntimeError("unreachable")
+
+
+@asynccontextmanager
+async def ahttp_stream(url: str, verify: bool = True, retries: int = HTTP_RETRIES, **kwargs) -> AsyncIterator[httpx.Response]:
+    """http_stream 的异步版本。"""
+    client = get_async_http_client(verify)
+    request = client.build_request("GET", url, **kwargs)
+    for attempt in range(retries + 1):
+        response = None
+        async with _async_host_semaphore(_host(url)):
+            try:
+                response = await client.send(request, stream=True)
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+            else:
+                if response.status_code not in _RETRY_STATUS or attempt == retries:
+                    try:
+                        yield response
+                    finally:
+                        await response.aclose()
+                    return
+                await response.aclose()
+        await asyncio.sleep(_retry_delay(attempt, response))
+
+
+async def aiter_bounded(response: httpx.Response, max_bytes: int = HTTP_MAX_BYTES) -> AsyncIterator[bytes]:
+    """iter_bounded 的异步版本。"""
+    remaining = max_bytes
+    async for chunk in response.aiter_bytes():
+        if len(chunk) >= remaining:
+            yield chunk[:remaining]
+            return
+        remaining -= len(chunk)
+        yield chunk
+
+
+async def aclose_http_clients() -> None:
+    """关闭当前事件循环上的共享客户端。"""
+    loop = asyncio.get_running_loop()
+    for key in [k for k in _clients if k[0] is loop]:
+        await _clients.pop(key).aclose()
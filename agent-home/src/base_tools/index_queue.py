@@ -0,0 +1,517 @@
+# -*- coding: utf-8 -*-
+"""
+后台文档索引流水线：切片 → 增量对比并向量化 → 写入 Qdrant。
+
+替代「每篇文档起一个 threading.Thread」的做法：
+- 每个阶段之间是有界队列，队列满时 submit 阻塞（背压），超时则落盘等待重放；
+- 固定数量的 worker 线程，不会因为突发流量产生大量竞争 CPU 的 embedding 线程；
+- 写入阶段把多篇文档的 points 合并成一次 upsert；
+- 同一文档（集合 + doc_key）同时只处理一个任务：增量计划基于集合当前内容，
+  前一个版本写完之前不能开始下一个；处理期间的新提交只保留最新的一版；
+- 每个阶段失败会指数退避重试，最终失败的任务写入 spool 文件，
+  每隔 INDEX_SPOOL_REPLAY_INTERVAL 秒（以及下次启动时）重新入队，累计失败 INDEX_MAX_ATTEMPTS 次后放弃；
+- 进程退出时（FastAPI lifespan）先尽量排空队列，剩余任务落盘，下次启动自动重放。
+  已进入后续阶段的在途任务在落盘时被标记为放弃，worker 在下一个阶段边界丢弃它们；
+  正在写入的那一批仍可能写完，重放时内容未变的片段不会重复向量化 / 写入。
+"""
+import os
+import json
+import time
+import queue
+import threading
+from uuid import uuid4
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from base_tools.vertordb import (
+    _ReindexPlan,
+    _split_text_into_chunks,
+    _plan_generated_doc_reindex,
+    _finalize_reindex,
+    upsert_points,
+)
+
+# 每个阶段队列的容量
+INDEX_QUEUE_SIZE = int(os.getenv("INDEX_QUEUE_SIZE", "64"))
+# 向量化阶段 worker 数（向量化本身由 embedding 微批 worker 执行，这里只需少量并发去喂它）
+INDEX_EMBED_WORKERS = int(os.getenv("INDEX_EMBED_WORKERS", "2"))
+# 单次 upsert 最多合并的 points 数 / 最长等待时间（毫秒）
+INDEX_UPSERT_BATCH = int(os.getenv("INDEX_UPSERT_BATCH", "256"))
+INDEX_UPSERT_WAIT_MS = float(os.getenv("INDEX_UPSERT_WAIT_MS", "200"))
+# 每个阶段的最大尝试次数
+INDEX_MAX_ATTEMPTS = int(os.getenv("INDEX_MAX_ATTEMPTS", "3"))
+# submit 在队列满时最多阻塞多久（秒），超时后任务落盘
+INDEX_SUBMIT_TIMEOUT = float(os.getenv("INDEX_SUBMIT_TIMEOUT", "2"))
+# 运行期间重放 spool（失败任务）的间隔（秒），0 表示只在启动时重放
+INDEX_SPOOL_REPLAY_INTERVAL = float(os.getenv("INDEX_SPOOL_REPLAY_INTERVAL", "300"))
+# 未完成 / 失败任务的落盘文件
+INDEX_SPOOL_PATH = os.getenv(
+    "INDEX_SPOOL_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "agent-home", "index_spool.jsonl"),
+)
+
+_STOP = object()
+# 唤醒切片 worker 去取被推迟的同文档任务
+_WAKE = object()
+
+
+@dataclass
+class IndexJob:
+    """一篇待索引的文档。"""
+    text: str
+    user_intent: str
+    collection_name: str = "generated_docs"
+    # 文档 key（标题等），决定 doc_id 与片段 ID
+    doc_key: str = ""
+    job_id: str = field(default_factory=lambda: str(uuid4()))
+    enqueued_at: float = field(default_factory=time.time)
+    # 已经整体失败（重试耗尽）的次数，超过上限后不再落盘重放
+    failures: int = 0
+
+
+class IndexingPipeline:
+    """
+    有界、多阶段的后台索引流水线（线程安全）。
+
+    参数:
+        queue_size: 每个阶段队列的容量
+        embed_workers: 向量化阶段的 worker 数
+        upsert_batch: 单次 upsert 最多合并的 points 数
+        upsert_wait_ms: upsert 合并等待窗口
+        spool_path: 落盘文件路径，None 表示不落盘
+        spool_replay_interval: 运行期间重放 spool 的间隔（秒），0 表示只在启动时重放
+    """
+
+    def __init__(
+        self,
+        queue_size: int = INDEX_QUEUE_SIZE,
+        embed_workers: int = INDEX_EMBED_WORKERS,
+        upsert_batch: int = INDEX_UPSERT_BATCH,
+        upsert_wait_ms: float = INDEX_UPSERT_WAIT_MS,
+        spool_path: Optional[str] = INDEX_SPOOL_PATH,
+        spool_replay_interval: float = INDEX_SPOOL_REPLAY_INTERVAL,
+    ):
+        self.upsert_batch = max(1, upsert_batch)
+        self.upsert_wait = max(0.0, upsert_wait_ms) / 1000.0
+        self.spool_path = spool_path or None
+        self.spool_replay_interval = max(0.0, spool_replay_interval)
+        self._stop_event = threading.Event()
+        self._split_queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._embed_queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._upsert_queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._embed_workers = max(1, embed_workers)
+        self._threads: List[threading.Thread] = []
+        self._accepting = False
+        # 尚未完成的任务，用于 flush 等待与退出时落盘；不在其中的任务（已落盘放弃）worker 不再处理
+        self._jobs: Dict[str, IndexJob] = {}
+        self._jobs_cond = threading.Condition()
+        # 每篇文档的在途任务与等待中的最新提交：{(集合, doc_key): job_id} / {(集合, doc_key): IndexJob}
+        self._inflight: Dict[Tuple[str, str], str] = {}
+        self._pending: Dict[Tuple[str, str], IndexJob] = {}
+        # 前一个版本完成后放行的任务（不受切片队列容量限制，切片 worker 优先取）
+        self._resume: "queue.Queue[IndexJob]" = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retries": 0,
+            "spooled": 0,
+            "coalesced": 0,
+            "points_upserted": 0,
+            "upsert_batches": 0,
+        }
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+
+    # ---------- 生命周期 ----------
+
+    def start(self) -> "IndexingPipeline":
+        """启动各阶段 worker，并重放上次落盘的任务。"""
+        if self._threads:
+            return self
+        self._accepting = True
+        workers: List[Tuple[str, Callable[[], None]]] = [("split", self._split_loop)]
+        workers += [(f"embed-{i}", self._embed_loop) for i in range(self._embed_workers)]
+        workers.append(("upsert", self._upsert_loop))
+        if self.spool_path and self.spool_replay_interval:
+            workers.append(("spool", self._spool_loop))
+        for name, target in workers:
+            t = threading.Thread(target=target, name=f"index-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._replay_spool()
+        return self
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已提交任务完成，返回是否在超时前全部完成。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._jobs_cond:
+            while self._jobs:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._jobs_cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """
+        停止接收新任务，尽量排空队列；超时未完成的任务落盘，下次启动重放。
+        还在切片队列中的任务直接取出；已进入后续阶段的任务先从 _jobs 中移除（标记放弃），
+        worker 在下一个阶段边界丢弃它们，避免与重放重复处理。
+        """
+        if not self._threads:
+            return
+        self._accepting = False
+        self._stop_event.set()
+        drained = self.flush(timeout)
+        queued: List[IndexJob] = []
+        for q in (self._split_queue, self._resume):
+            while True:
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, IndexJob):
+                    queued.append(item)
+        with self._jobs_cond:
+            # 等待中的同文档任务也在 _jobs 中，一并落盘
+            queued += list(self._pending.values())
+            leftovers = list(self._jobs.values())
+            self._jobs.clear()
+            self._inflight.clear()
+            self._pending.clear()
+            self._jobs_cond.notify_all()
+        if not drained and leftovers:
+            in_flight = len(leftovers) - len(queued)
+            print(f"⚠️ [Index Queue] 退出时仍有 {len(leftovers)} 个任务未完成（其中 {in_flight} 个在途，已标记放弃），已落盘等待重放")
+            self._spool(leftovers)
+        try:
+            self._split_queue.put(_STOP, timeout=1.0)
+        except queue.Full:
+            pass
+        for t in self._threads:
+            t.join(timeout=1.0)
+        self._threads.clear()
+
+    # ---------- 提交 ----------
+
+    def submit(
+        self,
+        text: str,
+        user_intent: str,
+        doc_key: str = "",
+        collection_name: str = "generated_docs",
+        timeout: float = INDEX_SUBMIT_TIMEOUT,
+    ) -> bool:
+        """
+        提交一篇文档到索引流水线。
+        同一 doc_key 重复提交时只会写入变化的片段（见 index_generated_doc_to_qdrant）。
+
+        返回:
+            True 表示已入队；False 表示队列持续满载（或流水线已停止），任务已落盘稍后重放
+        """
+        job = IndexJob(text=text, user_intent=user_intent, collection_name=collection_name, doc_key=doc_key)
+        return self._enqueue(job, timeout)
+
+    @staticmethod
+    def _doc_key(job: IndexJob) -> Tuple[str, str]:
+        return job.collection_name, job.doc_key or job.user_intent
+
+    def _enqueue(self, job: IndexJob, timeout: float) -> bool:
+        """
+        入队；同一文档已有任务在处理时不入队，记为该文档的等待任务（替换更早的等待任务），
+        前一个任务结束后由 _finish 放行。
+        """
+        if not self._accepting:
+            self._spool([job])
+            return False
+        key = self._doc_key(job)
+        superseded: Optional[IndexJob] = None
+        with self._jobs_cond:
+            self._jobs[job.job_id] = job
+            parked = key in self._inflight
+            if parked:
+                superseded = self._pending.get(key)
+                self._pending[key] = job
+                if superseded is not None:
+                    self._jobs.pop(superseded.job_id, None)
+                    self._jobs_cond.notify_all()
+            else:
+                self._inflight[key] = job.job_id
+        if parked:
+            self._incr("submitted")
+            if superseded is not None:
+                self._incr("coalesced")
+            return True
+        try:
+            self._split_queue.put(job, timeout=timeout)
+        except queue.Full:
+            self._finish(job, ok=False, count_failure=False)
+            self._spool([job])
+            return False
+        self._incr("submitted")
+        return True
+
+    # ---------- 各阶段 ----------
+
+    def _active(self, job: IndexJob) -> bool:
+        """任务是否仍需处理（shutdown 落盘时会把在途任务从 _jobs 中移除）。"""
+        with self._jobs_cond:
+            return job.job_id in self._jobs
+
+    def _run_with_retry(self, stage: str, job: IndexJob, fn: Callable[[], Any]) -> Tuple[bool, Any]:
+        """
+        执行一个阶段，失败时指数退避重试，返回 (是否成功, 结果)。
+        重试耗尽的任务写入 spool，由 _spool_loop 定期（以及下次启动时）重新入队。
+        """
+        for attempt in range(1, INDEX_MAX_ATTEMPTS + 1):
+            try:
+                return True, fn()
+            except Exception as e:
+                print(f"    X [Index Queue] {stage} 失败（第 {attempt} 次）: {e}")
+                if not self._active(job):
+                    return False, None
+                if attempt < INDEX_MAX_ATTEMPTS:
+                    self._incr("retries")
+                    time.sleep(min(2 ** (attempt - 1) * 0.5, 5.0))
+        self._finish(job, ok=False)
+        job.failures += 1
+        if job.failures < INDEX_MAX_ATTEMPTS:
+            self._spool([job])
+        else:
+            print(f"    X [Index Queue] 任务 {job.job_id} 多次失败，已放弃")
+        return False, None
+
+    def _next_split_job(self) -> Any:
+        """优先取被放行的同文档任务，再取切片队列。"""
+        try:
+            return self._resume.get_nowait()
+        except queue.Empty:
+            return self._split_queue.get()
+
+    def _split_loop(self) -> None:
+        while True:
+            job = self._next_split_job()
+            if job is _WAKE:
+                continue
+            if job is _STOP:
+                for _ in range(self._embed_workers):
+                    self._embed_queue.put(_STOP)
+                return
+            if not self._active(job):
+                continue
+            ok, chunks = self._run_with_retry("split", job, lambda: _split_text_into_chunks(job.text, max_len=500))
+            if not ok:
+                continue
+            if not chunks:
+                self._finish(job, ok=True)
+                continue
+            if self._active(job):
+                self._embed_queue.put((job, chunks))
+
+    def _embed_loop(self) -> None:
+        while True:
+            item = self._embed_queue.get()
+            if item is _STOP:
+                self._upsert_queue.put(_STOP)
+                return
+            job, chunks = item
+            if not self._active(job):
+                continue
+            ok, plan = self._run_with_retry(
+                "embed",
+                job,
+                lambda: _plan_generated_doc_reindex(
+                    job.text,
+                    job.user_intent,
+                    job.doc_key or job.user_intent,
+                    job.collection_name,
+                    chunks=chunks,
+                ),
+            )
+            if ok and self._active(job):
+                self._upsert_queue.put((job, plan))
+
+    def _upsert_loop(self) -> None:
+        stops = 0
+        while stops < self._embed_workers:
+            item = self._upsert_queue.get()
+            if item is _STOP:
+                stops += 1
+                continue
+            batch = [item]
+            size = len(item[1].points)
+            deadline = time.monotonic() + self.upsert_wait
+            # 在等待窗口内合并多篇文档的 points
+            while size < self.upsert_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    nxt = self._upsert_queue.get(timeout=remaining) if remaining > 0 else self._upsert_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stops += 1
+                    continue
+                batch.append(nxt)
+                size += len(nxt[1].points)
+            self._flush_upserts(batch)
+
+    def _flush_upserts(self, batch: List[Tuple[IndexJob, _ReindexPlan]]) -> None:
+        """
+        按集合分组合并写入新片段，再逐篇完成位置调整 / 过期删除与元数据写入；
+        合并写入失败时逐篇重试，避免一篇坏数据拖垮整批。
+        """
+        groups: Dict[str, List[Tuple[IndexJob, _ReindexPlan]]] = {}
+        for job, plan in batch:
+            if not self._active(job):
+                continue
+            groups.setdefault(job.collection_name, []).append((job, plan))
+        for collection_name, items in groups.items():
+            all_points = [p for _, plan in items for p in plan.points]
+            try:
+                upsert_points(collection_name, all_points)
+                if all_points:
+                    self._incr("upsert_batches")
+                    self._incr("points_upserted", len(all_points))
+                written = True
+            except Exception as e:
+                print(f"    X [Index Queue] 合并写入 `{collection_name}` 失败: {e}，改为逐篇重试")
+                written = False
+            for job, plan in items:
+                def _write() -> None:
+                    if not written:
+                        upsert_points(collection_name, plan.points)
+                        self._incr("upsert_batches")
+                        self._incr("points_upserted", len(plan.points))
+                    _finalize_reindex(plan)
+
+                ok, _ = self._run_with_retry("upsert", job, _write)
+                if ok:
+                    self._finish(job, ok=True)
+
+    # ---------- 记账 / 落盘 ----------
+
+    def _incr(self, name: str, value: int = 1) -> None:
+        with self._metrics_lock:
+            self._counters[name] += value
+
+    def _finish(self, job: IndexJob, ok: bool, count_failure: bool = True) -> None:
+        """标记任务结束，更新完成 / 失败计数与延迟指标。"""
+        with self._metrics_lock:
+            if ok:
+                lag = time.time() - job.enqueued_at
+                self._counters["completed"] += 1
+                self._lag_total += lag
+                self._lag_max = max(self._lag_max, lag)
+            elif count_failure:
+                self._counters["failed"] += 1
+        with self._jobs_cond:
+            self._jobs.pop(job.job_id, None)
+            nxt = self._release(job)
+            self._jobs_cond.notify_all()
+        if nxt is not None:
+            self._resume.put(nxt)
+            try:
+                # 队列非空时切片 worker 不会阻塞，取下一项前会先检查 _resume
+                self._split_queue.put_nowait(_WAKE)
+            except queue.Full:
+                pass
+
+    def _release(self, job: IndexJob) -> Optional[IndexJob]:
+        """释放文档的在途标记，返回需要放行的等待任务（调用方持有 _jobs_cond）。"""
+        key = self._doc_key(job)
+        if self._inflight.get(key) != job.job_id:
+            return None
+        nxt = self._pending.pop(key, None)
+        if nxt is None:
+            del self._inflight[key]
+        else:
+            self._inflight[key] = nxt.job_id
+        return nxt
+
+    def _spool(self, jobs: List[IndexJob]) -> None:
+        """把任务追加写入 spool 文件（JSON Lines）。"""
+        if not self.spool_path or not jobs:
+            return
+        try:
+            with self._spool_lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.spool_path)), exist_ok=True)
+                with open(self.spool_path, "a", encoding="utf-8") as f:
+                    for job in jobs:
+                        f.write(json.dumps(asdict(job), ensure_ascii=False) + "\n")
+            self._incr("spooled", len(jobs))
+        except Exception as e:
+            print(f"    X [Index Queue] 任务落盘失败: {e}")
+
+    def _spool_loop(self) -> None:
+        """每隔 spool_replay_interval 秒重放一次 spool，让重试耗尽的任务不必等到下次启动。"""
+        while not self._stop_event.wait(self.spool_replay_interval):
+            self._replay_spool()
+
+    def _replay_spool(self) -> None:
+        """把 spool 文件中的任务重新入队（启动时与 _spool_loop 定期调用）。"""
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return
+        with self._spool_lock:
+            try:
+                with open(self.spool_path, encoding="utf-8") as f:
+                    jobs = [IndexJob(**json.loads(line)) for line in f if line.strip()]
+                os.remove(self.spool_path)
+            except Exception as e:
+                print(f"    X [Index Queue] 读取 spool 失败: {e}")
+                return
+        if jobs:
+            print(f">>> [Index Queue] 重放上次未完成的 {len(jobs)} 个索引任务")
+        for job in jobs:
+            self._enqueue(job, timeout=INDEX_SUBMIT_TIMEOUT)
+
+    def metrics(self) -> Dict[str, Any]:
+        """返回队列深度、吞吐与延迟指标。"""
+        now = time.time()
+        with self._jobs_cond:
+            pending = len(self._jobs)
+            oldest = min((j.enqueued_at for j in self._jobs.values()), default=None)
+        with self._metrics_lock:
+            completed = self._counters["completed"]
+            return {
+                **self._counters,
+                "pending": pending,
+                "queue_depth": {
+                    "split": self._split_queue.qsize(),
+                    "embed": self._embed_queue.qsize(),
+                    "upsert": self._upsert_queue.qsize(),
+                },
+                "avg_lag_seconds": round(self._lag_total / completed, 3) if completed else 0.0,
+                "max_lag_seconds": round(self._lag_max, 3),
+                "oldest_pending_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            }
+
+
+# 全局流水线实例（延迟初始化）
+_default_pipeline: Optional[IndexingPipeline] = None
+_default_pipeline_lock = threading.Lock()
+
+
+def get_index_pipeline() -> IndexingPipeline:
+    """获取（必要时启动）进程级共享的索引流水线。"""
+    global _default_pipeline
+    if _default_pipeline is None:
+        with _default_pipeline_lock:
+            if _default_pipeline is None:
+                _default_pipeline = IndexingPipeline().start()
+    return _default_pipeline
+
+
+def shutdown_index_pipeline(timeout: float = 30.0) -> None:
+    """关闭全局流水线（FastAPI lifespan 退出时调用）。"""
+    global _default_pipeline
+    with _default_pipeline_lock:
+        pipeline, _default_pipeline = _default_pipeline, None
+    if pipeline is not None:
+        pipeline.shutdown(timeout)
+
+
+def index_queue_metrics() -> Dict[str, Any]:
+    """返回全局流水线指标（未启动时为空）。"""
+    return _default_pipeline.metrics() if _default_pipeline is not None else {}
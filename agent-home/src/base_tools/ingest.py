@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+大文档流式入库：切分 -> 微批向量化 -> 定长批量写入，全程基于生成器。
+
+任一时刻内存中只有一个切分窗口（SPLIT_WINDOW_CHARS）和一个写入批次（INGEST_BATCH_SIZE），
+峰值内存与文档大小无关。结束后返回并打印吞吐（chunks/s、MB/s）。
+"""
+import os
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from uuid import uuid4
+from qdrant_client import models as qmodels
+from base_tools.vertordb import _get_default_embedding, _iter_text_chunks, upsert_points
+
+# 每批向量化 + 写入的片段数
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+
+
+@dataclass
+class IngestStats:
+    """一次流式入库的统计。"""
+    collection_name: str
+    chunks: int = 0
+    batches: int = 0
+    # 按片段统计的字符数 / UTF-8 字节数（含片段间重叠部分）
+    chars: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> Dict:
+        seconds = self.seconds or 1e-9
+        return {
+            "collection": self.collection_name,
+            "chunks": self.chunks,
+            "batches": self.batches,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "chunks_per_second": round(self.chunks / seconds, 2),
+            "mb_per_second": round(self.bytes / seconds / 1e6, 3),
+        }
+
+
+def _iter_batches(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    """把迭代器切成定长列表（最后一批可能不足 size）。"""
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_embedded_batches(
+    chunks: Iterable[str],
+    batch_size: int = INGEST_BATCH_SIZE,
+) -> Iterator[Tuple[List[str], List[List[float]]]]:
+    """按批向量化片段流，产出 (片段列表, 向量列表)；经由共享的缓存 / 微批 embedding。"""
+    embedding = _get_default_embedding()
+    for batch in _iter_batches(chunks, batch_size):
+        yield batch, embedding.embed_documents(batch)
+
+
+def ingest_stream(
+    source: Union[str, Iterable[str], IO[str]],
+    collection_name: str,
+    payload: Optional[Dict] = None,
+    max_len: int = 500,
+    batch_size: int = INGEST_BATCH_SIZE,
+    point_id: Optional[Callable[[int, str], str]] = None,
+) -> IngestStats:
+    """
+    流式切分、向量化并写入 Qdrant。
+
+    参数:
+        source: 整段文本、文本块迭代器或文本文件对象
+        collection_name: 目标集合（不存在时自动创建）
+        payload: 每个片段共享的 payload 字段（如 {"url": ...}），片段另有 chunk_id / text
+        max_len: 片段最大长度（字符数）
+        batch_size: 每批向量化 + 写入的片段数
+        point_id: (chunk_id, 片段) -> point ID，默认随机 UUID
+
+    返回:
+        IngestStats
+    """
+    stats = IngestStats(collection_name)
+    base = dict(payload or {})
+    start = time.perf_counter()
+    for batch, vectors in iter_embedded_batches(_iter_text_chunks(source, max_len), batch_size):
+        points = []
+        for chunk, vec in zip(batch, vectors):
+            idx = stats.chunks
+            stats.chunks += 1
+            stats.chars += len(chunk)
+            stats.bytes += len(chunk.encode("utf-8"))
+            points.append(qmodels.PointStruct(
+                id=point_id(idx, chunk) if point_id else str(uuid4()),
+                vector=vec,
+                payload={**base, "chunk_id": idx, "text": chunk},
+            ))
+        upsert_points(collection_name, points)
+        stats.batches += 1
+    stats.seconds = time.perf_counter() - start
+    summary = stats.summary()
+    print(
+        f">>> [Ingest] {collection_name}: {summary['chunks']} 个片段 / {summary['batches']} 批，"
+        f"{summary['chunks_per_second']} chunks/s，{summary['mb_per_second']} MB/s"
+    )
+    return stats
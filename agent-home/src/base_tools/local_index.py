@@ -0,0 +1,689 @@
+# -*- coding: utf-8 -*-
+"""
+无需 Qdrant 服务的本地向量存储后端（QDRANT_BACKEND=local / numpy，见 vertordb._get_qdrant_client）。
+
+- NumpyVectorStore：NumPy 暴力检索（矩阵乘 + argpartition），可选目录持久化
+  （快照 + 追加写日志，快照向量文件以 mmap 方式加载）；实现了本项目用到的 QdrantClient 子集
+  （collection_exists / get_collection / create_collection / create_payload_index /
+  upsert / batch_update_points / retrieve / scroll / query_points / query_batch_points / delete_collection）。
+- _SerializedClient：给非线程安全的客户端（Qdrant local 模式）加一把锁。
+- _ThreadedAsyncClient：把同步客户端包装成 AsyncQdrantClient 风格的接口（调用放到线程中执行），
+  同步 / 异步两条路径共享同一份数据。
+
+适合测试、基准与单节点部署的中小规模数据；大规模 / 多进程请使用 Qdrant 服务。
+"""
+import os
+import json
+import asyncio
+import threading
+from bisect import bisect_left
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+import numpy as np
+from qdrant_client import models as qmodels
+from qdrant_client.http import models as rest
+
+PointId = Union[int, str]
+
+# 日志中记录的点数超过 max(LOCAL_INDEX_COMPACT_MIN_OPS, 集合点数 × LOCAL_INDEX_COMPACT_RATIO) 时合并成新快照
+LOCAL_INDEX_COMPACT_MIN_OPS = int(os.getenv("LOCAL_INDEX_COMPACT_MIN_OPS", "4096"))
+LOCAL_INDEX_COMPACT_RATIO = float(os.getenv("LOCAL_INDEX_COMPACT_RATIO", "1.0"))
+
+_SNAPSHOT_FILES = ("vectors.npy", "points.json")
+_WAL_VECTORS, _WAL_OPS, _MANIFEST = "wal.f32", "wal.jsonl", "manifest.json"
+
+_COMPLETED = qmodels.UpdateResult(operation_id=0, status=qmodels.UpdateStatus.COMPLETED)
+
+
+def _normalize_id(point_id: Any) -> PointId:
+    """与 Qdrant 一致：整数 ID 保持不变，UUID 统一为标准小写带连字符格式。"""
+    if isinstance(point_id, (int, np.integer)):
+        return int(point_id)
+    return str(UUID(str(point_id)))
+
+
+def _id_sort_key(point_id: PointId) -> Tuple[int, Any]:
+    """scroll 的遍历顺序：整数 ID 在前，UUID 在后，各自有序。"""
+    return (0, point_id) if isinstance(point_id, int) else (1, point_id)
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    """把 ISO 字符串 / datetime 转为带时区的 datetime（无时区视为 UTC）。"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _in_range(value: Any, rng: Union[qmodels.Range, qmodels.DatetimeRange]) -> bool:
+    """判断单个值是否落在 Range / DatetimeRange 内。"""
+    if isinstance(rng, qmodels.DatetimeRange):
+        value = _as_datetime(value)
+        bounds = [(_as_datetime(b) if b is not None else None) for b in (rng.gt, rng.gte, rng.lt, rng.lte)]
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        bounds = [rng.gt, rng.gte, rng.lt, rng.lte]
+    else:
+        return False
+    if value is None:
+        return False
+    gt, gte, lt, lte = bounds
+    return (
+        (gt is None or value > gt)
+        and (gte is None or value >= gte)
+        and (lt is None or value < lt)
+        and (lte is None or value <= lte)
+    )
+
+
+def _match_field(payload: Dict, cond: qmodels.FieldCondition) -> bool:
+    """FieldCondition：支持 MatchValue / MatchAny / MatchExcept 与 Range / DatetimeRange，数组字段任一元素命中即可。"""
+    if cond.key not in payload:
+        return False
+    raw = payload[cond.key]
+    values = raw if isinstance(raw, list) else [raw]
+    match = cond.match
+    if isinstance(match, qmodels.MatchValue):
+        if not any(v == match.value for v in values):
+            return False
+    elif isinstance(match, qmodels.MatchAny):
+        if not any(v in match.any for v in values):
+            return False
+    elif isinstance(match, qmodels.MatchExcept):
+        if any(v in match.except_ for v in values):
+            return False
+    elif match is not None:
+        raise NotImplementedError(f"本地向量存储不支持的匹配条件: {type(match).__name__}")
+    if cond.range is not None and not any(_in_range(v, cond.range) for v in values):
+        return False
+    return True
+
+
+def _match_condition(point_id: PointId, payload: Dict, cond: Any) -> bool:
+    if isinstance(cond, qmodels.FieldCondition):
+        return _match_field(payload, cond)
+    if isinstance(cond, qmodels.HasIdCondition):
+        return point_id in {_normalize_id(i) for i in cond.has_id}
+    if isinstance(cond, qmodels.Filter):
+        return _match_filter(point_id, payload, cond)
+    raise NotImplementedError(f"本地向量存储不支持的过滤条件: {type(cond).__name__}")
+
+
+def _as_list(conds: Any) -> List:
+    if conds is None:
+        return []
+    return conds if isinstance(conds, list) else [conds]
+
+
+def _match_filter(point_id: PointId, payload: Dict, flt: Optional[qmodels.Filter]) -> bool:
+    """按 Qdrant 语义求值 Filter（must 全部满足 / should 至少一个 / must_not 都不满足）。"""
+    if flt is None:
+        return True
+    must, should, must_not = _as_list(flt.must), _as_list(flt.should), _as_list(flt.must_not)
+    return (
+        all(_match_condition(point_id, payload, c) for c in must)
+        and (not should or any(_match_condition(point_id, payload, c) for c in should))
+        and not any(_match_condition(point_id, payload, c) for c in must_not)
+    )
+
+
+def _select_payload(payload: Dict, with_payload: Any) -> Optional[Dict]:
+    """按 with_payload（bool / 字段列表 / PayloadSelectorInclude / Exclude）裁剪 payload。"""
+    if with_payload is True:
+        return dict(payload)
+    if not with_payload:
+        return None
+    if isinstance(with_payload, qmodels.PayloadSelectorInclude):
+        return {k: payload[k] for k in with_payload.include if k in payload}
+    if isinstance(with_payload, qmodels.PayloadSelectorExclude):
+        return {k: v for k, v in payload.items() if k not in set(with_payload.exclude)}
+    return {k: payload[k] for k in with_payload if k in payload}
+
+
+class _Collection:
+    """单个集合：连续的 float32 向量矩阵 + 行号 <-> point ID 映射 + payload 列表。"""
+
+    def __init__(self, dim: int, distance: qmodels.Distance):
+        self.dim = dim
+        self.distance = distance
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.size = 0
+        self.ids: List[PointId] = []
+        self.payloads: List[Dict] = []
+        self.rows: Dict[PointId, int] = {}
+        self.payload_schema: Dict[str, qmodels.PayloadSchemaType] = {}
+        self._sorted_ids: Optional[List[Tuple[int, Any]]] = None
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """余弦距离在写入时归一化，检索时只需点积。"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if self.distance == qmodels.Distance.COSINE:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1.0, norms)
+        return vectors
+
+    def _reserve(self, extra: int) -> None:
+        """按倍增策略扩容（mmap 加载的只读矩阵在首次写入时复制到内存）。"""
+        need = self.size + extra
+        if need <= len(self.vectors) and self.vectors.flags.writeable:
+            return
+        capacity = max(need, 2 * len(self.vectors), 64)
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self.size] = self.vectors[:self.size]
+        self.vectors = grown
+
+    def upsert(self, ids: Sequence[Any], vectors: np.ndarray, payloads: Sequence[Optional[Dict]],
+               prepared: bool = False) -> np.ndarray:
+        """写入 / 覆盖点，返回实际写入的（已归一化的）向量；prepared=True 表示向量已归一化（日志回放）。"""
+        vectors = vectors if prepared else self._prepare(vectors)
+        self._reserve(len(ids))
+        for pid, vec, payload in zip(ids, vectors, payloads):
+            pid = _normalize_id(pid)
+            row = self.rows.get(pid)
+            if row is None:
+                row = self.size
+                self.size += 1
+                self.ids.append(pid)
+                self.payloads.append({})
+                self.rows[pid] = row
+                self._sorted_ids = None
+            self.vectors[row] = vec
+            self.payloads[row] = dict(payload or {})
+        return vectors
+
+    def delete(self, ids: Sequence[Any]) -> None:
+        """删除点：用最后一行填补空位，保持矩阵连续。"""
+        self._reserve(0)
+        for pid in ids:
+            row = self.rows.pop(_normalize_id(pid), None)
+            if row is None:
+                continue
+            last = self.size - 1
+            if row != last:
+                moved = self.ids[last]
+                self.vectors[row] = self.vectors[last]
+                self.ids[row], self.payloads[row] = moved, self.payloads[last]
+                self.rows[moved] = row
+            self.ids.pop()
+            self.payloads.pop()
+            self.size -= 1
+            self._sorted_ids = None
+
+    def select(self, flt: Optional[qmodels.Filter]) -> List[PointId]:
+        return [pid for pid, payload in zip(self.ids, self.payloads) if _match_filter(pid, payload, flt)]
+
+    def set_payload(self, ids: Sequence[PointId], payload: Dict, overwrite: bool = False) -> None:
+        for pid in ids:
+            row = self.rows.get(_normalize_id(pid))
+            if row is None:
+                continue
+            self.payloads[row] = dict(payload) if overwrite else {**self.payloads[row], **payload}
+
+    def sorted_ids(self) -> List[Tuple[int, Any]]:
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(_id_sort_key(pid) for pid in self.ids)
+        return self._sorted_ids
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """返回 (查询数, 点数) 的得分矩阵；EUCLID / MANHATTAN 为距离（越小越相似）。"""
+        matrix = self.vectors[:self.size]
+        if self.distance == qmodels.Distance.EUCLID:
+            return np.sqrt(np.maximum(
+                (queries ** 2).sum(1, keepdims=True) - 2 * queries @ matrix.T + (matrix ** 2).sum(1), 0.0
+            ))
+        if self.distance == qmodels.Distance.MANHATTAN:
+            return np.abs(queries[:, None, :] - matrix[None, :, :]).sum(-1)
+        return queries @ matrix.T
+
+
+class NumpyVectorStore:
+    """
+    NumPy 暴力检索的向量存储，接口与 QdrantClient 保持一致（只实现本项目用到的部分）。
+
+    参数:
+        path: 持久化目录，None 表示纯内存。每个集合一个子目录：
+              - 快照：vectors.npy（float32 矩阵，启动时 mmap 加载）+ points.json（ID / payload / 集合参数）；
+              - 日志：wal.f32（追加写入的向量）+ wal.jsonl（upsert / set_payload / delete 操作，每行一条）；
+              - manifest.json：payload_schema 与日志的已提交长度（很小，每次写操作后原子替换）。
+              写操作只追加日志，不再重写整个集合；日志中的点数超过阈值（见 LOCAL_INDEX_COMPACT_*）
+              或调用 compact() 时才把集合重写为新快照并清空日志。
+              启动时加载快照并回放日志；manifest 之后的半截日志（写入中途崩溃）会被截掉。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or None
+        self._lock = threading.RLock()
+        self._collections: Dict[str, _Collection] = {}
+        # {集合名: {"rows": 日志向量行数, "bytes": 日志操作字节数, "ops": 日志中记录的点数}}
+        self._wal: Dict[str, Dict[str, int]] = {}
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            self._load_all()
+
+    # ---------- 持久化 ----------
+
+    def _collection_dir(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _file(self, name: str, fname: str) -> str:
+        return os.path.join(self._collection_dir(name), fname)
+
+    def _load_all(self) -> None:
+        for name in sorted(os.listdir(self.path)):
+            meta_path = self._file(name, "points.json")
+            if not os.path.isfile(meta_path):
+                continue
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            coll = _Collection(meta["dim"], qmodels.Distance(meta["distance"]))
+            coll.ids = [_normalize_id(i) for i in meta["ids"]]
+            coll.payloads = meta["payloads"]
+            coll.size = len(coll.ids)
+            coll.rows = {pid: row for row, pid in enumerate(coll.ids)}
+            schema = meta.get("payload_schema", {})
+            if coll.size:
+                coll.vectors = np.load(self._file(name, "vectors.npy"), mmap_mode="r")
+            manifest = {}
+            if os.path.isfile(self._file(name, _MANIFEST)):
+                with open(self._file(name, _MANIFEST), "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                schema = manifest.get("payload_schema", schema)
+            coll.payload_schema = {k: qmodels.PayloadSchemaType(v) for k, v in schema.items()}
+            self._collections[name] = coll
+            self._wal[name] = {"rows": manifest.get("wal_rows", 0), "bytes": manifest.get("wal_bytes", 0), "ops": 0}
+            self._replay(name)
+
+    def _replay(self, name: str) -> None:
+        """回放日志中已提交（manifest 记录的长度以内）的操作，并截掉之后的半截写入。"""
+        coll, wal = self._collections[name], self._wal[name]
+        vec_path, ops_path = self._file(name, _WAL_VECTORS), self._file(name, _WAL_OPS)
+        for path, length in ((vec_path, wal["rows"] * coll.dim * 4), (ops_path, wal["bytes"])):
+            if os.path.exists(path) and os.path.getsize(path) > length:
+                with open(path, "r+b") as f:
+                    f.truncate(length)
+        if not wal["bytes"]:
+            return
+        vectors = np.memmap(vec_path, dtype=np.float32, mode="r", shape=(wal["rows"], coll.dim)) if wal["rows"] else None
+        with open(ops_path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                ids = [_normalize_id(i) for i in record["ids"]]
+                if record["op"] == "upsert":
+                    row = record["row"]
+                    coll.upsert(ids, np.array(vectors[row:row + len(ids)]), record["payloads"], prepared=True)
+                elif record["op"] == "delete":
+                    coll.delete(ids)
+                else:
+                    coll.set_payload(ids, record["payload"], overwrite=record["overwrite"])
+                wal["ops"] += len(ids)
+
+    def _write_manifest(self, name: str) -> None:
+        coll, wal = self._collections[name], self._wal[name]
+        tmp = self._file(name, _MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "payload_schema": {k: v.value for k, v in coll.payload_schema.items()},
+                    "wal_rows": wal["rows"],
+                    "wal_bytes": wal["bytes"],
+                },
+                f,
+            )
+        os.replace(tmp, self._file(name, _MANIFEST))
+
+    def _append(self, name: str, records: List[Dict[str, Any]]) -> None:
+        """
+        把本次写操作追加到日志：向量写入 wal.f32，操作写入 wal.jsonl，最后更新 manifest 提交。
+        日志过长时合并为新快照（均摊后每次写入与集合大小无关）。
+        """
+        if not self.path or not records:
+            return
+        coll, wal = self._collections[name], self._wal[name]
+        lines = []
+        with open(self._file(name, _WAL_VECTORS), "ab") as f:
+            for record in records:
+                vectors = record.pop("vectors", None)
+                if vectors is not None:
+                    record["row"] = wal["rows"]
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                    wal["rows"] += len(vectors)
+                wal["ops"] += len(record["ids"])
+                lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        data = "".join(lines).encode("utf-8")
+        with open(self._file(name, _WAL_OPS), "ab") as f:
+            f.write(data)
+        wal["bytes"] += len(data)
+        self._write_manifest(name)
+        if wal["ops"] > max(LOCAL_INDEX_COMPACT_MIN_OPS, coll.size * LOCAL_INDEX_COMPACT_RATIO):
+            self._compact(name)
+
+    def _compact(self, name: str) -> None:
+        """
+        把集合重写为新快照并清空日志（先写临时文件再 rename，避免中途崩溃留下半个文件）。
+        快照替换后、manifest 清零前崩溃时，重启会在新快照上再回放一遍日志；日志操作都是幂等的，结果不变。
+        """
+        if not self.path:
+            return
+        coll = self._collections[name]
+        directory = self._collection_dir(name)
+        os.makedirs(directory, exist_ok=True)
+        vec_tmp = os.path.join(directory, "vectors.tmp.npy")
+        np.save(vec_tmp, np.ascontiguousarray(coll.vectors[:coll.size]))
+        meta_tmp = os.path.join(directory, "points.json.tmp")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "dim": coll.dim,
+                    "distance": coll.distance.value,
+                    "ids": coll.ids,
+                    "payloads": coll.payloads,
+                    "payload_schema": {k: v.value for k, v in coll.payload_schema.items()},
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(vec_tmp, os.path.join(directory, "vectors.npy"))
+        os.replace(meta_tmp, os.path.join(directory, "points.json"))
+        self._wal[name] = {"rows": 0, "bytes": 0, "ops": 0}
+        self._write_manifest(name)
+        for fname in (_WAL_VECTORS, _WAL_OPS):
+            if os.path.exists(os.path.join(directory, fname)):
+                os.remove(os.path.join(directory, fname))
+
+    def compact(self, collection_name: str) -> None:
+        """手动把日志合并进快照（例如批量导入结束后）。"""
+        with self._lock:
+            self._get(collection_name)
+            self._compact(collection_name)
+
+    def _get(self, name: str) -> _Collection:
+        coll = self._collections.get(name)
+        if coll is None:
+            raise ValueError(f"Collection {name} not found")
+        return coll
+
+    # ---------- 集合管理 ----------
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return collection_name in self._collections
+
+    def get_collection(self, collection_name: str) -> SimpleNamespace:
+        """返回与 CollectionInfo 结构兼容的对象（status / points_count / config.params.vectors / payload_schema）。"""
+        with self._lock:
+            coll = self._get(collection_name)
+            return SimpleNamespace(
+                status=qmodels.CollectionStatus.GREEN,
+                points_count=coll.size,
+                config=SimpleNamespace(params=SimpleNamespace(
+                    vectors=qmodels.VectorParams(size=coll.dim, distance=coll.distance)
+                )),
+                payload_schema=dict(coll.payload_schema),
+            )
+
+    def create_collection(self, collection_name: str, vectors_config: qmodels.VectorParams, **_: Any) -> bool:
+        """创建集合；量化 / HNSW / on_disk 等参数对暴力检索无意义，直接忽略。"""
+        with self._lock:
+            if collection_name in self._collections:
+                raise ValueError(f"Collection {collection_name} already exists")
+            self._collections[collection_name] = _Collection(vectors_config.size, vectors_config.distance)
+            self._compact(collection_name)
+        return True
+
+    def delete_collection(self, collection_name: str, **_: Any) -> bool:
+        with self._lock:
+            existed = self._collections.pop(collection_name, None) is not None
+            self._wal.pop(collection_name, None)
+            if existed and self.path:
+                directory = self._collection_dir(collection_name)
+                for fname in (*_SNAPSHOT_FILES, _MANIFEST, _WAL_VECTORS, _WAL_OPS):
+                    if os.path.exists(os.path.join(directory, fname)):
+                        os.remove(os.path.join(directory, fname))
+        return existed
+
+    def create_payload_index(self, collection_name: str, field_name: str,
+                             field_schema: qmodels.PayloadSchemaType, **_: Any) -> qmodels.UpdateResult:
+        """只登记 schema（过滤始终是全量扫描）。"""
+        with self._lock:
+            self._get(collection_name).payload_schema[field_name] = field_schema
+            if self.path:
+                self._write_manifest(collection_name)
+        return _COMPLETED
+
+    # ---------- 写入 ----------
+
+    def _apply_upsert(self, coll: _Collection, points: Any) -> List[Dict[str, Any]]:
+        """写入点，返回要追加到日志的记录。"""
+        if isinstance(points, qmodels.Batch):
+            ids, vectors = points.ids, np.asarray(points.vectors, dtype=np.float32)
+            payloads = points.payloads or [None] * len(points.ids)
+        elif points:
+            ids = [p.id for p in points]
+            vectors = np.asarray([p.vector for p in points], dtype=np.float32)
+            payloads = [p.payload for p in points]
+        else:
+            return []
+        ids = [_normalize_id(pid) for pid in ids]
+        payloads = [dict(p or {}) for p in payloads]
+        vectors = coll.upsert(ids, vectors, payloads)
+        return [{"op": "upsert", "ids": ids, "payloads": payloads, "vectors": vectors}]
+
+    def _selected_ids(self, coll: _Collection, selector: Any) -> List[PointId]:
+        """把 PointIdsList / FilterSelector / ID 列表 / Filter 统一解析为 ID 列表。"""
+        if isinstance(selector, qmodels.PointIdsList):
+            return [_normalize_id(pid) for pid in selector.points]
+        if isinstance(selector, qmodels.FilterSelector):
+            return coll.select(selector.filter)
+        if isinstance(selector, qmodels.Filter):
+            return coll.select(selector)
+        return [_normalize_id(pid) for pid in selector or []]
+
+    def _apply_delete(self, coll: _Collection, selector: Any) -> List[Dict[str, Any]]:
+        ids = self._selected_ids(coll, selector)
+        coll.delete(ids)
+        return [{"op": "delete", "ids": ids}]
+
+    def _apply_operation(self, coll: _Collection, op: Any) -> List[Dict[str, Any]]:
+        if isinstance(op, qmodels.UpsertOperation):
+            upsert = op.upsert
+            if isinstance(upsert, qmodels.PointsBatch):
+                return self._apply_upsert(coll, upsert.batch)
+            return self._apply_upsert(coll, upsert.points)
+        if isinstance(op, qmodels.DeleteOperation):
+            return self._apply_delete(coll, op.delete)
+        if isinstance(op, (qmodels.SetPayloadOperation, qmodels.OverwritePayloadOperation)):
+            body = op.set_payload if isinstance(op, qmodels.SetPayloadOperation) else op.overwrite_payload
+            ids = self._selected_ids(coll, body.points if body.points is not None else body.filter)
+            overwrite = isinstance(op, qmodels.OverwritePayloadOperation)
+            coll.set_payload(ids, body.payload, overwrite=overwrite)
+            return [{"op": "set_payload", "ids": ids, "payload": body.payload, "overwrite": overwrite}]
+        raise NotImplementedError(f"本地向量存储不支持的更新操作: {type(op).__name__}")
+
+    def upsert(self, collection_name: str, points: Any, **_: Any) -> qmodels.UpdateResult:
+        with self._lock:
+            self._append(collection_name, self._apply_upsert(self._get(collection_name), points))
+        return _COMPLETED
+
+    def delete(self, collection_name: str, points_selector: Any, **_: Any) -> qmodels.UpdateResult:
+        with self._lock:
+            self._append(collection_name, self._apply_delete(self._get(collection_name), points_selector))
+        return _COMPLETED
+
+    def batch_update_points(self, collection_name: str, update_operations: Sequence[Any],
+                            **_: Any) -> List[qmodels.UpdateResult]:
+        """按顺序执行全部操作，只追加一次日志。"""
+        with self._lock:
+            coll = self._get(collection_name)
+            records = []
+            for op in update_operations:
+                records.extend(self._apply_operation(coll, op))
+            self._append(collection_name, records)
+        return [_COMPLETED for _ in update_operations]
+
+    # ---------- 读取 ----------
+
+    def scroll(
+        self,
+        collection_name: str,
+        scroll_filter: Optional[qmodels.Filter] = None,
+        limit: int = 10,
+        offset: Optional[PointId] = None,
+        with_payload: Any = True,
+        with_vectors: bool = False,
+        **_: Any,
+    ) -> Tuple[List[qmodels.Record], Optional[PointId]]:
+        """按 ID 顺序分页读取；返回 (本页记录, 下一页起点 ID 或 None)。"""
+        with self._lock:
+            coll = self._get(collection_name)
+            keys = coll.sorted_ids()
+            start = bisect_left(keys, _id_sort_key(_normalize_id(offset))) if offset is not None else 0
+            records: List[qmodels.Record] = []
+            for _, pid in keys[start:]:
+                row = coll.rows[pid]
+                if not _match_filter(pid, coll.payloads[row], scroll_filter):
+                    continue
+                if len(records) == limit:
+                    return records, pid
+                records.append(qmodels.Record(
+                    id=pid,
+                    payload=_select_payload(coll.payloads[row], with_payload),
+                    vector=coll.vectors[row].tolist() if with_vectors else None,
+                ))
+            return records, None
+
+    def retrieve(self, collection_name: str, ids: Sequence[PointId], with_payload: Any = True,
+                 with_vectors: bool = False, **_: Any) -> List[qmodels.Record]:
+        """按 ID 读取点（不存在的 ID 被忽略）。"""
+        with self._lock:
+            coll = self._get(collection_name)
+            rows = [(pid, coll.rows.get(pid)) for pid in (_normalize_id(i) for i in ids)]
+            return [
+                qmodels.Record(
+                    id=pid,
+                    payload=_select_payload(coll.payloads[row], with_payload),
+                    vector=coll.vectors[row].tolist() if with_vectors else None,
+                )
+                for pid, row in rows
+                if row is not None
+            ]
+
+    def _top_k(self, coll: _Collection, scores: np.ndarray, flt: Optional[qmodels.Filter], limit: int,
+               offset: int, score_threshold: Optional[float], with_payload: Any,
+               with_vectors: bool) -> List[qmodels.ScoredPoint]:
+        ascending = coll.distance in (qmodels.Distance.EUCLID, qmodels.Distance.MANHATTAN)
+        order = scores if ascending else -scores
+        if flt is not None:
+            mask = np.fromiter(
+                (_match_filter(pid, payload, flt) for pid, payload in zip(coll.ids, coll.payloads)),
+                dtype=bool, count=coll.size,
+            )
+            order = np.where(mask, order, np.inf)
+        if score_threshold is not None:
+            order = np.where(order <= (score_threshold if ascending else -score_threshold), order, np.inf)
+        k = min(limit + (offset or 0), coll.size)
+        if k <= 0:
+            return []
+        rows = np.argpartition(order, k - 1)[:k] if k < coll.size else np.arange(coll.size)
+        rows = rows[np.argsort(order[rows], kind="stable")][offset or 0:]
+        return [
+            qmodels.ScoredPoint(
+                id=coll.ids[row],
+                version=0,
+                score=float(scores[row]),
+                payload=_select_payload(coll.payloads[row], with_payload),
+                vector=coll.vectors[row].tolist() if with_vectors else None,
+            )
+            for row in rows
+            if np.isfinite(order[row])
+        ]
+
+    def _search(self, collection_name: str, queries: np.ndarray, params: List[Dict]) -> List[rest.QueryResponse]:
+        """一次矩阵乘计算所有查询的得分，再分别过滤 / 取 top-k。"""
+        with self._lock:
+            coll = self._get(collection_name)
+            if coll.size == 0:
+                return [rest.QueryResponse(points=[]) for _ in params]
+            scores = coll.scores(coll._prepare(queries))
+            return [rest.QueryResponse(points=self._top_k(coll, row, **p)) for row, p in zip(scores, params)]
+
+    def query_points(
+        self,
+        collection_name: str,
+        query: Any = None,
+        query_filter: Optional[qmodels.Filter] = None,
+        limit: int = 10,
+        offset: Optional[int] = None,
+        with_payload: Any = True,
+        with_vectors: bool = False,
+        score_threshold: Optional[float] = None,
+        **_: Any,
+    ) -> rest.QueryResponse:
+        """最近邻检索（暴力精确检索，search_params 被忽略）。"""
+        if isinstance(query, qmodels.NearestQuery):
+            query = query.nearest
+        params = dict(flt=query_filter, limit=limit, offset=offset, score_threshold=score_threshold,
+                      with_payload=with_payload, with_vectors=with_vectors)
+        return self._search(collection_name, np.asarray([query], dtype=np.float32), [params])[0]
+
+    def query_batch_points(self, collection_name: str, requests: Sequence[qmodels.QueryRequest],
+                           **_: Any) -> List[rest.QueryResponse]:
+        """批量检索：所有查询共享一次矩阵乘。"""
+        if not requests:
+            return []
+        queries = [r.query.nearest if isinstance(r.query, qmodels.NearestQuery) else r.query for r in requests]
+        params = [
+            dict(flt=r.filter, limit=r.limit or 10, offset=r.offset, score_threshold=r.score_threshold,
+                 with_payload=r.with_payload if r.with_payload is not None else False,
+                 with_vectors=bool(r.with_vector))
+            for r in requests
+        ]
+        return self._search(collection_name, np.asarray(queries, dtype=np.float32), params)
+
+    def close(self, **_: Any) -> None:
+        """所有写操作都已即时追加到日志，这里无需额外处理（日志在下次合并时写入快照）。"""
+
+
+class _SerializedClient:
+    """用一把锁串行化所有方法调用（Qdrant local 模式不是线程安全的，而索引流水线会多线程写入）。"""
+
+    def __init__(self, client: Any):
+        self._client = client
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return call
+
+
+class _ThreadedAsyncClient:
+    """
+    AsyncQdrantClient 风格的包装：每个方法调用都通过 asyncio.to_thread 转给同步客户端。
+    本地后端的数据只存在于一个进程内客户端中，同步 / 异步路径必须共用它。
+    """
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await asyncio.to_thread(attr, *args, **kwargs)
+
+        return call
+
+    async def close(self, **_: Any) -> None:
+        """底层同步客户端由 close_qdrant_client 负责关闭。"""
@@ -18,3 +18,11 @@ def _get_mongo_client() -> MongoClient:
     if _default_mongo_client is None:
         _default_mongo_client = MongoClient(os.getenv("MONGO_URI"))
     return _default_mongo_client
+
+# 默认数据库名
+MONGO_DB = os.getenv("MONGO_DB", "agent_home")
+
+
+def _get_mongo_db():
+    """获取默认数据库（MONGO_DB，默认 agent_home）。"""
+    return _get_mongo_client()[MONGO_DB]
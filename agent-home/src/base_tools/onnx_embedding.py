@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+基于 ONNX Runtime 的 CPU embedding 后端（EMBEDDING_MODEL=onnx / onnx-int8）。
+
+与 HuggingFaceEmbeddings 使用同一个 sentence-transformers 模型，导出为 ONNX 后：
+- 运行时只依赖 onnxruntime + tokenizers，不需要加载 torch（启动更快、常驻内存更小）；
+- 可选 int8 动态量化（权重 int8，激活运行时量化），CPU 上通常再快 1.5~3 倍；
+- intra-op 线程数可配置（EMBEDDING_ONNX_THREADS），便于和其它 worker 分配 CPU。
+
+模型首次使用时导出到 EMBEDDING_ONNX_DIR/<模型名>/（需要 optimum[onnxruntime]，仅导出时需要 torch），
+之后直接加载导出结果；也可以在有 torch 的机器上导出后把目录拷贝到部署机。
+输出与 sentence-transformers 一致：attention mask 加权平均池化 + L2 归一化。
+"""
+import os
+import importlib.util
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# 只检测不导入：onnxruntime 在真正创建 OnnxEmbeddings 时才加载
+ONNX_AVAILABLE = all(importlib.util.find_spec(m) is not None for m in ("onnxruntime", "tokenizers"))
+
+# 导出模型的根目录
+EMBEDDING_ONNX_DIR = os.getenv(
+    "EMBEDDING_ONNX_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "agent-home", "onnx"),
+)
+# intra-op 线程数，0 表示由 onnxruntime 按物理核数决定
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+# 最大 token 数（超出截断）与单次推理的批大小
+EMBEDDING_ONNX_MAX_LENGTH = int(os.getenv("EMBEDDING_ONNX_MAX_LENGTH", "256"))
+EMBEDDING_ONNX_BATCH_SIZE = int(os.getenv("EMBEDDING_ONNX_BATCH_SIZE", "32"))
+
+_FP32_FILE = "model.onnx"
+_INT8_FILE = "model_int8.onnx"
+
+
+def _model_dir(model_name: str) -> str:
+    return os.path.join(EMBEDDING_ONNX_DIR, model_name.replace("/", "__"))
+
+
+def export_onnx_model(model_name: str, output_dir: Optional[str] = None, quantize: bool = True) -> str:
+    """
+    把 sentence-transformers 模型导出为 ONNX（可选同时生成 int8 动态量化版本）。
+
+    参数:
+        model_name: HuggingFace 模型名
+        output_dir: 输出目录，默认 EMBEDDING_ONNX_DIR/<模型名>
+        quantize: 是否生成 model_int8.onnx
+
+    返回:
+        输出目录
+    """
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+
+    output_dir = output_dir or _model_dir(model_name)
+    if not os.path.exists(os.path.join(output_dir, _FP32_FILE)):
+        print(f"🟢 正在导出 ONNX 模型: {model_name} -> {output_dir}")
+        ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(output_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    if quantize and not os.path.exists(os.path.join(output_dir, _INT8_FILE)):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"🟢 正在生成 int8 动态量化模型: {output_dir}/{_INT8_FILE}")
+        quantize_dynamic(
+            os.path.join(output_dir, _FP32_FILE),
+            os.path.join(output_dir, _INT8_FILE),
+            weight_type=QuantType.QInt8,
+        )
+    return output_dir
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    ONNX Runtime 推理的 sentence-transformers embedding。
+
+    参数:
+        model_name: HuggingFace 模型名（用于定位 / 导出 ONNX 文件，也作为缓存 key）
+        quantized: 使用 int8 动态量化模型
+        model_dir: ONNX 文件所在目录，默认 EMBEDDING_ONNX_DIR/<模型名>，不存在时自动导出
+        intra_op_threads: intra-op 线程数，0 表示 onnxruntime 默认值
+        max_length: 最大 token 数
+        batch_size: 单次推理的文本条数
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantized: bool = False,
+        model_dir: Optional[str] = None,
+        intra_op_threads: int = EMBEDDING_ONNX_THREADS,
+        max_length: int = EMBEDDING_ONNX_MAX_LENGTH,
+        batch_size: int = EMBEDDING_ONNX_BATCH_SIZE,
+    ):
+        if not ONNX_AVAILABLE:
+            raise ImportError("需要安装 onnxruntime 与 tokenizers 才能使用 ONNX embedding")
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.quantized = quantized
+        self.batch_size = max(1, batch_size)
+        model_dir = model_dir or _model_dir(model_name)
+        model_file = os.path.join(model_dir, _INT8_FILE if quantized else _FP32_FILE)
+        if not os.path.exists(model_file):
+            export_onnx_model(model_name, model_dir, quantize=quantized)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = max(0, intra_op_threads)
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_file, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """一批文本 -> (n, dim) float32，平均池化 + L2 归一化。"""
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+        hidden = self.session.run(None, feeds)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """
+        批量向量化，返回 (len(texts), dim) 的 float32 矩阵。
+        按长度排序后分批，减少 padding 带来的无效计算，最后恢复原始顺序。
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        parts = [
+            self._embed_batch([texts[i] for i in order[start:start + self.batch_size]])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        result = np.empty((len(texts), parts[0].shape[1]), dtype=np.float32)
+        result[order] = np.concatenate(parts)
+        return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """嵌入文档列表。"""
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """嵌入查询文本。"""
+        return self.embed_array([text])[0].tolist()
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+基于 Qdrant 的检索接口（generated_docs / web_pages 通用）。
+
+- iter_scroll / aiter_scroll：按 next_page_offset 逐页读取，不截断、不一次性加载；
+- search / asearch：top-k 语义检索，支持 doc_id / source / url / created_at 区间过滤，
+  量化集合按配置档自动开启重排（rescore）；
+- search_batch / asearch_batch：多条查询一次请求完成（query_batch_points）。
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Union
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client import models as qmodels
+from base_tools.vertordb import (
+    _get_qdrant_client,
+    _get_async_qdrant_client,
+    _get_default_embedding,
+    _collection_exists,
+    _acollection_exists,
+    get_collection_profile,
+)
+
+# 单页大小
+SCROLL_PAGE_SIZE = 256
+
+DateLike = Union[str, datetime]
+
+
+def build_filter(
+    doc_id: Optional[str] = None,
+    source: Optional[str] = None,
+    url: Optional[str] = None,
+    created_after: Optional[DateLike] = None,
+    created_before: Optional[DateLike] = None,
+) -> Optional[qmodels.Filter]:
+    """
+    构造 payload 过滤条件，所有条件为 AND 关系；全部为空时返回 None。
+
+    参数:
+        doc_id: 精确匹配 doc_id
+        source: 精确匹配 source（如 "generated_doc"）
+        url: 精确匹配 url（web_pages 集合）
+        created_after / created_before: created_at 的闭区间，支持 ISO 字符串或 datetime
+    """
+    must: List[Any] = []
+    for key, value in (("doc_id", doc_id), ("source", source), ("url", url)):
+        if value:
+            must.append(qmodels.FieldCondition(key=key, match=qmodels.MatchValue(value=value)))
+    if created_after or created_before:
+        must.append(
+            qmodels.FieldCondition(
+                key="created_at",
+                range=qmodels.DatetimeRange(gte=created_after, lte=created_before),
+            )
+        )
+    return qmodels.Filter(must=must) if must else None
+
+
+def iter_scroll(
+    collection_name: str,
+    scroll_filter: Optional[qmodels.Filter] = None,
+    page_size: int = SCROLL_PAGE_SIZE,
+    with_payload: Union[bool, Sequence[str]] = True,
+    with_vectors: bool = False,
+    client: Optional[QdrantClient] = None,
+) -> Iterator[qmodels.Record]:
+    """
+    逐页遍历集合中满足过滤条件的所有 point（生成器）。
+    集合不存在时不产出任何结果。
+    """
+    client = client or _get_qdrant_client()
+    if not _collection_exists(collection_name, client):
+        return
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=page_size,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+        )
+        yield from records
+        if offset is None:
+            return
+
+
+async def aiter_scroll(
+    collection_name: str,
+    scroll_filter: Optional[qmodels.Filter] = None,
+    page_size: int = SCROLL_PAGE_SIZE,
+    with_payload: Union[bool, Sequence[str]] = True,
+    with_vectors: bool = False,
+    client: Optional[AsyncQdrantClient] = None,
+) -> AsyncIterator[qmodels.Record]:
+    """iter_scroll 的异步版本（异步生成器）。"""
+    client = client or _get_async_qdrant_client()
+    if not await _acollection_exists(collection_name, client):
+        return
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=page_size,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+        )
+        for record in records:
+            yield record
+        if offset is None:
+            return
+
+
+def _format_hits(points: List[qmodels.ScoredPoint]) -> List[Dict]:
+    """把检索结果转换为 dict 列表。"""
+    return [{"id": p.id, "score": p.score, "payload": p.payload or {}} for p in points]
+
+
+def search(
+    query: str,
+    collection_name: str = "generated_docs",
+    top_k: int = 5,
+    query_filter: Optional[qmodels.Filter] = None,
+    score_threshold: Optional[float] = None,
+    **filters: Any,
+) -> List[Dict]:
+    """
+    top-k 语义检索。
+
+    参数:
+        query: 查询文本
+        collection_name: 集合名称
+        top_k: 返回条数
+        query_filter: 自定义过滤条件（优先于 filters）
+        score_threshold: 最低相似度
+        **filters: 传给 build_filter 的过滤字段（doc_id / source / url / created_after / created_before）
+
+    返回:
+        [{"id": ..., "score": ..., "payload": {...}}, ...]，按相似度降序
+    """
+    client = _get_qdrant_client()
+    if not query or not _collection_exists(collection_name, client):
+        return []
+    vector = _get_default_embedding().embed_query(query)
+    response = client.query_points(
+        collection_name=collection_name,
+        query=vector,
+        query_filter=query_filter or build_filter(**filters),
+        limit=top_k,
+        score_threshold=score_threshold,
+        search_params=get_collection_profile(collection_name).search_params(),
+        with_payload=True,
+    )
+    return _format_hits(response.points)
+
+
+async def asearch(
+    query: str,
+    collection_name: str = "generated_docs",
+    top_k: int = 5,
+    query_filter: Optional[qmodels.Filter] = None,
+    score_threshold: Optional[float] = None,
+    **filters: Any,
+) -> List[Dict]:
+    """search 的异步版本。"""
+    client = _get_async_qdrant_client()
+    if not query or not await _acollection_exists(collection_name, client):
+        return []
+    vector = await _get_default_embedding().aembed_query(query)
+    response = await client.query_points(
+        collection_name=collection_name,
+        query=vector,
+        query_filter=query_filter or build_filter(**filters),
+        limit=top_k,
+        score_threshold=score_threshold,
+        search_params=get_collection_profile(collection_name).search_params(),
+        with_payload=True,
+    )
+    return _format_hits(response.points)
+
+
+def _batch_requests(
+    collection_name: str,
+    vectors: List[List[float]],
+    top_k: int,
+    query_filter: Optional[qmodels.Filter],
+    score_threshold: Optional[float],
+) -> List[qmodels.QueryRequest]:
+    params = get_collection_profile(collection_name).search_params()
+    return [
+        qmodels.QueryRequest(
+            query=vec,
+            filter=query_filter,
+            limit=top_k,
+            score_threshold=score_threshold,
+            params=params,
+            with_payload=True,
+        )
+        for vec in vectors
+    ]
+
+
+def search_batch(
+    queries: List[str],
+    collection_name: str = "generated_docs",
+    top_k: int = 5,
+    query_filter: Optional[qmodels.Filter] = None,
+    score_threshold: Optional[float] = None,
+    **filters: Any,
+) -> List[List[Dict]]:
+    """
+    批量语义检索：所有查询一次向量化、一次 query_batch_points 请求。
+    参数同 search，返回与 queries 一一对应的结果列表。
+    """
+    client = _get_qdrant_client()
+    if not queries:
+        return []
+    if not _collection_exists(collection_name, client):
+        return [[] for _ in queries]
+    # sentence-transformers / OpenAI 的查询向量与文档向量一致，批量走 embed_documents
+    vectors = _get_default_embedding().embed_documents(list(queries))
+    responses = client.query_batch_points(
+        collection_name=collection_name,
+        requests=_batch_requests(collection_name, vectors, top_k, query_filter or build_filter(**filters), score_threshold),
+    )
+    return [_format_hits(r.points) for r in responses]
+
+
+async def asearch_batch(
+    queries: List[str],
+    collection_name: str = "generated_docs",
+    top_k: int = 5,
+    query_filter: Optional[qmodels.Filter] = None,
+    score_threshold: Optional[float] = None,
+    **filters: Any,
+) -> List[List[Dict]]:
+    """search_batch 的异步版本。"""
+    client = _get_async_qdrant_client()
+    if not queries:
+        return []
+    if not await _acollection_exists(collection_name, client):
+        return [[] for _ in queries]
+    vectors = await _get_default_embedding().aembed_documents(list(queries))
+    responses = await client.query_batch_points(
+        collection_name=collection_name,
+        requests=_batch_requests(collection_name, vectors, top_k, query_filter or build_filter(**filters), score_threshold),
+    )
+    return [_format_hits(r.points) for r in responses]
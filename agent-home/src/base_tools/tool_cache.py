@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+工具调用结果缓存（包装 agent_tools.tools.ALL_TOOLS）。
+
+同样的工具调用在不同请求之间反复出现：每次查天气都要调 get_current_location，
+search 反复搜「<城市> 天气预报」，web_browser 反复打开同一批热门链接。
+- key = (工具名, 归一化后的参数)：字符串做 NFKC + 空白折叠，URL 的协议和域名转小写、去掉 #fragment；
+- 每个工具单独的 TTL（TOOL_CACHE_TTLS），TTL 为 0 的工具（写向量库等有副作用的工具）不包装；
+- 两级存储：进程内 LRU + 可选的 SQLite 磁盘层（TOOL_CACHE_PATH，默认关闭）；
+- single-flight：同一个 key 正在执行时，后到的调用等待并共享结果，不重复请求；
+- 错误结果（工具返回的「定位失败」「Failed to fetch」等）与异常都不缓存；
+- 按工具统计命中率（tool_cache_stats，/metrics 中的 tool_cache）。
+"""
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+# 各工具的默认 TTL（秒），按 tool.name 配置；未列出的工具不缓存
+DEFAULT_TOOL_TTLS: Dict[str, float] = {
+    "get_current_location": 3600,
+    "duckduckgo_search": 1800,
+    "web_browser": 900,
+    "web_fetch": 300,
+    "rss_reader": 300,
+    "get_weather": 3600,
+}
+# 覆盖默认 TTL，例如 "duckduckgo_search=600,web_fetch=0"
+TOOL_CACHE_TTLS = os.getenv("TOOL_CACHE_TTLS", "")
+# 内存 LRU 最多保存的结果条数
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "1024"))
+# 磁盘层路径，为空（默认）时只使用内存
+TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", "")
+# 总开关
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# 以这些前缀开头的返回值是工具自己捕获的错误，不缓存
+_ERROR_PREFIXES = (
+    "Failed to fetch", "无法读取该网页", "定位失败", "Unknown Location", "读取发生错误", "跳过 ", "连接成功，但未解析到文章",
+)
+
+
+def _parse_ttls(spec: str) -> Dict[str, float]:
+    ttls = dict(DEFAULT_TOOL_TTLS)
+    for item in spec.split(","):
+        name, sep, value = item.partition("=")
+        if sep and name.strip():
+            try:
+                ttls[name.strip()] = float(value)
+            except ValueError:
+                print(f"⚠️ TOOL_CACHE_TTLS 配置无效，已忽略: {item}")
+    return ttls
+
+
+def _normalize_arg(value: Any) -> Any:
+    """归一化参数值：只差空白 / 全半角 / URL 大小写的调用命中同一条缓存。"""
+    if isinstance(value, str):
+        text = " ".join(unicodedata.normalize("NFKC", value).split())
+        if text.lower().startswith(("http://", "https://")):
+            parts = urlsplit(text)
+            text = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+        return text
+    if isinstance(value, dict):
+        return {k: _normalize_arg(v) for k, v in sorted(value.items()) if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_arg(v) for v in value]
+    return value
+
+
+def make_key(tool_name: str, args: Dict[str, Any]) -> str:
+    """缓存 key：sha256(工具名 + 归一化参数的 JSON)。"""
+    payload = json.dumps(_normalize_arg(args), ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(f"{tool_name}\n{payload}".encode("utf-8")).hexdigest()
+
+
+def _cacheable(value: Any) -> bool:
+    if isinstance(value, str):
+        return bool(value.strip()) and not value.startswith(_ERROR_PREFIXES)
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        return False
+    return value is not None
+
+
+@dataclass
+class _ToolStats:
+    hits: int = 0
+    disk_hits: int = 0
+    shared: int = 0
+    misses: int = 0
+    uncached: int = 0
+
+
+@dataclass
+class _Flight:
+    """一次正在执行的同步调用，等待者通过 event 拿到结果。"""
+    event: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class ToolResultCache:
+    """
+    工具结果缓存（线程安全；异步调用的 single-flight 按事件循环区分）。
+
+    参数:
+        path: SQLite 文件路径，None 或空字符串表示不启用磁盘层
+        max_items: 内存 LRU 最多保存的条数
+    """
+
+    def __init__(self, path: Optional[str] = None, max_items: int = 1024):
+        self.path = path or None
+        self.max_items = max(0, max_items)
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats: Dict[str, _ToolStats] = {}
+        self._flights: Dict[str, _Flight] = {}
+        self._aflights: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS tool_results ("
+                    " key TEXT PRIMARY KEY, tool TEXT NOT NULL, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+                )
+                self._conn.commit()
+            except Exception as e:
+                print(f"⚠️ 工具结果磁盘缓存不可用（{self.path}）: {e}，仅使用内存缓存")
+                self._conn = None
+
+    def _tool_stats(self, tool: str) -> _ToolStats:
+        return self._stats.setdefault(tool, _ToolStats())
+
+    def get(self, tool: str, key: str) -> Tuple[bool, Any]:
+        """查缓存，返回 (是否命中, 结果)；过期条目视为未命中。"""
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self._memory.move_to_end(key)
+                    self._tool_stats(tool).hits += 1
+                    return True, item[1]
+                del self._memory[key]
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT expires_at, value FROM tool_results WHERE key = ?", (key,)
+                    ).fetchone()
+                except Exception as e:
+                    print(f"⚠️ 工具结果磁盘缓存读取失败: {e}")
+                    row = None
+                if row is not None and row[0] > now:
+                    value = json.loads(row[1])
+                    self._remember(key, row[0], value)
+                    self._tool_stats(tool).disk_hits += 1
+                    return True, value
+        return False, None
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        """写入内存 LRU（调用方需持有锁）。"""
+        if self.max_items == 0:
+            return
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def put(self, tool: str, key: str, value: Any, ttl: float) -> None:
+        """写入结果；错误结果只计数、不缓存。"""
+        with self._lock:
+            stats = self._tool_stats(tool)
+            stats.misses += 1
+            if not _cacheable(value):
+                stats.uncached += 1
+                return
+            expires_at = time.time() + ttl
+            self._remember(key, expires_at, value)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO tool_results (key, tool, expires_at, value) VALUES (?, ?, ?, ?)",
+                        (key, tool, expires_at, json.dumps(value, ensure_ascii=False)),
+                    )
+                    self._conn.commit()
+                except Exception as e:
+                    print(f"⚠️ 工具结果磁盘缓存写入失败: {e}")
+
+    def call(self, tool: str, key: str, ttl: float, fn: Callable[[], Any]) -> Any:
+        """同步：命中直接返回；同 key 正在执行时等待其结果；否则执行 fn 并写缓存。"""
+        hit, value = self.get(tool, key)
+        if hit:
+            return value
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._tool_stats(tool).shared += 1
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = fn()
+            self.put(tool, key, flight.value, ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    async def acall(self, tool: str, key: str, ttl: float, fn: Callable[[], Any]) -> Any:
+        """call 的异步版本：fn 返回协程。"""
+        hit, value = self.get(tool, key)
+        if hit:
+            return value
+        flight_key = (asyncio.get_running_loop(), key)
+        future = self._aflights.get(flight_key)
+        if future is not None:
+            with self._lock:
+                self._tool_stats(tool).shared += 1
+            # shield：某个等待者被取消时不影响正在执行的调用和其它等待者
+            return await asyncio.shield(future)
+        future = self._aflights[flight_key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await fn()
+            self.put(tool, key, value, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有等待者时避免 "Future exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._aflights.pop(flight_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """按工具返回命中统计；hit_rate 把 single-flight 共享的结果也算作命中。"""
+        with self._lock:
+            tools = {}
+            for name, s in self._stats.items():
+                hits = s.hits + s.disk_hits + s.shared
+                total = hits + s.misses
+                tools[name] = {
+                    "hits": s.hits,
+                    "disk_hits": s.disk_hits,
+                    "shared": s.shared,
+                    "misses": s.misses,
+                    "uncached": s.uncached,
+                    "hit_rate": round(hits / total, 4) if total else 0.0,
+                }
+            return {"tools": tools, "memory_items": len(self._memory), "disk_enabled": self._conn is not None}
+
+    def clear(self) -> None:
+        """清空内存层与计数器（磁盘层靠 TTL 过期）。"""
+        with self._lock:
+            self._memory.clear()
+            self._stats.clear()
+
+
+_default_cache: Optional[ToolResultCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    """获取进程级共享的工具结果缓存。"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ToolResultCache(TOOL_CACHE_PATH, TOOL_CACHE_SIZE)
+    return _default_cache
+
+
+def tool_cache_stats() -> Dict[str, Any]:
+    """返回全局工具结果缓存的统计。"""
+    return get_tool_cache().stats()
+
+
+def cached_tool(tool, ttl: Optional[float] = None, cache: Optional[ToolResultCache] = None):
+    """
+    给一个工具套上结果缓存，返回名称 / 描述 / 参数 schema 都不变的新工具。
+
+    参数:
+        tool: LangChain 工具（@tool 定义的函数或 BaseTool 子类实例）
+        ttl: 缓存秒数，None 时按 TOOL_CACHE_TTLS 配置；<= 0 时原样返回
+        cache: 使用的缓存实例，默认为全局缓存
+    """
+    from langchain_core.tools import StructuredTool
+
+    if ttl is None:
+        ttl = _parse_ttls(TOOL_CACHE_TTLS).get(tool.name, 0)
+    if not TOOL_CACHE_ENABLED or ttl <= 0:
+        return tool
+
+    def _cache() -> ToolResultCache:
+        return cache if cache is not None else get_tool_cache()
+
+    def _run(**kwargs):
+        return _cache().call(tool.name, make_key(tool.name, kwargs), ttl, lambda: tool.invoke(kwargs))
+
+    async def _arun(**kwargs):
+        return await _cache().acall(tool.name, make_key(tool.name, kwargs), ttl, lambda: tool.ainvoke(kwargs))
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        func=_run,
+        coroutine=_arun,
+        return_direct=tool.return_direct,
+    )
+
+
+def cache_tools(tools: Sequence) -> List:
+    """对工具列表逐个调用 cached_tool。"""
+    return [cached_tool(t) for t in tools]
@@ -1,49 +1,459 @@
 # -*- coding: utf-8 -*-
 import os
-from uuid import uuid4
+import weakref
+import importlib.util
+import asyncio
+import threading
+from uuid import NAMESPACE_URL, UUID, uuid5
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Optional
-from qdrant_client import QdrantClient
+from functools import lru_cache
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Dict, Optional, Tuple, Union
+import numpy as np
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client import models as qmodels
 from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from base_tools.embedding_cache import (
+    EMBEDDING_CACHE_ENABLED,
+    _CachedEmbeddings,
+    _chunk_hash,
+    _normalize_text,
+    get_embedding_cache,
+)
+from base_tools.doc_store import upsert_doc_metadata
+from base_tools.local_index import NumpyVectorStore, _SerializedClient, _ThreadedAsyncClient
+from base_tools.embedding_worker import (
+    EMBEDDING_BATCHING_ENABLED,
+    EmbeddingBatcher,
+    _BatchingEmbeddings,
+)
+from base_tools.onnx_embedding import ONNX_AVAILABLE, OnnxEmbeddings
 
 
-# 尝试导入不同的 embedding 模型
-try:
-    from langchain_community.embeddings import HuggingFaceEmbeddings
-    HUGGINGFACE_AVAILABLE = True
-except ImportError:
-    HUGGINGFACE_AVAILABLE = False
-
-try:
-    from langchain_openai import OpenAIEmbeddings
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# 检测可用的 embedding 实现（只查找不导入，真正用到时才在 _get_embedding_model 中导入）
+HUGGINGFACE_AVAILABLE = importlib.util.find_spec("langchain_community") is not None
+OPENAI_AVAILABLE = importlib.util.find_spec("langchain_openai") is not None
 
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+# 传输方式：为 true 时数据面走 gRPC（QDRANT_GRPC_PORT），否则走 HTTP
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() in ("1", "true", "yes")
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+# 单次请求超时（秒）
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "10"))
+# HTTP 连接池大小与 keep-alive 过期时间（秒）
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "16"))
+QDRANT_KEEPALIVE_EXPIRY = float(os.getenv("QDRANT_KEEPALIVE_EXPIRY", "60"))
+# 向量存储后端：server（Qdrant 服务，默认）/ local（Qdrant 进程内模式）/ numpy（NumPy 暴力检索）
+QDRANT_BACKEND = os.getenv("QDRANT_BACKEND", "server").lower()
+# local / numpy 后端的持久化目录，为空表示纯内存
+QDRANT_LOCAL_PATH = os.getenv("QDRANT_LOCAL_PATH", "")
+
+# 进程级共享的客户端（延迟初始化）
+_qdrant_client: Optional[QdrantClient] = None
+_qdrant_client_lock = threading.Lock()
+# 异步客户端绑定事件循环，每个 loop 一个
+_async_qdrant_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncQdrantClient]" = weakref.WeakKeyDictionary()
+
+
+def _qdrant_client_kwargs() -> Dict:
+    """同步 / 异步客户端共用的连接参数。"""
+    return {
+        "url": QDRANT_URL,
+        "api_key": QDRANT_API_KEY,
+        "prefer_grpc": QDRANT_PREFER_GRPC,
+        "grpc_port": QDRANT_GRPC_PORT,
+        "timeout": QDRANT_TIMEOUT,
+        # 显式开启 keep-alive 连接池（qdrant-client 对 localhost 默认关闭 keep-alive）
+        "limits": httpx.Limits(
+            max_connections=QDRANT_POOL_SIZE,
+            max_keepalive_connections=QDRANT_POOL_SIZE,
+            keepalive_expiry=QDRANT_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def _create_qdrant_client() -> QdrantClient:
+    """按 QDRANT_BACKEND 创建同步客户端。"""
+    if QDRANT_BACKEND == "numpy":
+        return NumpyVectorStore(QDRANT_LOCAL_PATH or None)
+    if QDRANT_BACKEND == "local":
+        local = QdrantClient(path=QDRANT_LOCAL_PATH) if QDRANT_LOCAL_PATH else QdrantClient(location=":memory:")
+        return _SerializedClient(local)
+    if QDRANT_BACKEND != "server":
+        raise ValueError(f"未知的 QDRANT_BACKEND: {QDRANT_BACKEND}（可选 server / local / numpy）")
+    return QdrantClient(**_qdrant_client_kwargs())
+
 
 def _get_qdrant_client() -> QdrantClient:
     """
-    内部帮助函数：构造 QdrantClient。
+    内部帮助函数：获取进程级共享的 QdrantClient（线程安全，首次调用时创建）。
     默认连接本地 6333 端口，支持通过环境变量覆盖：
-    - QDRANT_URL
-    - QDRANT_API_KEY
+    - QDRANT_URL / QDRANT_API_KEY
+    - QDRANT_PREFER_GRPC / QDRANT_GRPC_PORT
+    - QDRANT_TIMEOUT / QDRANT_POOL_SIZE / QDRANT_KEEPALIVE_EXPIRY
+    QDRANT_BACKEND=local / numpy 时不需要 Qdrant 服务（数据在进程内，可用 QDRANT_LOCAL_PATH 持久化）。
     """
-    return QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    global _qdrant_client
+    if _qdrant_client is None:
+        with _qdrant_client_lock:
+            if _qdrant_client is None:
+                _qdrant_client = _create_qdrant_client()
+    return _qdrant_client
+
+
+def _get_async_qdrant_client() -> AsyncQdrantClient:
+    """
+    获取当前事件循环共享的 AsyncQdrantClient。
+    供 FastAPI handler 与异步图节点使用，不阻塞事件循环。
+    本地后端的数据只在同步客户端里，异步调用转到线程中执行同一个客户端。
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_qdrant_clients.get(loop)
+    if client is None:
+        if QDRANT_BACKEND == "server":
+            client = AsyncQdrantClient(**_qdrant_client_kwargs())
+        else:
+            client = _ThreadedAsyncClient(_get_qdrant_client())
+        _async_qdrant_clients[loop] = client
+    return client
+
+
+def close_qdrant_client() -> None:
+    """关闭共享的同步客户端（进程退出 / 测试清理时调用）。"""
+    global _qdrant_client
+    with _qdrant_client_lock:
+        if _qdrant_client is not None:
+            _qdrant_client.close()
+            _qdrant_client = None
+
+
+async def aclose_qdrant_client() -> None:
+    """关闭当前事件循环上的异步客户端。"""
+    client = _async_qdrant_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
 
 
-# 初始化文本分割器（使用 LangChain 的标准分割器）
-_text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,           # 每个 chunk 的最大字符数
-    chunk_overlap=50,         # chunk 之间的重叠字符数（保持上下文连贯性）
-    length_function=len,      # 计算长度的函数
-    separators=["\n\n", "\n", "。", "！", "？", "!", "?", " ", ""],  # 分割符优先级（中文友好）
+@dataclass(frozen=True)
+class CollectionProfile:
+    """
+    集合存储 / 索引配置档（只在创建集合时生效）。
+
+    字段:
+        on_disk: 原始向量存磁盘（mmap），显著降低 RAM 占用
+        quantization: None / "int8"（标量量化，约 4 倍压缩）/ "pq"（乘积量化，压缩比更高、精度更低）
+        always_ram: 量化后的向量常驻内存（搜索走量化向量，再用原始向量重排）
+        hnsw_m / hnsw_ef_construct: HNSW 图参数，None 表示使用服务端默认值
+        hnsw_ef: 搜索时的 ef，None 表示服务端默认值
+        rescore / oversampling: 量化检索时先多取 oversampling 倍候选，再用原始向量重排
+    """
+    name: str
+    on_disk: bool = False
+    quantization: Optional[str] = None
+    quantile: float = 0.99
+    pq_compression: qmodels.CompressionRatio = qmodels.CompressionRatio.X16
+    always_ram: bool = True
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construct: Optional[int] = None
+    hnsw_ef: Optional[int] = None
+    rescore: bool = True
+    oversampling: float = 2.0
+
+    def vectors_config(self, dim: int, distance: qmodels.Distance) -> qmodels.VectorParams:
+        return qmodels.VectorParams(size=dim, distance=distance, on_disk=self.on_disk or None)
+
+    def quantization_config(self) -> Optional[qmodels.QuantizationConfig]:
+        if self.quantization == "int8":
+            return qmodels.ScalarQuantization(
+                scalar=qmodels.ScalarQuantizationConfig(
+                    type=qmodels.ScalarType.INT8,
+                    quantile=self.quantile,
+                    always_ram=self.always_ram,
+                )
+            )
+        if self.quantization == "pq":
+            return qmodels.ProductQuantization(
+                product=qmodels.ProductQuantizationConfig(
+                    compression=self.pq_compression,
+                    always_ram=self.always_ram,
+                )
+            )
+        return None
+
+    def hnsw_config(self) -> Optional[qmodels.HnswConfigDiff]:
+        if self.hnsw_m is None and self.hnsw_ef_construct is None:
+            return None
+        return qmodels.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def search_params(self) -> Optional[qmodels.SearchParams]:
+        """检索时使用的参数（量化集合开启重排）。"""
+        if self.quantization is None and self.hnsw_ef is None:
+            return None
+        quantization = (
+            qmodels.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+            if self.quantization
+            else None
+        )
+        return qmodels.SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+
+# 预置配置档
+COLLECTION_PROFILES: Dict[str, CollectionProfile] = {
+    p.name: p
+    for p in (
+        CollectionProfile("default"),
+        CollectionProfile("on_disk", on_disk=True),
+        CollectionProfile("int8", quantization="int8"),
+        CollectionProfile("int8_on_disk", on_disk=True, quantization="int8"),
+        CollectionProfile("pq_on_disk", on_disk=True, quantization="pq", oversampling=4.0),
+        CollectionProfile("int8_compact", on_disk=True, quantization="int8", hnsw_m=8, hnsw_ef_construct=64),
+    )
+}
+
+# 未单独配置的集合使用的配置档
+QDRANT_DEFAULT_PROFILE = os.getenv("QDRANT_DEFAULT_PROFILE", "default")
+# 按集合指定配置档，格式："generated_docs=int8,web_pages=int8_on_disk"
+QDRANT_COLLECTION_PROFILES = dict(
+    item.split("=", 1)
+    for item in os.getenv("QDRANT_COLLECTION_PROFILES", "").replace(" ", "").split(",")
+    if "=" in item
 )
 
 
+def get_collection_profile(collection_name: str) -> CollectionProfile:
+    """返回集合对应的配置档（未知的配置档名回退到 default）。"""
+    name = QDRANT_COLLECTION_PROFILES.get(collection_name, QDRANT_DEFAULT_PROFILE)
+    return COLLECTION_PROFILES.get(name, COLLECTION_PROFILES["default"])
+
+
+def _create_collection_kwargs(collection_name: str, dim: int, distance: qmodels.Distance,
+                              profile: Optional[CollectionProfile]) -> Dict:
+    """按配置档生成 create_collection 的参数。"""
+    profile = profile or get_collection_profile(collection_name)
+    return {
+        "collection_name": collection_name,
+        "vectors_config": profile.vectors_config(dim, distance),
+        "quantization_config": profile.quantization_config(),
+        "hnsw_config": profile.hnsw_config(),
+    }
+
+
+# 需要建立 payload 索引的字段（所有集合通用，字段不存在时索引为空，几乎无开销）
+# 过滤 / 排序用到的字段都应在这里登记
+PAYLOAD_INDEXES: Dict[str, qmodels.PayloadSchemaType] = {
+    "doc_id": qmodels.PayloadSchemaType.KEYWORD,
+    "source": qmodels.PayloadSchemaType.KEYWORD,
+    "url": qmodels.PayloadSchemaType.KEYWORD,
+    "created_at": qmodels.PayloadSchemaType.DATETIME,
+    "chunk_id": qmodels.PayloadSchemaType.INTEGER,
+}
+
+# 已确认存在的集合及其向量参数：{collection_name: (size, distance)}
+# 只缓存「存在」这一事实，写路径命中缓存时不再发 get_collection 请求
+_known_collections: Dict[str, Tuple[int, qmodels.Distance]] = {}
+_known_collections_lock = threading.Lock()
+
+
+def _vector_params_of(info: qmodels.CollectionInfo) -> Tuple[int, qmodels.Distance]:
+    """从 CollectionInfo 中取出 (向量维度, 距离)，命名向量集合取第一个。"""
+    vectors = info.config.params.vectors
+    if isinstance(vectors, dict):
+        vectors = next(iter(vectors.values()))
+    return vectors.size, vectors.distance
+
+
+def _check_dimension(collection_name: str, known: Tuple[int, qmodels.Distance], dim: int) -> None:
+    """写入前校验维度，避免把不同模型的向量混进同一集合。"""
+    if known[0] != dim:
+        raise ValueError(
+            f"集合 `{collection_name}` 的向量维度为 {known[0]}，与待写入向量的维度 {dim} 不一致"
+        )
+
+
+def _missing_payload_indexes(info: Optional[qmodels.CollectionInfo]) -> Dict[str, qmodels.PayloadSchemaType]:
+    """返回集合中尚未建立的 payload 索引（info 为 None 表示新建集合）。"""
+    existing = set((info.payload_schema or {}).keys()) if info is not None else set()
+    return {k: v for k, v in PAYLOAD_INDEXES.items() if k not in existing}
+
+
+def _ensure_payload_indexes(client: QdrantClient, collection_name: str,
+                            info: Optional[qmodels.CollectionInfo] = None) -> None:
+    """为过滤字段建立 payload 索引（keyword / datetime / integer）。"""
+    for field_name, schema in _missing_payload_indexes(info).items():
+        try:
+            client.create_payload_index(collection_name, field_name=field_name, field_schema=schema)
+        except Exception as e:
+            print(f"⚠️ 集合 `{collection_name}` 创建 payload 索引 {field_name} 失败: {e}")
+
+
+async def _aensure_payload_indexes(client: AsyncQdrantClient, collection_name: str,
+                                   info: Optional[qmodels.CollectionInfo] = None) -> None:
+    """_ensure_payload_indexes 的异步版本。"""
+    for field_name, schema in _missing_payload_indexes(info).items():
+        try:
+            await client.create_payload_index(collection_name, field_name=field_name, field_schema=schema)
+        except Exception as e:
+            print(f"⚠️ 集合 `{collection_name}` 创建 payload 索引 {field_name} 失败: {e}")
+
+
+def forget_collection(collection_name: str) -> None:
+    """从元数据缓存中移除集合（集合被删除 / 写入报错时调用）。"""
+    with _known_collections_lock:
+        _known_collections.pop(collection_name, None)
+
+
+def ensure_collection(
+    collection_name: str,
+    dim: int,
+    distance: qmodels.Distance = qmodels.Distance.COSINE,
+    client: Optional[QdrantClient] = None,
+    profile: Optional[CollectionProfile] = None,
+) -> None:
+    """
+    确保集合存在且维度匹配（非破坏性）。
+
+    - 缓存命中：只做本地维度校验，不发任何请求；
+    - 集合已存在：读取一次向量参数并缓存，补齐缺失的 payload 索引；
+    - 集合确实不存在：用 create_collection 创建（绝不 recreate，避免瞬时错误清空数据），并建立 payload 索引。
+      新集合的量化 / on_disk / HNSW 参数取自 profile，未指定时按 get_collection_profile(collection_name)。
+
+    异常:
+        ValueError: 集合已存在但维度与 dim 不一致
+    """
+    known = _known_collections.get(collection_name)
+    if known is None:
+        client = client or _get_qdrant_client()
+        info: Optional[qmodels.CollectionInfo] = None
+        if client.collection_exists(collection_name):
+            info = client.get_collection(collection_name)
+            known = _vector_params_of(info)
+        else:
+            try:
+                client.create_collection(**_create_collection_kwargs(collection_name, dim, distance, profile))
+                known = (dim, distance)
+            except Exception:
+                # 并发创建时对方可能已建好，再确认一次；仍不存在则是真正的错误
+                if not client.collection_exists(collection_name):
+                    raise
+                info = client.get_collection(collection_name)
+                known = _vector_params_of(info)
+        _ensure_payload_indexes(client, collection_name, info)
+        with _known_collections_lock:
+            _known_collections[collection_name] = known
+    _check_dimension(collection_name, known, dim)
+
+
+async def aensure_collection(
+    collection_name: str,
+    dim: int,
+    distance: qmodels.Distance = qmodels.Distance.COSINE,
+    client: Optional[AsyncQdrantClient] = None,
+    profile: Optional[CollectionProfile] = None,
+) -> None:
+    """ensure_collection 的异步版本，与同步版本共享元数据缓存。"""
+    known = _known_collections.get(collection_name)
+    if known is None:
+        client = client or _get_async_qdrant_client()
+        info: Optional[qmodels.CollectionInfo] = None
+        if await client.collection_exists(collection_name):
+            info = await client.get_collection(collection_name)
+            known = _vector_params_of(info)
+        else:
+            try:
+                await client.create_collection(**_create_collection_kwargs(collection_name, dim, distance, profile))
+                known = (dim, distance)
+            except Exception:
+                if not await client.collection_exists(collection_name):
+                    raise
+                info = await client.get_collection(collection_name)
+                known = _vector_params_of(info)
+        await _aensure_payload_indexes(client, collection_name, info)
+        with _known_collections_lock:
+            _known_collections[collection_name] = known
+    _check_dimension(collection_name, known, dim)
+
+
+def _collection_exists(collection_name: str, client: QdrantClient) -> bool:
+    """读路径使用：已知存在的集合直接返回 True，否则询问服务端（不缓存「不存在」）。"""
+    return collection_name in _known_collections or client.collection_exists(collection_name)
+
+
+async def _acollection_exists(collection_name: str, client: AsyncQdrantClient) -> bool:
+    """_collection_exists 的异步版本。"""
+    return collection_name in _known_collections or await client.collection_exists(collection_name)
+
+
+def upsert_points(
+    collection_name: str,
+    points: List[qmodels.PointStruct],
+    client: Optional[QdrantClient] = None,
+) -> None:
+    """
+    确保集合存在后写入 points。
+    若缓存中的集合已被外部删除导致写入失败，会清掉缓存、重建集合并重试一次。
+    """
+    if not points:
+        return
+    client = client or _get_qdrant_client()
+    dim = len(points[0].vector)
+    ensure_collection(collection_name, dim, client=client)
+    try:
+        client.upsert(collection_name=collection_name, points=points)
+    except Exception:
+        forget_collection(collection_name)
+        if client.collection_exists(collection_name):
+            raise
+        ensure_collection(collection_name, dim, client=client)
+        client.upsert(collection_name=collection_name, points=points)
+
+
+async def aupsert_points(
+    collection_name: str,
+    points: List[qmodels.PointStruct],
+    client: Optional[AsyncQdrantClient] = None,
+) -> None:
+    """upsert_points 的异步版本。"""
+    if not points:
+        return
+    client = client or _get_async_qdrant_client()
+    dim = len(points[0].vector)
+    await aensure_collection(collection_name, dim, client=client)
+    try:
+        await client.upsert(collection_name=collection_name, points=points)
+    except Exception:
+        forget_collection(collection_name)
+        if await client.collection_exists(collection_name):
+            raise
+        await aensure_collection(collection_name, dim, client=client)
+        await client.upsert(collection_name=collection_name, points=points)
+
+
+# 分割符优先级（中文友好）
+_TEXT_SEPARATORS = ["\n\n", "\n", "。", "！", "？", "!", "?", " ", ""]
+# 流式切分时单次交给分割器的最大字符数（内存上限与之成正比）
+SPLIT_WINDOW_CHARS = int(os.getenv("SPLIT_WINDOW_CHARS", "65536"))
+
+
+@lru_cache(maxsize=32)
+def _get_text_splitter(chunk_size: int = 500, chunk_overlap: Optional[int] = None) -> RecursiveCharacterTextSplitter:
+    """
+    按 (chunk_size, chunk_overlap) 缓存的 LangChain 标准分割器。
+    chunk_overlap 为 None 时取 chunk_size 的 10%，最多 50。
+    """
+    if chunk_overlap is None:
+        chunk_overlap = min(50, chunk_size // 10)
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,          # 每个 chunk 的最大字符数
+        chunk_overlap=chunk_overlap,    # chunk 之间的重叠字符数（保持上下文连贯性）
+        length_function=len,            # 计算长度的函数
+        separators=_TEXT_SEPARATORS,
+    )
+
+
 def _split_text_into_chunks(text: str, max_len: int = 500) -> List[str]:
     """
     使用 LangChain 的 RecursiveCharacterTextSplitter 切分文本。
@@ -57,20 +467,49 @@ def _split_text_into_chunks(text: str, max_len: int = 500) -> List[str]:
     """
     if not text:
         return []
-    
-    # 如果指定了不同的 max_len，创建新的分割器
-    if max_len != 500:
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_len,
-            chunk_overlap=min(50, max_len // 10),  # 重叠为 chunk_size 的 10%，最多 50
-            length_function=len,
-            separators=["\n\n", "\n", "。", "！", "？", "!", "?", " ", ""],
-        )
-        chunks = splitter.split_text(text)
+    return _get_text_splitter(max_len).split_text(text)
+
+
+def _last_boundary(buf: str, limit: int) -> int:
+    """在 buf[:limit] 中找最靠后的自然分隔位置（段落 > 换行 > 句末 > 空格），找不到时硬切。"""
+    for sep in _TEXT_SEPARATORS[:-1]:
+        idx = buf.rfind(sep, 0, limit)
+        if idx > 0:
+            return idx + len(sep)
+    return limit
+
+
+def _iter_text_chunks(
+    source: Union[str, Iterable[str], IO[str]],
+    max_len: int = 500,
+    window: int = SPLIT_WINDOW_CHARS,
+) -> Iterator[str]:
+    """
+    流式切分：逐块读取输入，每攒够 window 个字符就在最近的自然分隔处切一刀交给分割器，
+    剩余部分留到下一轮。内存占用只与 window 有关，与文档总长度无关。
+
+    参数:
+        source: 整段文本、文本块迭代器，或文本文件对象（按 64KB 读取）
+        max_len: 每个 chunk 的最大长度（字符数）
+        window: 单次交给分割器的最大字符数（应远大于 max_len）
+    """
+    if isinstance(source, str):
+        blocks: Iterable[str] = (source[i:i + window] for i in range(0, len(source), window))
+    elif hasattr(source, "read"):
+        blocks = iter(lambda: source.read(65536), "")
     else:
-        chunks = _text_splitter.split_text(text)
-    
-    return chunks
+        blocks = source
+    splitter = _get_text_splitter(max_len)
+    window = max(window, 4 * max_len)
+    buf = ""
+    for block in blocks:
+        buf += block
+        while len(buf) >= window:
+            cut = _last_boundary(buf, window)
+            yield from splitter.split_text(buf[:cut])
+            buf = buf[cut:]
+    if buf:
+        yield from splitter.split_text(buf)
 
 
 def _get_embedding_model() -> Embeddings:
@@ -79,6 +518,7 @@ def _get_embedding_model() -> Embeddings:
     
     优先级：
     1. 如果设置了 EMBEDDING_MODEL 环境变量，使用指定的模型
+       （hf / openai / onnx / onnx-int8，onnx 系列见 base_tools.onnx_embedding）
     2. 如果可用，优先使用 HuggingFace（免费，本地运行，支持中文）
     3. 如果设置了 OPENAI_API_KEY，使用 OpenAI Embeddings
     4. 否则回退到简单的哈希 embedding（仅用于测试）
@@ -89,6 +529,23 @@ def _get_embedding_model() -> Embeddings:
     # 检查是否指定了 embedding 模型
     embedding_model = os.getenv("EMBEDDING_MODEL", "").lower()
     
+    # 方案0：同一个 sentence-transformers 模型导出为 ONNX 在 CPU 上推理（onnx-int8 为动态量化版本）
+    if embedding_model in ("onnx", "onnx-int8"):
+        model_name = os.getenv(
+            "HUGGINGFACE_EMBEDDING_MODEL",
+            "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+        )
+        if ONNX_AVAILABLE:
+            try:
+                quantized = embedding_model == "onnx-int8"
+                print(f"🟢 使用 ONNX Runtime Embedding 模型: {model_name}{'（int8）' if quantized else ''}")
+                return OnnxEmbeddings(model_name, quantized=quantized)
+            except Exception as e:
+                print(f"⚠️ ONNX Embedding 初始化失败: {e}，回退到 HuggingFace")
+        else:
+            print("⚠️ 未安装 onnxruntime / tokenizers，回退到 HuggingFace")
+        embedding_model = "huggingface"
+
     # 方案1：使用 HuggingFace（推荐，免费且支持中文）
     if HUGGINGFACE_AVAILABLE and (embedding_model in ("", "huggingface", "hf")):
         try:
@@ -101,6 +558,8 @@ def _get_embedding_model() -> Embeddings:
                 "HUGGINGFACE_EMBEDDING_MODEL",
                 "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
             )
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+
             print(f"🟢 使用 HuggingFace Embedding 模型: {model_name}")
             return HuggingFaceEmbeddings(
                 model_name=model_name,
@@ -114,6 +573,8 @@ def _get_embedding_model() -> Embeddings:
     if OPENAI_AVAILABLE and (embedding_model in ("openai", "gpt")):
         api_key = os.getenv("OPENAI_API_KEY")
         if api_key:
+            from langchain_openai import OpenAIEmbeddings
+
             print("🟢 使用 OpenAI Embedding 模型")
             return OpenAIEmbeddings(
                 model="text-embedding-3-small",  # 或 "text-embedding-3-large"
@@ -131,47 +592,117 @@ class _SimpleHashEmbeddings(Embeddings):
     """
     简单的哈希 embedding 实现（仅作为回退方案）。
     这不是真正的语义向量，仅用于测试和演示。
+
+    整批文本一次性向量化为 float32 矩阵：
+    - 使用 UTF-32 码点 + 乘法哈希分桶，结果与进程无关（不受 PYTHONHASHSEED 影响）；
+    - 用 bincount 统计词频、按行归一化，全程无 Python 级循环。
     """
-    
+
+    # Knuth 乘法哈希常数
+    _HASH_MULTIPLIER = np.uint64(2654435761)
+
     def __init__(self, dimension: int = 384):
         self.dimension = dimension
-    
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """
+        批量嵌入，直接返回形状为 (len(texts), dimension) 的 float32 矩阵。
+        调用方需要矩阵时优先使用此方法，避免 list of list 的转换开销。
+        """
+        n = len(texts)
+        if n == 0:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        encoded = [(text or "").encode("utf-32-le") for text in texts]
+        lengths = np.fromiter((len(b) // 4 for b in encoded), dtype=np.int64, count=n)
+        codes = np.frombuffer(b"".join(encoded), dtype="<u4").astype(np.uint64)
+        buckets = ((codes * self._HASH_MULTIPLIER) & np.uint64(0xFFFFFFFF)) % np.uint64(self.dimension)
+
+        rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+        flat = rows * self.dimension + buckets.astype(np.int64)
+        matrix = np.bincount(flat, minlength=n * self.dimension).astype(np.float32)
+        matrix = matrix.reshape(n, self.dimension)
+
+        # 向量化归一化，空文本保持全零向量
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """嵌入文档列表。"""
-        return [self._embed_text(text) for text in texts]
-    
+        return self.embed_array(texts).tolist()
+
     def embed_query(self, text: str) -> List[float]:
         """嵌入查询文本。"""
-        return self._embed_text(text)
-    
-    def _embed_text(self, text: str) -> List[float]:
-        """内部方法：将单个文本转换为向量。"""
-        import math
-        vec = [0.0] * self.dimension
-        if not text:
-            return vec
-        
-        for ch in text:
-            idx = hash(ch) % self.dimension
-            vec[idx] += 1.0
-        
-        # 简单归一化
-        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
-        return [v / norm for v in vec]
+        return self.embed_array([text])[0].tolist()
 
 
 # 创建全局 embedding 实例（延迟初始化）
 _default_embedding: Optional[Embeddings] = None
+# 全局微批 worker（仅真实模型启用）
+_default_batcher: Optional[EmbeddingBatcher] = None
+_default_embedding_lock = threading.Lock()
+
+
+def _get_embedding_model_name(embedding: Embeddings) -> str:
+    """
+    返回 embedding 模型的标识，用作缓存 key 的一部分。
+    不同模型（或不同维度）的向量不能混用，因此名称里带上实现类名。
+    """
+    if isinstance(embedding, _SimpleHashEmbeddings):
+        # v2：稳定哈希实现，与旧版（依赖进程哈希种子）的向量不兼容
+        return f"simple-hash-v2:{embedding.dimension}"
+    name = getattr(embedding, "model_name", None) or getattr(embedding, "model", None) or ""
+    if getattr(embedding, "quantized", False):
+        # 量化模型的向量与原模型有细微差异，单独缓存
+        name = f"{name}#int8"
+    return f"{type(embedding).__name__}:{name}"
 
 
 def _get_default_embedding() -> Embeddings:
-    """获取默认的 embedding 实例（延迟初始化）。"""
-    global _default_embedding
+    """
+    获取默认的 embedding 实例（延迟初始化）。
+
+    包装顺序：缓存 → 跨请求微批 worker → 底层模型。
+    - EMBEDDING_CACHE_ENABLED（默认开启）：只有缓存未命中的文本才往下走；
+    - EMBEDDING_BATCHING（默认开启）：所有调用方共享一个 worker 组批计算。
+    哈希回退模型本身比查缓存还快，不做任何包装。
+    """
+    global _default_embedding, _default_batcher
     if _default_embedding is None:
-        _default_embedding = _get_embedding_model()
+        with _default_embedding_lock:
+            if _default_embedding is None:
+                model = _get_embedding_model()
+                if not isinstance(model, _SimpleHashEmbeddings):
+                    model_name = _get_embedding_model_name(model)
+                    if EMBEDDING_BATCHING_ENABLED:
+                        _default_batcher = EmbeddingBatcher(model)
+                        model = _BatchingEmbeddings(_default_batcher)
+                    if EMBEDDING_CACHE_ENABLED:
+                        model = _CachedEmbeddings(model, model_name, get_embedding_cache())
+                _default_embedding = model
     return _default_embedding
 
 
+def embedding_batcher_stats() -> Dict:
+    """返回微批 worker 的统计信息（未启用时为空）。"""
+    return _default_batcher.stats() if _default_batcher is not None else {}
+
+
+def close_embedding_batcher(timeout: Optional[float] = 5.0) -> None:
+    """
+    停止全局微批 worker（进程退出时调用，应在索引队列排空之后）。
+    同时清掉默认 embedding 实例，之后再用到时会重新创建，而不是向已关闭的 worker 提交。
+    """
+    global _default_embedding, _default_batcher
+    with _default_embedding_lock:
+        batcher, _default_batcher = _default_batcher, None
+        if batcher is not None:
+            _default_embedding = None
+    if batcher is not None:
+        batcher.close(timeout)
+
+
 def _simple_hash_embedding(text: str, dim: int = 384) -> List[float]:
     """
     文本向量化函数（保持向后兼容）。
@@ -204,87 +735,322 @@ def _embed_documents(texts: List[str]) -> List[List[float]]:
     embedding = _get_default_embedding()
     return embedding.embed_documents(texts)
 
-def index_generated_doc_to_qdrant(
-    text: str, 
-    user_intent: str,
-    collection_name: str = "generated_docs"
-    ) -> str:
+
+def _embed_documents_array(texts: List[str]) -> np.ndarray:
     """
-    将生成的文档索引到 Qdrant 向量数据库。
+    批量向量化文档列表，返回 float32 矩阵 (len(texts), dim)。
+    默认模型为哈希回退实现时直接走矩阵接口，不经过 list 转换。
     """
-    if not text or not text.strip or not user_intent:
-        return "用户意图或文档内容为空，无法进行索引。"
+    embedding = _get_default_embedding()
+    if isinstance(embedding, _SimpleHashEmbeddings):
+        return embedding.embed_array(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.asarray(embedding.embed_documents(texts), dtype=np.float32)
 
-    print(f">>> [Index Generated Doc] 开始索引文档{text[:100]}...")
-    print(f">>> [Index Generated Doc] 用户意图: {user_intent}")
-    print(f">>> [Index Generated Doc] 文档内容: {text[:100]}...")
-    print(f">>> [Index Generated Doc] 集合名称: {collection_name}")
-     # 1. 切片
-    chunks = _split_text_into_chunks(text, max_len=500)
-    if not chunks:
-        print(f">>> [Index Generated Doc] 文档切片结果为空，跳过向量入库。")
-        return "文档切片结果为空，跳过向量入库。"
-    vectors = _embed_documents(chunks)
-    doc_id = str(uuid4())
-    now = datetime.utcnow().isoformat() + "Z"
-    payloads: List[Dict] = []
+# 生成文档 ID 的命名空间：doc_id = uuid5(命名空间, 文档 key)，跨进程 / 重启保持一致
+_DOC_ID_NAMESPACE = uuid5(NAMESPACE_URL, "agent-home/generated_docs")
+
+
+def _doc_id_for(doc_key: str) -> str:
+    """由文档 key（标题等）生成稳定的 doc_id。"""
+    return str(uuid5(_DOC_ID_NAMESPACE, _normalize_text(doc_key)))
+
+
+def generated_doc_key(user_intent: str, title: Optional[str] = None) -> str:
+    """
+    生成文档的 doc_key：标题 + 用户意图的摘要。
+    增量重建索引会删除新版本中不存在的片段，key 必须区分不同文档：
+    只用标题时，同名文档（以及所有无标题文档）会互相覆盖。
+    同一意图、同一标题的重复生成仍视为同一文档的新版本。
+    """
+    intent = str(uuid5(_DOC_ID_NAMESPACE, _normalize_text(user_intent or "")))[:8]
+    return f"{(title or '').strip() or '未命名文档'}#{intent}"
+
+
+def _plan_chunks(doc_id: str, chunks: List[str]) -> List[Tuple[str, str, int, str]]:
+    """
+    为每个片段计算内容寻址的 point ID。
+
+    point_id = uuid5(doc_id, 片段哈希:出现序号)，同一文档中重复的片段用出现序号区分。
+
+    返回:
+        [(point_id, chunk_hash, chunk_id, chunk), ...]
+    """
+    namespace = UUID(doc_id)
+    seen: Dict[str, int] = {}
+    planned = []
     for idx, chunk in enumerate(chunks):
-        payloads.append(
-            {
+        h = _chunk_hash(chunk)
+        occurrence = seen.get(h, 0)
+        seen[h] = occurrence + 1
+        planned.append((str(uuid5(namespace, f"{h}:{occurrence}")), h, idx, chunk))
+    return planned
+
+
+@dataclass
+class _ReindexPlan:
+    """一次增量重建索引要做的变更。"""
+    doc_id: str
+    collection_name: str
+    doc_key: str = ""
+    user_intent: str = ""
+    chunk_count: int = 0
+    # 需要写入的新片段（含向量）
+    points: List[qmodels.PointStruct] = field(default_factory=list)
+    # 内容未变、仅位置变化的片段：point_id -> 新 chunk_id
+    moved: Dict[str, int] = field(default_factory=dict)
+    # 新版本中已不存在的片段
+    stale_ids: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"文档 {self.doc_id}：新增/变更 {len(self.points)} 个片段，"
+            f"未变 {self.unchanged} 个，位置调整 {len(self.moved)} 个，删除 {len(self.stale_ids)} 个（集合 `{self.collection_name}`）。"
+        )
+
+
+def _diff_chunks(
+    planned: List[Tuple[str, str, int, str]],
+    existing: Dict[str, int],
+) -> Tuple[List[Tuple[str, str, int, str]], Dict[str, int], List[str]]:
+    """
+    对比新旧片段。
+
+    参数:
+        planned: _plan_chunks 的结果
+        existing: 已入库的 {point_id: chunk_id}
+
+    返回:
+        (需要向量化写入的片段, 位置变化的片段, 需要删除的 point_id)
+    """
+    planned_ids = {pid for pid, _, _, _ in planned}
+    todo = [item for item in planned if item[0] not in existing]
+    moved = {pid: idx for pid, _, idx, _ in planned if pid in existing and existing[pid] != idx}
+    stale = [pid for pid in existing if pid not in planned_ids]
+    return todo, moved, stale
+
+
+def _make_chunk_points(
+    doc_id: str,
+    todo: List[Tuple[str, str, int, str]],
+    vectors: List[List[float]],
+) -> List[qmodels.PointStruct]:
+    """
+    为需要写入的片段构造 PointStruct。
+    payload 只保留检索 / 过滤需要的字段，文档级信息（标题、用户意图等）存 Mongo，未配置时存 doc_meta 集合（见 doc_store）。
+    """
+    now = datetime.utcnow().isoformat() + "Z"
+    return [
+        qmodels.PointStruct(
+            id=pid,
+            vector=vec,
+            payload={
                 "doc_id": doc_id,
                 "chunk_id": idx,
-                "user_intent": user_intent,
+                "chunk_hash": h,
                 "source": "generated_doc",
                 "created_at": now,
                 "text": chunk,
-            }
+            },
         )
-     # 4. 写入 Qdrant（可以复用现有 save_vectors_to_qdrant，或直接用 client）
-    client = _get_qdrant_client()
-    dim = len(vectors[0])
+        for (pid, h, idx, chunk), vec in zip(todo, vectors)
+    ]
+
+
+def _fetch_doc_chunk_index(client: QdrantClient, collection_name: str, doc_id: str) -> Dict[str, int]:
+    """分页读取某文档已入库片段的 {point_id: chunk_id}（不取向量和正文）。"""
+    from base_tools.retrieval import iter_scroll
+
+    return {
+        str(r.id): (r.payload or {}).get("chunk_id", -1)
+        for r in iter_scroll(collection_name, _doc_id_filter(doc_id), with_payload=["chunk_id"], client=client)
+    }
+
+
+async def _afetch_doc_chunk_index(client: AsyncQdrantClient, collection_name: str, doc_id: str) -> Dict[str, int]:
+    """_fetch_doc_chunk_index 的异步版本。"""
+    from base_tools.retrieval import aiter_scroll
+
+    return {
+        str(r.id): (r.payload or {}).get("chunk_id", -1)
+        async for r in aiter_scroll(collection_name, _doc_id_filter(doc_id), with_payload=["chunk_id"], client=client)
+    }
+
+
+def _plan_generated_doc_reindex(
+    text: str,
+    user_intent: str,
+    doc_key: str,
+    collection_name: str = "generated_docs",
+    client: Optional[QdrantClient] = None,
+    chunks: Optional[List[str]] = None,
+) -> Optional[_ReindexPlan]:
+    """
+    计算增量重建索引计划：只对新增 / 变化的片段做向量化。
+    chunks 为调用方已切好的片段（为空则在此切分）；切片结果为空时返回 None。
+    """
+    if chunks is None:
+        chunks = _split_text_into_chunks(text, max_len=500)
+    if not chunks:
+        return None
+    client = client or _get_qdrant_client()
+    doc_id = _doc_id_for(doc_key)
+    planned = _plan_chunks(doc_id, chunks)
+    existing = _fetch_doc_chunk_index(client, collection_name, doc_id)
+    todo, moved, stale = _diff_chunks(planned, existing)
+    vectors = _embed_documents([chunk for _, _, _, chunk in todo])
+    return _ReindexPlan(
+        doc_id=doc_id,
+        collection_name=collection_name,
+        doc_key=doc_key,
+        user_intent=user_intent,
+        chunk_count=len(planned),
+        points=_make_chunk_points(doc_id, todo, vectors),
+        moved=moved,
+        stale_ids=stale,
+        unchanged=len(planned) - len(todo),
+    )
 
-    try:
-        client.get_collection(collection_name)
-    except Exception:
-        client.recreate_collection(
-            collection_name,
-            vectors_config=qmodels.VectorParams(size=dim, distance=qmodels.Distance.COSINE),
-        )
 
-    ids = [str(uuid4()) for _ in vectors]
-    points = [
-        qmodels.PointStruct(id=pid, vector=vec, payload=pl)
-        for pid, vec, pl in zip(ids, vectors, payloads)
+async def _aplan_generated_doc_reindex(
+    text: str,
+    user_intent: str,
+    doc_key: str,
+    collection_name: str = "generated_docs",
+    client: Optional[AsyncQdrantClient] = None,
+    chunks: Optional[List[str]] = None,
+) -> Optional[_ReindexPlan]:
+    """_plan_generated_doc_reindex 的异步版本。"""
+    if chunks is None:
+        chunks = _split_text_into_chunks(text, max_len=500)
+    if not chunks:
+        return None
+    client = client or _get_async_qdrant_client()
+    doc_id = _doc_id_for(doc_key)
+    planned = _plan_chunks(doc_id, chunks)
+    existing = await _afetch_doc_chunk_index(client, collection_name, doc_id)
+    todo, moved, stale = _diff_chunks(planned, existing)
+    texts = [chunk for _, _, _, chunk in todo]
+    vectors = await _get_default_embedding().aembed_documents(texts) if texts else []
+    return _ReindexPlan(
+        doc_id=doc_id,
+        collection_name=collection_name,
+        doc_key=doc_key,
+        user_intent=user_intent,
+        chunk_count=len(planned),
+        points=_make_chunk_points(doc_id, todo, vectors),
+        moved=moved,
+        stale_ids=stale,
+        unchanged=len(planned) - len(todo),
+    )
+
+
+def _reindex_update_operations(plan: _ReindexPlan) -> List:
+    """把位置调整与过期删除合并成一次 batch_update_points 的操作列表。"""
+    operations: List = [
+        qmodels.SetPayloadOperation(
+            set_payload=qmodels.SetPayload(payload={"chunk_id": idx}, points=[pid])
+        )
+        for pid, idx in plan.moved.items()
     ]
-    client.upsert(collection_name=collection_name, points=points)
-    return f"已将文档 {doc_id} 的 {len(points)} 个片段写入集合 `{collection_name}`。"
+    if plan.stale_ids:
+        operations.append(
+            qmodels.DeleteOperation(delete=qmodels.PointIdsList(points=plan.stale_ids))
+        )
+    return operations
 
 
-def query_by_doc_id(
-    doc_id: str,
+def _doc_metadata(plan: _ReindexPlan) -> Dict:
+    """文档级元数据（每篇文档一条，存 Mongo / doc_meta 集合，见 doc_store）。"""
+    return {
+        "doc_key": plan.doc_key,
+        "user_intent": plan.user_intent,
+        "source": "generated_doc",
+        "collection": plan.collection_name,
+        "chunk_count": plan.chunk_count,
+    }
+
+
+def _finalize_reindex(plan: _ReindexPlan, client: Optional[QdrantClient] = None) -> None:
+    """新片段写入后：一次请求完成位置调整与过期片段删除，再更新文档元数据。"""
+    operations = _reindex_update_operations(plan)
+    if operations:
+        (client or _get_qdrant_client()).batch_update_points(plan.collection_name, operations)
+    if not upsert_doc_metadata(plan.doc_id, **_doc_metadata(plan)):
+        print(f"⚠️ [Index Generated Doc] 文档 {plan.doc_id} 的元数据（doc_key / user_intent）未保存")
+
+
+async def _afinalize_reindex(plan: _ReindexPlan, client: Optional[AsyncQdrantClient] = None) -> None:
+    """_finalize_reindex 的异步版本（Mongo 写入放到线程中执行）。"""
+    operations = _reindex_update_operations(plan)
+    if operations:
+        await (client or _get_async_qdrant_client()).batch_update_points(plan.collection_name, operations)
+    if not await asyncio.to_thread(upsert_doc_metadata, plan.doc_id, **_doc_metadata(plan)):
+        print(f"⚠️ [Index Generated Doc] 文档 {plan.doc_id} 的元数据（doc_key / user_intent）未保存")
+
+
+def index_generated_doc_to_qdrant(
+    text: str, 
+    user_intent: str,
     collection_name: str = "generated_docs",
-    limit: int = 100,
-    with_vectors: bool = False,
-) -> List[Dict]:
+    doc_key: Optional[str] = None,
+    ) -> str:
     """
-    按 doc_id 从 Qdrant 集合中查询该文档的所有片段（按 chunk_id 排序）。
+    将生成的文档（增量）索引到 Qdrant 向量数据库。
+
+    point ID 由文档 key 与片段内容决定：同一文档重复索引或改写后重新索引时，
+    只有新增 / 变化的片段会被向量化和写入，已不存在的片段一次性批量删除。
 
     参数:
-        doc_id: 文档 ID（写入时 payload 中的 doc_id）
+        text: 文档正文
+        user_intent: 用户意图
         collection_name: 集合名称，默认 "generated_docs"
-        limit: 最多返回条数，默认 100
-        with_vectors: 是否返回向量，默认 False
-
-    返回:
-        匹配的 point 列表，每项为 {"id": ..., "payload": {...}, "vector": ...(可选)}
+        doc_key: 文档 key（如标题），决定 doc_id；为空时使用 user_intent
     """
+    if not text or not text.strip() or not user_intent:
+        return "用户意图或文档内容为空，无法进行索引。"
+
+    doc_key = doc_key or user_intent
+    print(f">>> [Index Generated Doc] 开始索引文档{text[:100]}...")
+    print(f">>> [Index Generated Doc] 文档 key: {doc_key[:80]}")
+    print(f">>> [Index Generated Doc] 集合名称: {collection_name}")
     client = _get_qdrant_client()
-    try:
-        client.get_collection(collection_name)
-    except Exception:
-        return []
+    plan = _plan_generated_doc_reindex(text, user_intent, doc_key, collection_name, client)
+    if plan is None:
+        print(f">>> [Index Generated Doc] 文档切片结果为空，跳过向量入库。")
+        return "文档切片结果为空，跳过向量入库。"
+    # 先写入新片段，再调整位置 / 删除旧片段，避免中间状态缺片段
+    upsert_points(collection_name, plan.points, client)
+    _finalize_reindex(plan, client)
+    return plan.summary()
+
+
+async def aindex_generated_doc_to_qdrant(
+    text: str,
+    user_intent: str,
+    collection_name: str = "generated_docs",
+    doc_key: Optional[str] = None,
+) -> str:
+    """index_generated_doc_to_qdrant 的异步版本（异步 embedding + AsyncQdrantClient）。"""
+    if not text or not text.strip() or not user_intent:
+        return "用户意图或文档内容为空，无法进行索引。"
 
-    query_filter = qmodels.Filter(
+    doc_key = doc_key or user_intent
+    print(f">>> [Index Generated Doc] (async) 开始索引文档{text[:100]}...")
+    client = _get_async_qdrant_client()
+    plan = await _aplan_generated_doc_reindex(text, user_intent, doc_key, collection_name, client)
+    if plan is None:
+        return "文档切片结果为空，跳过向量入库。"
+    await aupsert_points(collection_name, plan.points, client)
+    await _afinalize_reindex(plan, client)
+    return plan.summary()
+
+
+def _doc_id_filter(doc_id: str) -> qmodels.Filter:
+    """按 doc_id 精确匹配的过滤条件。"""
+    return qmodels.Filter(
         must=[
             qmodels.FieldCondition(
                 key="doc_id",
@@ -292,15 +1058,11 @@ def query_by_doc_id(
             )
         ]
     )
-    results, _ = client.scroll(
-        collection_name=collection_name,
-        scroll_filter=query_filter,
-        limit=limit,
-        with_vectors=with_vectors,
-        with_payload=True,
-    )
-    # 按 chunk_id 排序，便于还原文档顺序
-    results.sort(key=lambda p: p.payload.get("chunk_id", 0))
+
+
+def _format_doc_points(results: List, with_vectors: bool) -> List[Dict]:
+    """按 chunk_id 排序（还原文档顺序）并转换为 dict。"""
+    results = sorted(results, key=lambda p: (p.payload or {}).get("chunk_id", 0))
     return [
         {
             "id": p.id,
@@ -308,4 +1070,46 @@ def query_by_doc_id(
             **({"vector": p.vector} if with_vectors and p.vector else {}),
         }
         for p in results
-    ]
\ No newline at end of file
+    ]
+
+
+def query_by_doc_id(
+    doc_id: str,
+    collection_name: str = "generated_docs",
+    limit: Optional[int] = None,
+    with_vectors: bool = False,
+) -> List[Dict]:
+    """
+    按 doc_id 从 Qdrant 集合中查询该文档的所有片段（按 chunk_id 排序）。
+    内部按页滚动读取，长文档不会被截断。
+
+    参数:
+        doc_id: 文档 ID（写入时 payload 中的 doc_id）
+        collection_name: 集合名称，默认 "generated_docs"
+        limit: 最多返回条数，默认 None 表示全部
+        with_vectors: 是否返回向量，默认 False
+
+    返回:
+        匹配的 point 列表，每项为 {"id": ..., "payload": {...}, "vector": ...(可选)}
+    """
+    from base_tools.retrieval import iter_scroll
+
+    records = iter_scroll(collection_name, _doc_id_filter(doc_id), with_vectors=with_vectors)
+    return _format_doc_points(list(islice(records, limit)), with_vectors)
+
+
+async def aquery_by_doc_id(
+    doc_id: str,
+    collection_name: str = "generated_docs",
+    limit: Optional[int] = None,
+    with_vectors: bool = False,
+) -> List[Dict]:
+    """query_by_doc_id 的异步版本。"""
+    from base_tools.retrieval import aiter_scroll
+
+    results = []
+    async for record in aiter_scroll(collection_name, _doc_id_filter(doc_id), with_vectors=with_vectors):
+        if limit is not None and len(results) >= limit:
+            break
+        results.append(record)
+    return _format_doc_points(results, with_vectors)
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+批量网页抓取 + 索引（index_web_page_to_qdrant 的批量版本）。
+
+流水线分两段并行执行：
+- 抓取：asyncio + 共享的 httpx 连接池（http_client），全局并发 CRAWL_CONCURRENCY，单个站点并发 CRAWL_PER_HOST；
+  流式读取，非文本类型不读响应体（计为跳过），单页最多读取 CRAWL_MAX_BYTES，正文由 html_text 增量提取；
+- 索引：CRAWL_INDEX_WORKERS 个 worker 在线程中执行 切分 → 向量化 → 写入（ingest_stream），
+  多个 worker 的向量化请求由共享的 embedding 微批 worker 合批。
+两段之间是有界队列，抓取快于索引时自动背压。
+
+进度逐条追加到 CRAWL_PROGRESS_PATH（JSONL），重启后跳过已完成的 URL；
+进度文件之外，集合中已有该 url 的片段时同样跳过（force=True 时删除旧片段后重建）。
+
+命令行：
+    python -m base_tools.web_crawler urls.txt --collection web_pages
+    python -m base_tools.web_crawler --sitemap https://example.com/sitemap.xml
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from uuid import NAMESPACE_URL, uuid5
+from qdrant_client import models as qmodels
+from base_tools.html_text import MainTextExtractor
+from base_tools.http_client import (
+    HTTP_MAX_BYTES,
+    aclose_http_clients,
+    ahttp_get,
+    ahttp_stream,
+    aiter_bounded,
+    is_text_content,
+)
+from base_tools.ingest import ingest_stream
+from base_tools.retrieval import build_filter, iter_scroll
+from base_tools.vertordb import _collection_exists, _get_qdrant_client
+
+# 抓取全局并发 / 单站点并发
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "16"))
+CRAWL_PER_HOST = int(os.getenv("CRAWL_PER_HOST", "2"))
+# 索引 worker 数
+CRAWL_INDEX_WORKERS = int(os.getenv("CRAWL_INDEX_WORKERS", "4"))
+# 抓取结果队列容量（背压）
+CRAWL_QUEUE_SIZE = int(os.getenv("CRAWL_QUEUE_SIZE", "64"))
+# 单次请求超时（秒）与最大尝试次数
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "15"))
+CRAWL_MAX_ATTEMPTS = int(os.getenv("CRAWL_MAX_ATTEMPTS", "3"))
+# 单个页面最多读取的字节数
+CRAWL_MAX_BYTES = int(os.getenv("CRAWL_MAX_BYTES", str(HTTP_MAX_BYTES)))
+# 进度文件
+CRAWL_PROGRESS_PATH = os.getenv(
+    "CRAWL_PROGRESS_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "agent-home", "crawl_progress.jsonl"),
+)
+
+_SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+_STOP = object()
+
+
+@dataclass
+class CrawlStats:
+    """一次批量索引的统计。"""
+    total: int = 0
+    skipped: int = 0
+    indexed: int = 0
+    failed: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> Dict:
+        data = asdict(self)
+        data["seconds"] = round(self.seconds, 2)
+        data["pages_per_second"] = round(self.indexed / self.seconds, 2) if self.seconds else 0.0
+        return data
+
+
+class CrawlProgress:
+    """
+    JSONL 进度文件：每处理完一个 URL 追加一行 {"collection", "url", "status", ...}，
+    同一 (集合, URL) 以最后一行为准。
+
+    参数:
+        path: 文件路径，None 或空字符串表示不记录进度
+    """
+
+    def __init__(self, path: Optional[str] = CRAWL_PROGRESS_PATH):
+        self.path = path or None
+        self._lock = threading.Lock()
+        self.status: Dict[Tuple[str, str], str] = {}
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 崩溃时写了一半的行
+                    self.status[(record.get("collection", ""), record["url"])] = record.get("status", "")
+
+    def is_done(self, collection_name: str, url: str) -> bool:
+        return self.status.get((collection_name, url)) == "done"
+
+    def mark(self, collection_name: str, url: str, status: str, **fields) -> None:
+        with self._lock:
+            self.status[(collection_name, url)] = status
+            if not self.path:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            record = {"collection": collection_name, "url": url, "status": status, "at": time.time(), **fields}
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _point_id(url: str, chunk_id: int) -> str:
+    """网页片段 ID = uuid5(url#chunk_id)，重复抓取同一页面会覆盖而不是追加。"""
+    return str(uuid5(NAMESPACE_URL, f"{url}#{chunk_id}"))
+
+
+def _url_indexed(collection_name: str, url: str) -> bool:
+    """集合中是否已有该 url 的片段（查询失败时视为未索引）。"""
+    try:
+        records = iter_scroll(collection_name, build_filter(url=url), page_size=1, with_payload=False)
+        return next(records, None) is not None
+    except Exception as e:
+        print(f"⚠️ [Crawler] 查询 {url} 是否已索引失败: {e}")
+        return False
+
+
+def _delete_url_points(collection_name: str, url: str) -> None:
+    """删除某 url 的全部旧片段（force 重建时使用）。"""
+    client = _get_qdrant_client()
+    if _collection_exists(collection_name, client):
+        client.delete(collection_name, points_selector=qmodels.FilterSelector(filter=build_filter(url=url)))
+
+
+def _index_page(url: str, text: str, collection_name: str, force: bool) -> int:
+    """切分 → 向量化 → 写入一个页面，返回片段数（在线程中执行）。"""
+    if force:
+        _delete_url_points(collection_name, url)
+    stats = ingest_stream(
+        text,
+        collection_name,
+        payload={"url": url, "source": "web_page"},
+        point_id=lambda idx, _chunk: _point_id(url, idx),
+    )
+    return stats.chunks
+
+
+async def _fetch(url: str) -> Optional[str]:
+    """
+    流式抓取一个 URL 并返回正文（最多读取 CRAWL_MAX_BYTES）；非文本类型不读响应体，返回 None。
+
+    重试（连接错误 / 429 / 5xx）由 http_client 负责；其余非 2xx 状态直接抛出 httpx.HTTPStatusError。
+    """
+    async with ahttp_stream(url, retries=max(0, CRAWL_MAX_ATTEMPTS - 1), timeout=CRAWL_TIMEOUT) as response:
+        response.raise_for_status()
+        if not is_text_content(response):
+            return None
+        if response.headers.get("content-type", "").startswith("text/plain"):
+            body = b"".join([chunk async for chunk in aiter_bounded(response, CRAWL_MAX_BYTES)])
+            return body.decode(response.charset_encoding or "utf-8", errors="replace")
+        extractor = MainTextExtractor(encoding=response.charset_encoding)
+        async for chunk in aiter_bounded(response, CRAWL_MAX_BYTES):
+            extractor.feed(chunk)
+    return extractor.close()
+
+
+async def load_sitemap(url: str) -> List[str]:
+    """解析 sitemap.xml（支持 sitemapindex 递归），返回页面 URL 列表。"""
+    response = await ahttp_get(url, retries=max(0, CRAWL_MAX_ATTEMPTS - 1), timeout=CRAWL_TIMEOUT)
+    response.raise_for_status()
+    root = ET.fromstring(response.content)
+    locs = [loc.text.strip() for loc in root.iter(f"{_SITEMAP_NS}loc") if loc.text]
+    if root.tag == f"{_SITEMAP_NS}sitemapindex":
+        nested = await asyncio.gather(*(load_sitemap(loc) for loc in locs))
+        return [u for urls in nested for u in urls]
+    return locs
+
+
+async def abulk_index(
+    urls: Iterable[str] = (),
+    collection_name: str = "web_pages",
+    sitemap: Optional[str] = None,
+    force: bool = False,
+    progress_path: Optional[str] = CRAWL_PROGRESS_PATH,
+    concurrency: int = CRAWL_CONCURRENCY,
+    per_host: int = CRAWL_PER_HOST,
+    index_workers: int = CRAWL_INDEX_WORKERS,
+) -> CrawlStats:
+    """
+    批量抓取并索引网页。
+
+    参数:
+        urls: URL 列表（自动去重）
+        collection_name: 目标集合
+        sitemap: 可选的 sitemap.xml 地址，其中的 URL 追加到 urls 之后
+        force: 忽略进度文件与已有片段，重新抓取并重建
+        progress_path: 进度文件，None 表示不记录
+        concurrency / per_host / index_workers: 抓取全局并发、单站点并发、索引 worker 数
+
+    返回:
+        CrawlStats
+    """
+    start = time.perf_counter()
+    stats = CrawlStats()
+    progress = CrawlProgress(progress_path)
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    pages: "asyncio.Queue[object]" = asyncio.Queue(maxsize=CRAWL_QUEUE_SIZE)
+    url_queue: "asyncio.Queue[str]" = asyncio.Queue()
+
+    todo = list(urls)
+    if sitemap:
+        todo += await load_sitemap(sitemap)
+    seen: Set[str] = set()
+    for url in todo:
+        url = url.strip()
+        if url and url not in seen:
+            seen.add(url)
+            url_queue.put_nowait(url)
+    stats.total = len(seen)
+
+    async def fetch_worker() -> None:
+        while True:
+            try:
+                url = url_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if not force and (
+                progress.is_done(collection_name, url) or await asyncio.to_thread(_url_indexed, collection_name, url)
+            ):
+                stats.skipped += 1
+                continue
+            host = urlparse(url).netloc
+            limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+            try:
+                async with limit:
+                    text = await _fetch(url)
+            except Exception as e:
+                print(f"    X [Crawler] 抓取失败 {url}: {e}")
+                stats.failed += 1
+                progress.mark(collection_name, url, "failed", error=str(e))
+                continue
+            if text is None:
+                print(f"    X [Crawler] 跳过非文本内容 {url}")
+                stats.skipped += 1
+                progress.mark(collection_name, url, "skipped", reason="not_text")
+                continue
+            await pages.put((url, text))
+
+    async def index_worker() -> None:
+        while True:
+            item = await pages.get()
+            if item is _STOP:
+                return
+            url, text = item
+            try:
+                chunks = await asyncio.to_thread(_index_page, url, text, collection_name, force)
+            except Exception as e:
+                print(f"    X [Crawler] 索引失败 {url}: {e}")
+                stats.failed += 1
+                progress.mark(collection_name, url, "failed", error=str(e))
+                continue
+            stats.indexed += 1
+            stats.chunks += chunks
+            progress.mark(collection_name, url, "done", chunks=chunks)
+
+    indexers = [asyncio.create_task(index_worker()) for _ in range(max(1, index_workers))]
+    await asyncio.gather(*(fetch_worker() for _ in range(max(1, concurrency))))
+    for _ in indexers:
+        await pages.put(_STOP)
+    await asyncio.gather(*indexers)
+
+    stats.seconds = time.perf_counter() - start
+    print(f">>> [Crawler] 完成: {stats.summary()}")
+    return stats
+
+
+def bulk_index(urls: Iterable[str] = (), collection_name: str = "web_pages", **kwargs) -> CrawlStats:
+    """abulk_index 的同步入口（不能在运行中的事件循环里调用）；结束时关闭本次事件循环上的连接池。"""
+
+    async def _run() -> CrawlStats:
+        try:
+            return await abulk_index(urls, collection_name, **kwargs)
+        finally:
+            await aclose_http_clients()
+
+    return asyncio.run(_run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="批量抓取网页并写入 Qdrant")
+    parser.add_argument("url_file", nargs="?", help="每行一个 URL 的文本文件")
+    parser.add_argument("--sitemap", help="sitemap.xml 地址")
+    parser.add_argument("--collection", default="web_pages")
+    parser.add_argument("--force", action="store_true", help="忽略进度，全部重建")
+    parser.add_argument("--progress", default=CRAWL_PROGRESS_PATH, help="进度文件路径")
+    parser.add_argument("--concurrency", type=int, default=CRAWL_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=CRAWL_PER_HOST)
+    parser.add_argument("--index-workers", type=int, default=CRAWL_INDEX_WORKERS)
+    args = parser.parse_args()
+    if not args.url_file and not args.sitemap:
+        parser.error("需要提供 url_file 或 --sitemap")
+
+    urls: List[str] = []
+    if args.url_file:
+        with open(args.url_file, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    bulk_index(
+        urls,
+        args.collection,
+        sitemap=args.sitemap,
+        force=args.force,
+        progress_path=args.progress,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        index_workers=args.index_workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,7 @@
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI  # pyright: ignore[reportMissingImports]
-from agent_tools.tools import ALL_TOOLS  # 导入刚才定义的工具
-from agent.agent_builder import create_custom_agent
-from langchain.agents import create_agent
+from agent.agent_registry import get_expert_agent
 
 # 加载环境变量（幂等操作，多次调用安全）
 # 如果 backend.py 已经调用过，这里不会重复加载
@@ -26,8 +24,17 @@ _llm = ChatOpenAI(
     temperature=0.1,
 )
 
-# 绑定工具，生成增强版模型
-model_with_tools = _llm.bind_tools(ALL_TOOLS)
+def get_assistant_agent():
+    """全局共用的 Agent（供改写文档等节点调用，不带工具），首次使用时编译，之后复用。"""
+    return get_expert_agent("assistant", _llm)
 
-# 全局共用的 Agent（供 rss/weather/doc 等节点调用）
-_agent = create_agent(model=_llm, tools=ALL_TOOLS, name="assistant")
\ No newline at end of file
+
+def __getattr__(name: str):
+    """兼容旧的模块属性：model_with_tools / _agent 改为首次访问时再构建，不占用导入时间。"""
+    if name == "_agent":
+        return get_assistant_agent()
+    if name == "model_with_tools":
+        from agent_tools.registry import get_bound_model
+
+        return get_bound_model(_llm, "all")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
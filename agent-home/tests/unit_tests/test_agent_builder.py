@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+
+from agent.agent_builder import create_custom_agent
+
+
+class _ToolCallingFake(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@tool
+async def slow_search(query: str) -> str:
+    """Slow search."""
+    await asyncio.sleep(5)
+    return "too late"
+
+
+@tool
+async def fast_lookup(query: str) -> str:
+    """Fast lookup."""
+    await asyncio.sleep(0.1)
+    return f"found {query}"
+
+
+def _calls(*names: str, step: int) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{"name": n, "args": {"query": "q"}, "id": f"{step}-{n}"} for n in names])
+
+
+def test_tools_run_concurrently_with_timeouts_and_step_limit() -> None:
+    model = _ToolCallingFake(responses=[_calls("slow_search", "fast_lookup", "fast_lookup", step=1),
+                                        _calls("fast_lookup", step=2)])
+    agent = create_custom_agent(model, [slow_search, fast_lookup], max_steps=2, tool_timeouts={"slow_search": 0.3})
+
+    start = time.perf_counter()
+    result = asyncio.run(agent.ainvoke({"messages": [HumanMessage(content="查一下")]}))
+    elapsed = time.perf_counter() - start
+
+    # 慢工具在 0.3 秒时被取消，两个快工具并发执行
+    assert elapsed < 1.5
+    assert [(t["tool"], t["status"]) for t in result["tool_timings"]] == [
+        ("slow_search", "timeout"), ("fast_lookup", "ok"), ("fast_lookup", "ok")]
+    assert all(t["seconds"] < 0.5 for t in result["tool_timings"])
+    # 第二步仍要调用工具时已达到 max_steps：不再执行，返回已有结果
+    final = result["messages"][-1]
+    assert "最大步数 2" in final.content and "found q" in final.content
+    assert result["steps"] == 2
+
+
+def test_sync_invoke_uses_bounded_pool() -> None:
+    @tool
+    def lookup(query: str) -> str:
+        """Sync lookup."""
+        time.sleep(0.2)
+        return f"found {query}"
+
+    model = _ToolCallingFake(responses=[_calls("lookup", "missing", step=1), AIMessage(content="完成")])
+    result = create_custom_agent(model, [lookup], max_concurrency=2).invoke({"messages": [HumanMessage(content="查")]})
+    assert result["messages"][-1].content == "完成"
+    assert [(t["tool"], t["status"]) for t in result["tool_timings"]] == [("lookup", "ok"), ("missing", "error")]
+    assert result["tool_timings"][0]["seconds"] >= 0.2
+
+
+def test_expert_agent_times_out_slow_tools_and_keeps_agent_name(monkeypatch) -> None:
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from agent import agent_builder
+    from agent.agent_registry import get_expert_agent
+    from base_tools.http_client import aclose_http_clients
+
+    class _SlowHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            time.sleep(2)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/slow"
+    monkeypatch.setitem(agent_builder.AGENT_TOOL_TIMEOUTS, "web_browser", 0.3)
+
+    call = AIMessage(content="", tool_calls=[{"name": "web_browser", "args": {"url": url}, "id": "1"}])
+    model = _ToolCallingFake(responses=[call, AIMessage(content="网页打不开，先给出已有结论")])
+    agent = get_expert_agent("doc_expert", model)
+
+    async def _run():
+        names, result = set(), None
+        try:
+            async for mode, chunk in agent.astream(
+                {"messages": [HumanMessage(content="读一下")]}, stream_mode=["messages", "values"]
+            ):
+                if mode == "messages":
+                    names.add(chunk[1].get("lc_agent_name"))
+                else:
+                    result = chunk
+        finally:
+            await aclose_http_clients()
+        return names, result
+
+    start = time.perf_counter()
+    try:
+        names, result = asyncio.run(_run())
+    finally:
+        server.shutdown()
+    assert time.perf_counter() - start < 1.5
+    assert names == {"doc_expert"}
+    assert [(t["tool"], t["status"]) for t in result["tool_timings"]] == [("web_browser", "timeout")]
+    assert result["messages"][-1].content == "网页打不开，先给出已有结论"
+
+
+def test_sync_timeouts_start_when_tool_runs() -> None:
+    @tool
+    def steady(query: str) -> str:
+        """Steady lookup."""
+        time.sleep(0.3)
+        return f"found {query}"
+
+    @tool
+    def stuck(query: str) -> str:
+        """Never returns in time."""
+        time.sleep(2)
+        return "too late"
+
+    twice = AIMessage(content="", tool_calls=[{"name": "steady", "args": {"query": q}, "id": f"2-{q}"} for q in "ab"])
+    model = _ToolCallingFake(responses=[_calls("stuck", "steady", step=1), twice, AIMessage(content="完成")])
+    agent = create_custom_agent(model, [steady, stuck], max_concurrency=1,
+                                tool_timeouts={"steady": 0.5, "stuck": 0.2})
+
+    start = time.perf_counter()
+    result = agent.invoke({"messages": [HumanMessage(content="查")]})
+    elapsed = time.perf_counter() - start
+
+    # 串行执行时排队时间不计入超时；超时的调用立即让出并发名额，不会拖住后面的调用
+    assert elapsed < 1.5
+    assert [(t["tool"], t["status"]) for t in result["tool_timings"]] == [
+        ("stuck", "timeout"), ("steady", "ok"), ("steady", "ok"), ("steady", "ok")]
+    assert all(0.2 <= t["seconds"] < 0.45 for t in result["tool_timings"])
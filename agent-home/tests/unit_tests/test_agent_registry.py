@@ -0,0 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+
+from agent import agent_registry
+
+
+def test_agent_is_compiled_once_and_shared(monkeypatch) -> None:
+    calls = []
+    real_create = agent_registry.create_custom_agent
+
+    def counting_create(*args, **kwargs):
+        calls.append(kwargs["name"])
+        return real_create(*args, **kwargs)
+
+    monkeypatch.setattr(agent_registry, "create_custom_agent", counting_create)
+    model = FakeListChatModel(responses=["ok"] * 8)
+
+    with ThreadPoolExecutor(8) as pool:
+        agents = list(pool.map(lambda _: agent_registry.get_agent(model, [], name="test_expert"), range(8)))
+
+    assert calls == ["test_expert"]
+    assert all(a is agents[0] for a in agents)
+    assert agent_registry.get_agent(model, [], name="other_expert") is not agents[0]
+    result = agents[0].invoke({"messages": [HumanMessage(content="hi")]})
+    assert result["messages"][-1].content == "ok"
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agent_tools.tools import ALL_TOOLS
+from agent_tools.web_process import web_browser, web_fetch
+from base_tools.http_client import aclose_http_clients
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = "<html><script>x()</script><body><p>异步 页面</p></body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_io_tools_have_native_coroutines() -> None:
+    # 需要网络 / 向量库的工具都应提供协程实现，ainvoke 时不占用线程池
+    io_tools = {"web_fetch", "web_browser", "rss_reader", "get_current_location",
+                "save_vectors_to_qdrant", "index_web_page_to_qdrant", "bulk_index_web_pages"}
+    assert all(getattr(t, "coroutine", None) is not None for t in ALL_TOOLS if t.name in io_tools)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/page"
+
+    async def _run():
+        try:
+            return await asyncio.gather(web_fetch.ainvoke({"url": url}), web_browser.ainvoke({"url": url}))
+        finally:
+            await aclose_http_clients()
+
+    try:
+        raw, text = asyncio.run(_run())
+    finally:
+        server.shutdown()
+    assert "<script>" in raw
+    assert text == "异步 页面"
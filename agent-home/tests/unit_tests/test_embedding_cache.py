@@ -0,0 +1,45 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from base_tools.embedding_cache import EmbeddingCache, _CachedEmbeddings, _chunk_hash
+
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self) -> None:
+        self.seen: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.seen.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def test_only_misses_reach_the_model() -> None:
+    inner = _CountingEmbeddings()
+    cached = _CachedEmbeddings(inner, "fake", EmbeddingCache(None, max_items=100))
+
+    first = cached.embed_documents(["a b", "cc", "a  b"])
+    second = cached.embed_documents(["cc", "ddd"])
+
+    # "a b" 与 "a  b" 归一化后相同，只计算一次
+    assert inner.seen == ["a b", "cc", "ddd"]
+    assert first[0] == first[2]
+    assert second[0] == first[1]
+    stats = cached.cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_disk_tier_survives_new_instance(tmp_path) -> None:
+    path = str(tmp_path / "emb.sqlite3")
+    EmbeddingCache(path).put_many("fake", {_chunk_hash("hello"): [0.5, 0.25]})
+
+    cache = EmbeddingCache(path)
+    found = cache.get_many("fake", [_chunk_hash("hello"), _chunk_hash("other")])
+
+    assert found == {_chunk_hash("hello"): [0.5, 0.25]}
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from base_tools import vertordb
+from base_tools.embedding_worker import EmbeddingBatcher
+
+
+class _RecordingEmbeddings(Embeddings):
+    """向量 = [文本编号]，记录每次前向计算的批大小。"""
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        return [[float(t.split("-")[-1])] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _texts(caller: int, n: int = 3) -> list:
+    return [f"t-{caller * 10 + i}" for i in range(n)]
+
+
+def _expected(caller: int, n: int = 3) -> list:
+    return [[float(caller * 10 + i)] for i in range(n)]
+
+
+def test_batcher_merges_thread_and_asyncio_callers() -> None:
+    model = _RecordingEmbeddings()
+    batcher = EmbeddingBatcher(model, max_batch_size=64, max_wait_ms=300)
+    barrier = threading.Barrier(5)
+    results = {}
+
+    def thread_caller(caller: int) -> None:
+        barrier.wait()
+        results[caller] = batcher.embed(_texts(caller))
+
+    async def async_callers() -> None:
+        barrier.wait()
+        outputs = await asyncio.gather(*(batcher.aembed(_texts(c)) for c in range(4, 8)))
+        results.update(zip(range(4, 8), outputs))
+
+    threads = [threading.Thread(target=thread_caller, args=(c,)) for c in range(4)]
+    threads.append(threading.Thread(target=asyncio.run, args=(async_callers(),)))
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+    finally:
+        batcher.close()
+
+    # 8 个调用方（4 个线程 + 4 个协程）合并为一次前向计算，各自拿回自己的行
+    assert model.batches == [24]
+    assert results == {c: _expected(c) for c in range(8)}
+    assert batcher.stats()["requests"] == 8
+
+
+def test_batcher_flushes_after_max_wait_and_respects_batch_size() -> None:
+    model = _RecordingEmbeddings()
+    batcher = EmbeddingBatcher(model, max_batch_size=4, max_wait_ms=150)
+    try:
+        # 批未凑满：等满 max_wait 后也要发出
+        start = time.monotonic()
+        future = batcher.submit(_texts(1, 2))
+        assert not future.done()
+        assert future.result(timeout=2) == _expected(1, 2)
+        assert 0.1 <= time.monotonic() - start < 1.0
+
+        # 放不下的请求顺延到下一批，单个超大请求独立成批
+        futures = [batcher.submit(_texts(c)) for c in (2, 3)] + [batcher.submit(_texts(4, 6))]
+        assert [f.result(timeout=2) for f in futures] == [_expected(2), _expected(3), _expected(4, 6)]
+    finally:
+        batcher.close()
+    assert model.batches == [2, 3, 3, 6]
+    with pytest.raises(RuntimeError):
+        batcher.embed(["t-1"])
+
+
+def test_close_embedding_batcher_resets_default_embedding(monkeypatch) -> None:
+    batcher = EmbeddingBatcher(_RecordingEmbeddings())
+    monkeypatch.setattr(vertordb, "_default_batcher", batcher)
+    monkeypatch.setattr(vertordb, "_default_embedding", object())
+
+    vertordb.close_embedding_batcher()
+    vertordb.close_embedding_batcher()
+
+    assert vertordb._default_batcher is None and vertordb._default_embedding is None
+    assert not any(t.is_alive() for t in batcher._workers)
+    assert isinstance(batcher.submit(["t-1"]).exception(), RuntimeError)
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agent_tools import subscribe
+from base_tools import feed_cache
+from base_tools.http_client import aclose_http_clients
+
+_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>t</title>
+<item><title>第一篇</title><link>https://example.com/1</link><description>&lt;p&gt;正文 一&lt;/p&gt;</description></item>
+<item><title>第二篇</title><link>https://example.com/2</link><description>正文二</description></item>
+</channel></rss>""".encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self) -> None:
+        self.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(_FEED)))
+        self.end_headers()
+        self.wfile.write(_FEED)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_conditional_get_reuses_parsed_entries(tmp_path, monkeypatch) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/feed.xml"
+    path = str(tmp_path / "feeds.sqlite3")
+    monkeypatch.setattr(feed_cache, "_default_cache", feed_cache.FeedCache("sqlite", path))
+    parses = []
+    real_parse = subscribe._parse_feed
+    monkeypatch.setattr(subscribe, "_parse_feed", lambda *a: parses.append(1) or real_parse(*a))
+
+    async def _afetch():
+        try:
+            return await subscribe.afetch_feed_entries(url, limit=1)
+        finally:
+            await aclose_http_clients()
+
+    try:
+        first = subscribe.fetch_feed_entries(url)
+        fresh = subscribe.fetch_feed_entries(url)  # 新鲜期内：不发请求
+        monkeypatch.setattr(feed_cache, "FEED_CACHE_TTL", 0)
+        revalidated = subscribe.fetch_feed_entries(url)  # 过期：条件请求 → 304
+        # 新进程（新的内存层）从 sqlite 读回记录，异步路径同样走条件请求
+        monkeypatch.setattr(feed_cache, "_default_cache", feed_cache.FeedCache("sqlite", path))
+        async_entries = asyncio.run(_afetch())
+    finally:
+        server.shutdown()
+
+    assert [e["title"] for e in first] == ["第一篇", "第二篇"]
+    assert first[0]["content"] == "正文 一"
+    assert fresh == revalidated == first
+    assert async_entries == first[:1]
+    assert _Handler.requests == [None, '"v1"', '"v1"']
+    assert len(parses) == 1
+    stats = feed_cache.feed_cache_stats()
+    assert (stats["not_modified"], stats["parsed"]) == (1, 0)
@@ -0,0 +1,123 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import base_tools.http_client as http_client
+from agent_tools.web_process import web_browser, web_fetch
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """前两次请求返回 503，之后返回正常页面。"""
+    calls = 0
+    lock = threading.Lock()
+
+    def do_GET(self) -> None:
+        with _FlakyHandler.lock:
+            _FlakyHandler.calls += 1
+            calls = _FlakyHandler.calls
+        status, body = (503, b"busy") if calls <= 2 else (200, "<html><body><p>重试 成功</p></body></html>".encode())
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_http_get_retries_transient_status_and_reuses_client() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/page"
+    try:
+        # 两次 503（带 Retry-After: 0）后成功，工具拿到的是最终页面
+        assert web_browser.invoke({"url": url}) == "重试 成功"
+        assert _FlakyHandler.calls == 3
+        # 重试次数用尽时返回最后一次响应，不抛异常
+        _FlakyHandler.calls = 0
+        assert http_client.http_get(url, retries=1).status_code == 503
+        # 同步客户端在进程内共享
+        assert http_client.get_http_client() is http_client.get_http_client()
+    finally:
+        server.shutdown()
+        http_client.close_http_clients()
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path == "/file.bin":
+            content_type, body = "application/octet-stream", b"\0" * 4096
+        else:
+            # 导航 + 侧栏 + 约 3MB 正文
+            content_type = "text/html; charset=utf-8"
+            body = (
+                "<html><body><nav><a>首页</a><a>订阅</a></nav><div class='side-bar'>热门推荐</div>"
+                "<article><h1>正文标题</h1>" + "<p>这是正文段落。</p>" * 100000 + "</article>"
+                "<footer>版权所有</footer></body></html>"
+            ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_bounded_streaming_fetch() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with http_client.http_stream(f"{base}/page") as response:
+            assert sum(len(c) for c in http_client.iter_bounded(response, 1000)) == 1000
+
+        text = web_browser.invoke({"url": f"{base}/page"})
+        assert text.startswith("正文标题 这是正文段落。")
+        assert len(text) <= 5000
+        assert "首页" not in text and "热门推荐" not in text
+
+        assert len(web_fetch.invoke({"url": f"{base}/page"})) == 5000
+        assert web_fetch.invoke({"url": f"{base}/file.bin"}).startswith("跳过")
+    finally:
+        server.shutdown()
+        http_client.close_http_clients()
+
+
+def test_index_web_page_skips_non_text_and_errors(monkeypatch) -> None:
+    import asyncio
+
+    from agent_tools.web_process import index_web_page_to_qdrant
+    from base_tools import vertordb
+    from base_tools.local_index import NumpyVectorStore
+    from base_tools.retrieval import iter_scroll
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    store = NumpyVectorStore()
+    monkeypatch.setattr(vertordb, "_qdrant_client", store)
+    monkeypatch.setattr(vertordb, "_default_embedding", vertordb._SimpleHashEmbeddings(16))
+    vertordb.forget_collection("web_test")
+    try:
+        # 跳过 / 出错时的提示信息不会被当作网页正文入库
+        skipped = index_web_page_to_qdrant.func(f"{base}/file.bin", "web_test")
+        askipped = asyncio.run(index_web_page_to_qdrant.coroutine(f"{base}/file.bin", "web_test"))
+        failed = index_web_page_to_qdrant.func("http://127.0.0.1:1/none", "web_test")
+        assert not store.collection_exists("web_test")
+        indexed = asyncio.run(index_web_page_to_qdrant.coroutine(f"{base}/page", "web_test"))
+        texts = [r.payload["text"] for r in iter_scroll("web_test", client=store)]
+    finally:
+        server.shutdown()
+        http_client.close_http_clients()
+        vertordb.forget_collection("web_test")
+
+    assert skipped.startswith("跳过") and askipped == skipped
+    assert failed.startswith("抓取网页失败")
+    assert indexed.startswith("成功写入") and texts and all("跳过" not in t for t in texts)
@@ -0,0 +1,172 @@
+import json
+import threading
+import time
+
+from base_tools import index_queue, vertordb
+from base_tools.index_queue import IndexingPipeline
+from base_tools.local_index import NumpyVectorStore
+from base_tools.retrieval import iter_scroll
+
+
+def _use_local_store(monkeypatch) -> None:
+    monkeypatch.delenv("MONGO_URI", raising=False)
+    monkeypatch.setattr(vertordb, "_qdrant_client", NumpyVectorStore())
+    monkeypatch.setattr(vertordb, "_default_embedding", vertordb._SimpleHashEmbeddings(16))
+    vertordb.forget_collection("queue_test")
+
+
+def _spooled(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["doc_key"] for line in f]
+
+
+def test_pipeline_coalesces_upserts_and_flush_drains(tmp_path, monkeypatch) -> None:
+    _use_local_store(monkeypatch)
+    pipeline = IndexingPipeline(embed_workers=2, upsert_wait_ms=500, spool_path=str(tmp_path / "spool.jsonl")).start()
+    try:
+        for i in range(4):
+            assert pipeline.submit(f"文档 {i} 第一段。\n\n文档 {i} 第二段。", "意图", doc_key=f"doc-{i}",
+                                   collection_name="queue_test")
+        assert pipeline.flush(timeout=10)
+        metrics = pipeline.metrics()
+    finally:
+        pipeline.shutdown(timeout=1)
+        vertordb.forget_collection("queue_test")
+
+    assert (metrics["pending"], metrics["completed"], metrics["failed"]) == (0, 4, 0)
+    # 四篇文档在等待窗口内合并为一次 upsert
+    assert metrics["upsert_batches"] == 1
+    points = list(iter_scroll("queue_test", client=vertordb._qdrant_client))
+    assert metrics["points_upserted"] == len(points) > 0
+    assert {p.payload["doc_id"] for p in points} == {vertordb._doc_id_for(f"doc-{i}") for i in range(4)}
+
+
+def test_backpressure_shutdown_spool_and_replay(tmp_path, monkeypatch) -> None:
+    _use_local_store(monkeypatch)
+    spool = tmp_path / "spool.jsonl"
+    started, release = threading.Event(), threading.Event()
+    embedded = []
+    split = index_queue._split_text_into_chunks
+    plan = index_queue._plan_generated_doc_reindex
+
+    def blocking_split(text, max_len):
+        started.set()
+        release.wait(5)
+        return split(text, max_len=max_len)
+
+    def recording_plan(text, user_intent, doc_key, *args, **kwargs):
+        embedded.append(doc_key)
+        return plan(text, user_intent, doc_key, *args, **kwargs)
+
+    monkeypatch.setattr(index_queue, "_split_text_into_chunks", blocking_split)
+    monkeypatch.setattr(index_queue, "_plan_generated_doc_reindex", recording_plan)
+    pipeline = IndexingPipeline(queue_size=1, embed_workers=1, spool_path=str(spool), spool_replay_interval=0).start()
+    assert pipeline.submit("正在切片的文档。", "意图", doc_key="in-flight", collection_name="queue_test")
+    assert started.wait(5)
+    assert pipeline.submit("排队中的文档。", "意图", doc_key="queued", collection_name="queue_test")
+
+    # 队列已满：submit 阻塞到超时后落盘，返回 False
+    start = time.monotonic()
+    assert not pipeline.submit("被拒绝的文档。", "意图", doc_key="rejected", collection_name="queue_test", timeout=0.2)
+    assert time.monotonic() - start >= 0.2
+    assert _spooled(spool) == ["rejected"]
+
+    # 退出时排队中的和在途的任务都落盘；在途任务被标记放弃，切片完成后不再向量化
+    pipeline.shutdown(timeout=0.1)
+    release.set()
+    time.sleep(0.2)
+    assert sorted(_spooled(spool)) == ["in-flight", "queued", "rejected"]
+    assert embedded == []
+
+    # 新流水线启动时重放 spool
+    monkeypatch.setattr(index_queue, "_split_text_into_chunks", split)
+    replay = IndexingPipeline(spool_path=str(spool), upsert_wait_ms=0, spool_replay_interval=0).start()
+    try:
+        assert replay.flush(timeout=10)
+        assert replay.metrics()["completed"] == 3
+    finally:
+        replay.shutdown(timeout=1)
+        vertordb.forget_collection("queue_test")
+    assert not spool.exists()
+    assert sorted(embedded) == ["in-flight", "queued", "rejected"]
+
+
+def test_failed_jobs_are_replayed_while_running(tmp_path, monkeypatch) -> None:
+    _use_local_store(monkeypatch)
+    attempts = []
+    plan = index_queue._plan_generated_doc_reindex
+
+    def flaky_plan(*args, **kwargs):
+        attempts.append(kwargs)
+        if len(attempts) <= index_queue.INDEX_MAX_ATTEMPTS:
+            raise RuntimeError("embedding 服务不可用")
+        return plan(*args, **kwargs)
+
+    monkeypatch.setattr(index_queue, "INDEX_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(index_queue, "_plan_generated_doc_reindex", flaky_plan)
+    pipeline = IndexingPipeline(spool_path=str(tmp_path / "spool.jsonl"), upsert_wait_ms=0,
+                                spool_replay_interval=0.1).start()
+    try:
+        assert pipeline.submit("会失败一轮的文档。", "意图", doc_key="flaky", collection_name="queue_test")
+        deadline = time.monotonic() + 5
+        while pipeline.metrics()["completed"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        metrics = pipeline.metrics()
+    finally:
+        pipeline.shutdown(timeout=1)
+        vertordb.forget_collection("queue_test")
+
+    # 第一轮重试耗尽后落盘，不必等到下次启动就被重新入队并完成
+    assert (metrics["failed"], metrics["spooled"], metrics["completed"]) == (1, 1, 1)
+
+
+def test_same_title_documents_do_not_overwrite_each_other(tmp_path, monkeypatch) -> None:
+    from agent_nodes.doc_nodes import doc
+
+    _use_local_store(monkeypatch)
+    pipeline = IndexingPipeline(upsert_wait_ms=0, spool_path=str(tmp_path / "spool.jsonl")).start()
+    monkeypatch.setattr(index_queue, "_default_pipeline", pipeline)
+    docs = [
+        ("介绍 Python", "周报", "Python 周报第一段。"),
+        ("介绍 Rust", "周报", "Rust 周报第一段。"),
+        ("写一首诗", None, "无标题的诗。"),
+        ("写一个故事", None, "无标题的故事。"),
+    ]
+    try:
+        for intent, title, text in docs:
+            doc._save_doc_to_qdrant(text, intent, title)
+        assert pipeline.flush(timeout=10)
+        texts = sorted(r.payload["text"] for r in iter_scroll("generated_docs", client=vertordb._qdrant_client))
+    finally:
+        pipeline.shutdown(timeout=1)
+        vertordb.forget_collection("generated_docs")
+
+    # 同名文档与无标题文档都各自保留
+    assert texts == sorted(text for _, _, text in docs)
+    assert vertordb.generated_doc_key("介绍 Python", "周报") == vertordb.generated_doc_key(" 介绍 Python ", "周报")
+
+
+def test_versions_of_one_document_are_serialized_and_coalesced(tmp_path, monkeypatch) -> None:
+    _use_local_store(monkeypatch)
+    plan = index_queue._plan_generated_doc_reindex
+
+    def slow_plan(*args, **kwargs):
+        time.sleep(0.1)
+        return plan(*args, **kwargs)
+
+    monkeypatch.setattr(index_queue, "_plan_generated_doc_reindex", slow_plan)
+    versions = ["\n\n".join(f"第 {v} 版第 {i} 段。" for i in range(n)) for v, n in ((1, 4), (2, 3), (3, 2))]
+    pipeline = IndexingPipeline(embed_workers=2, upsert_wait_ms=0, spool_path=str(tmp_path / "spool.jsonl")).start()
+    try:
+        # 第 1 版处理中时提交第 2、3 版：第 2 版被第 3 版取代，第 3 版在第 1 版写完后才开始
+        for text in versions:
+            assert pipeline.submit(text, "意图", doc_key="同一文档", collection_name="queue_test")
+        assert pipeline.flush(timeout=10)
+        metrics = pipeline.metrics()
+        texts = sorted(r.payload["text"] for r in iter_scroll("queue_test", client=vertordb._qdrant_client))
+    finally:
+        pipeline.shutdown(timeout=1)
+        vertordb.forget_collection("queue_test")
+
+    assert texts == sorted(vertordb._split_text_into_chunks(versions[2], max_len=500))
+    assert (metrics["completed"], metrics["coalesced"], metrics["pending"]) == (2, 1, 0)
@@ -0,0 +1,50 @@
+import asyncio
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from agent_nodes import intent_router
+
+
+class _CharEmbeddings(Embeddings):
+    """每个维度统计一个标志字出现的次数，便于构造可预测的相似度。"""
+
+    marks = "晴报写"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [text.count(c) + 0.01 for c in self.marks]
+
+
+def test_router_tiers_and_stats(monkeypatch) -> None:
+    monkeypatch.setattr(intent_router, "_stats", intent_router._RouterStats())
+    classifier = intent_router._CentroidClassifier(
+        _CharEmbeddings(), {"weather": ["晴晴"], "rss": ["报报"], "doc": ["写写"]}
+    )
+    monkeypatch.setattr(intent_router, "_get_centroid_classifier", lambda: classifier)
+    llm_calls = []
+
+    async def fake_llm(text):
+        llm_calls.append(text)
+        return intent_router.IntentRouteOutput(summary="想了解一些信息", route="rss")
+
+    monkeypatch.setattr(intent_router, "_allm_route", fake_llm)
+
+    def route(text):
+        return asyncio.run(intent_router.aroute_intent(text))
+
+    assert route("明天天气怎么样").tier == "keyword"
+    # 同时命中天气与新闻关键字：关键字层放弃，交给质心层
+    decision = route("天气新闻：晴晴晴")
+    assert (decision.route, decision.tier) == ("weather", "centroid")
+    # 质心没有把握（无标志字，相似度持平）时才调用 LLM
+    decision = route("随便聊聊")
+    assert (decision.route, decision.tier, decision.summary) == ("rss", "llm", "想了解一些信息")
+    assert llm_calls == ["随便聊聊"]
+
+    stats = intent_router.intent_router_stats()
+    assert stats["total"] == 3
+    assert {t: s["hits"] for t, s in stats["tiers"].items()} == {"keyword": 1, "centroid": 1, "llm": 1}
+    assert stats["estimated_saved_seconds"] is not None
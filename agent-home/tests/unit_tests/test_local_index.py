@@ -0,0 +1,99 @@
+import numpy as np
+from qdrant_client import models as qmodels
+
+from base_tools import vertordb
+from base_tools.local_index import NumpyVectorStore
+from base_tools.retrieval import build_filter, iter_scroll
+
+
+def _points(n: int, doc_id: str) -> list:
+    rng = np.random.default_rng(0)
+    return [
+        qmodels.PointStruct(
+            id=vertordb._plan_chunks(vertordb._doc_id_for(doc_id), [f"c{i}"])[0][0],
+            vector=rng.normal(size=8).tolist(),
+            payload={"doc_id": doc_id, "chunk_id": i, "created_at": f"2024-01-{i + 1:02d}T00:00:00Z"},
+        )
+        for i in range(n)
+    ]
+
+
+def test_numpy_store_matches_qdrant_local() -> None:
+    from qdrant_client import QdrantClient
+
+    points = _points(30, "a") + _points(5, "b")
+    query = np.ones(8).tolist()
+    flt = build_filter(doc_id="a", created_after="2024-01-10T00:00:00Z")
+
+    results = []
+    for client in (NumpyVectorStore(), QdrantClient(":memory:")):
+        vertordb.forget_collection("local_test")
+        vertordb.upsert_points("local_test", points, client=client)
+        hits = client.query_points("local_test", query=query, query_filter=flt, limit=5).points
+        pages = [r.id for r in iter_scroll("local_test", build_filter(doc_id="a"), page_size=7, client=client)]
+        results.append(([(h.id, round(h.score, 4)) for h in hits], sorted(pages)))
+    vertordb.forget_collection("local_test")
+
+    assert results[0] == results[1]
+    assert len(results[0][1]) == 30
+
+
+def test_numpy_store_persists_and_applies_batch_updates(tmp_path) -> None:
+    points = _points(10, "a")
+    store = NumpyVectorStore(str(tmp_path))
+    store.create_collection("docs", vectors_config=qmodels.VectorParams(size=8, distance=qmodels.Distance.COSINE))
+    store.upsert("docs", points)
+    store.batch_update_points("docs", [
+        qmodels.SetPayloadOperation(set_payload=qmodels.SetPayload(payload={"chunk_id": 99}, points=[points[0].id])),
+        qmodels.DeleteOperation(delete=qmodels.PointIdsList(points=[p.id for p in points[5:]])),
+    ])
+
+    reloaded = NumpyVectorStore(str(tmp_path))
+    assert reloaded.get_collection("docs").points_count == 5
+    records, _ = reloaded.scroll("docs", limit=10)
+    assert {r.payload["chunk_id"] for r in records} == {99, 1, 2, 3, 4}
+    hit = reloaded.query_points("docs", query=points[1].vector, limit=1).points[0]
+    assert hit.id == points[1].id and abs(hit.score - 1.0) < 1e-5
+    # mmap 加载的集合仍然可写
+    reloaded.upsert("docs", points[5:6])
+    assert reloaded.get_collection("docs").points_count == 6
+
+
+def test_numpy_store_appends_to_log_and_compacts(tmp_path, monkeypatch) -> None:
+    from base_tools import local_index
+
+    points = _points(10, "a")
+    store = NumpyVectorStore(str(tmp_path))
+    store.create_collection("docs", vectors_config=qmodels.VectorParams(size=8, distance=qmodels.Distance.COSINE))
+    store.upsert("docs", points[:5])
+    snapshot = [(tmp_path / "docs" / f).stat().st_mtime_ns for f in ("vectors.npy", "points.json")]
+
+    # 写操作只追加日志，不重写快照
+    store.upsert("docs", points[5:])
+    store.create_payload_index("docs", "doc_id", qmodels.PayloadSchemaType.KEYWORD)
+    store.delete("docs", [points[9].id])
+    store.batch_update_points("docs", [
+        qmodels.SetPayloadOperation(set_payload=qmodels.SetPayload(payload={"chunk_id": 99}, points=[points[0].id])),
+    ])
+    assert [(tmp_path / "docs" / f).stat().st_mtime_ns for f in ("vectors.npy", "points.json")] == snapshot
+    assert (tmp_path / "docs" / "wal.f32").stat().st_size == 10 * 8 * 4
+
+    # 半截写入（manifest 之后的部分）在重启时被丢弃
+    with open(tmp_path / "docs" / "wal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"op": "delete", "ids": [')
+    reloaded = NumpyVectorStore(str(tmp_path))
+    info = reloaded.get_collection("docs")
+    assert info.points_count == 9 and info.payload_schema == {"doc_id": qmodels.PayloadSchemaType.KEYWORD}
+    records, _ = reloaded.scroll("docs", limit=10, with_vectors=True)
+    by_id = {r.id: r for r in records}
+    assert by_id[points[0].id].payload["chunk_id"] == 99 and points[9].id not in by_id
+    hit = reloaded.query_points("docs", query=points[7].vector, limit=1).points[0]
+    assert hit.id == points[7].id and abs(hit.score - 1.0) < 1e-5
+
+    # 日志超过阈值后合并为新快照
+    monkeypatch.setattr(local_index, "LOCAL_INDEX_COMPACT_MIN_OPS", 0)
+    reloaded.upsert("docs", points[9:])
+    assert not (tmp_path / "docs" / "wal.f32").exists()
+    compacted = NumpyVectorStore(str(tmp_path))
+    assert compacted.get_collection("docs").points_count == 10
+    assert compacted.scroll("docs", limit=10)[0] == reloaded.scroll("docs", limit=10)[0]
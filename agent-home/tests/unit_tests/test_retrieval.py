@@ -0,0 +1,81 @@
+import asyncio
+
+from qdrant_client import QdrantClient
+from qdrant_client import models as qmodels
+
+from base_tools import vertordb
+from base_tools.retrieval import aiter_scroll, asearch_batch, build_filter, iter_scroll, search, search_batch
+
+
+def _setup(monkeypatch) -> list:
+    """300 个点（超过一页 SCROLL_PAGE_SIZE）：doc a 200 个、doc b 100 个，source 交替，created_at 按天递增。"""
+    embedding = vertordb._SimpleHashEmbeddings(32)
+    monkeypatch.setattr(vertordb, "_qdrant_client", QdrantClient(":memory:"))
+    monkeypatch.setattr(vertordb, "QDRANT_BACKEND", "local")
+    monkeypatch.setattr(vertordb, "_default_embedding", embedding)
+    vertordb.forget_collection("retrieval_test")
+    texts = [f"文档 {'a' if i < 200 else 'b'} 第 {i} 段" for i in range(300)]
+    points = [
+        qmodels.PointStruct(
+            id=i,
+            vector=vec,
+            payload={
+                "doc_id": "a" if i < 200 else "b",
+                "source": "generated_doc" if i % 2 else "web_page",
+                "created_at": f"2024-{1 + i // 28:02d}-{1 + i % 28:02d}T00:00:00Z",
+                "text": text,
+            },
+        )
+        for i, (text, vec) in enumerate(zip(texts, embedding.embed_documents(texts)))
+    ]
+    vertordb.upsert_points("retrieval_test", points)
+    return points
+
+
+def test_scroll_reads_every_page_and_filters(monkeypatch) -> None:
+    points = _setup(monkeypatch)
+
+    async def _ascroll(flt, page_size):
+        return [r.id async for r in aiter_scroll("retrieval_test", flt, page_size=page_size)]
+
+    try:
+        assert [r.id for r in iter_scroll("retrieval_test")] == list(range(300))
+        assert sorted(r.id for r in iter_scroll("retrieval_test", page_size=7)) == list(range(300))
+        assert asyncio.run(_ascroll(None, 256)) == list(range(300))
+
+        def ids(**filters):
+            return sorted(r.id for r in iter_scroll("retrieval_test", build_filter(**filters), page_size=50))
+
+        assert build_filter() is None
+        assert ids(doc_id="b") == list(range(200, 300))
+        assert ids(doc_id="a", source="generated_doc") == list(range(1, 200, 2))
+        feb = [p.id for p in points if p.payload["created_at"].startswith("2024-02")]
+        assert ids(created_after="2024-02-01T00:00:00Z", created_before="2024-02-28T00:00:00Z") == feb
+        assert asyncio.run(_ascroll(build_filter(doc_id="b", source="web_page"), 16)) == list(range(200, 300, 2))
+        assert list(iter_scroll("missing_collection")) == []
+    finally:
+        vertordb.forget_collection("retrieval_test")
+
+
+def test_search_and_search_batch(monkeypatch) -> None:
+    points = _setup(monkeypatch)
+    # 哈希 embedding 按字符计数：选数字重排后不与其它编号相同的点（均为 generated_doc）
+    queries = [points[i].payload["text"] for i in (5, 277, 199)]
+    try:
+        hits = search(queries[0], "retrieval_test", top_k=3)
+        filtered = search(queries[0], "retrieval_test", top_k=5, doc_id="b")
+        batch = search_batch(queries, "retrieval_test", top_k=2)
+        abatch = asyncio.run(asearch_batch(queries, "retrieval_test", top_k=2))
+        filtered_batch = search_batch(queries, "retrieval_test", top_k=5, source="generated_doc")
+        missing = search_batch(queries, "missing_collection")
+    finally:
+        vertordb.forget_collection("retrieval_test")
+
+    assert len(hits) == 3 and hits[0]["id"] == 5 and abs(hits[0]["score"] - 1.0) < 1e-4
+    assert len(filtered) == 5 and all(h["payload"]["doc_id"] == "b" for h in filtered)
+    # 每条查询一个结果列表，顺序与查询一致
+    assert [r[0]["id"] for r in batch] == [5, 277, 199] and all(len(r) == 2 for r in batch)
+    assert [[h["id"] for h in r] for r in abatch] == [[h["id"] for h in r] for r in batch]
+    assert all(h["payload"]["source"] == "generated_doc" for r in filtered_batch for h in r)
+    assert [r[0]["id"] for r in filtered_batch] == [5, 277, 199]
+    assert missing == [[], [], []] and search_batch([], "retrieval_test") == []
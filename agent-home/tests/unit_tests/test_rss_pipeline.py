@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.graph import graph, rss_graph
+from agent_nodes import rss
+
+
+class _SlowSummarizer:
+    """记录并发数的假模型：每次调用等待 0.2 秒，按编号返回摘要。"""
+
+    def __init__(self):
+        self.active = self.peak = 0
+
+    async def ainvoke(self, messages):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.2)
+        self.active -= 1
+        return AIMessage(content="\n".join(f"{i}. 摘要{i}" for i in range(1, 20)))
+
+
+def test_feeds_fetched_and_summarized_in_parallel(monkeypatch) -> None:
+    feeds = {
+        "https://a.example/feed": [{"title": f"A[{i}]", "link": f"https://a/{i}", "content": "正文"} for i in range(7)],
+        "https://b.example/feed": [{"title": "B", "link": "https://b/0", "content": "正文"}],
+        "https://c.example/feed": None,
+    }
+
+    async def fake_fetch(url, limit, max_chars):
+        await asyncio.sleep(0.2)
+        if feeds[url] is None:
+            raise ConnectionError("refused")
+        return feeds[url]
+
+    model = _SlowSummarizer()
+    monkeypatch.setattr(rss, "_rss_urls", list(feeds))
+    monkeypatch.setattr(rss, "afetch_feed_entries", fake_fetch)
+    monkeypatch.setattr(rss, "_llm", model)
+    monkeypatch.setattr(rss, "RSS_SUMMARY_BATCH", 5)
+
+    start = time.perf_counter()
+    result = asyncio.run(rss_graph.ainvoke({}))
+    elapsed = time.perf_counter() - start
+
+    # 3 个源并发抓取 + 3 批（A 两批、B 一批）并发摘要 ≈ 0.4 秒，而不是 3×0.2 + 3×0.2
+    assert model.peak == 3
+    assert elapsed < 0.9
+    a, b, c = result["rss_summaries"]
+    assert a.startswith("1. [A【0】](https://a/0)\n   - 摘要：摘要1")
+    assert "7. [A【6】](https://a/6)\n   - 摘要：摘要7" in a
+    assert b == "1. [B](https://b/0)\n   - 摘要：摘要1"
+    assert c == "读取 https://c.example/feed 失败：refused"
+
+
+
+def test_rss_route_does_not_duplicate_messages(monkeypatch) -> None:
+    async def fake_fetch(url, limit, max_chars):
+        return [{"title": "A", "link": "https://a/0", "content": "正文"}]
+
+    monkeypatch.setattr(rss, "_rss_urls", ["https://a.example/feed"])
+    monkeypatch.setattr(rss, "afetch_feed_entries", fake_fetch)
+    monkeypatch.setattr(rss, "_llm", _SlowSummarizer())
+
+    config = {"configurable": {"thread_id": "test-rss-messages"}}
+    # user_input 为空时意图节点直接路由到 rss
+    inputs = {"messages": [HumanMessage(content="早报")], "user_input": ""}
+    first = asyncio.run(graph.ainvoke(inputs, config))
+    # 输入消息 + 汇总消息；子图不能把输入的 messages 再交回主图
+    assert len(first["messages"]) == 2
+    assert "摘要1" in first["messages"][-1].content
+    second = asyncio.run(graph.ainvoke(inputs, config))
+    assert len(second["messages"]) == 4
+    assert "rss_batches" not in second and "rss_feeds" not in second
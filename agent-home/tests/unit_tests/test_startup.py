@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+HEAVY_MODULES = ["agent.graph", "models.model", "langchain_openai", "langchain_community", "qdrant_client"]
+
+
+def test_backend_import_defers_heavy_modules() -> None:
+    code = (
+        "import sys, backend\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, cwd=SRC)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == ""
+
+
+def test_runtime_warmup_retries_after_failure(monkeypatch) -> None:
+    import asyncio
+
+    import backend
+
+    calls = []
+
+    def flaky_load():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("模型服务未就绪")
+        return {"graph": "g"}
+
+    async def scenario():
+        try:
+            await backend._get_runtime()
+        except RuntimeError:
+            pass
+        failed_ready = backend.health_check()["ready"]
+        runtime = await backend._get_runtime()
+        return failed_ready, runtime
+
+    monkeypatch.setattr(backend, "_runtime_task", None)
+    monkeypatch.setattr(backend, "_load_runtime", flaky_load)
+    failed_ready, runtime = asyncio.run(scenario())
+    # 第一次失败不被缓存，第二次调用重新预热
+    assert (failed_ready, runtime, len(calls)) == (False, {"graph": "g"}, 2)
+    assert backend.health_check()["ready"]
+
+    async def cancelled_task():
+        task = asyncio.ensure_future(asyncio.sleep(10))
+        task.cancel()
+        await asyncio.sleep(0)
+        return task
+
+    # 预热任务被取消时探活接口照常返回
+    monkeypatch.setattr(backend, "_runtime_task", asyncio.run(cancelled_task()))
+    assert backend.health_check()["ready"] is False
@@ -0,0 +1,51 @@
+import asyncio
+
+from langchain_core.tools import tool
+
+from agent_tools.tools import ALL_TOOLS
+from base_tools.tool_cache import ToolResultCache, cached_tool
+
+
+def test_tool_cache_ttl_single_flight_and_stats(tmp_path) -> None:
+    calls = []
+
+    @tool
+    async def lookup(query: str) -> str:
+        """Look something up."""
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        return "定位失败: timeout" if query == "bad" else f"结果:{query}"
+
+    cache = ToolResultCache(str(tmp_path / "tools.sqlite3"))
+    wrapped = cached_tool(lookup, ttl=60, cache=cache)
+    assert wrapped.name == "lookup" and wrapped.args == lookup.args
+
+    async def _run():
+        # 同时发起的相同调用只执行一次
+        first = await asyncio.gather(*(wrapped.ainvoke({"query": "北京 天气"}) for _ in range(5)))
+        # 只差空白 / 全角空格的参数命中同一条缓存；错误结果不缓存
+        again = await wrapped.ainvoke({"query": "  北京　天气 "})
+        await wrapped.ainvoke({"query": "bad"})
+        await wrapped.ainvoke({"query": "bad"})
+        return first, again
+
+    first, again = asyncio.run(_run())
+    assert first == ["结果:北京 天气"] * 5 and again == "结果:北京 天气"
+    assert calls == ["北京 天气", "bad", "bad"]
+    stats = cache.stats()["tools"]["lookup"]
+    assert (stats["hits"], stats["shared"], stats["misses"], stats["uncached"]) == (1, 4, 3, 2)
+
+    # 磁盘层：新的缓存实例（模拟重启）直接命中
+    restarted = cached_tool(lookup, ttl=60, cache=ToolResultCache(str(tmp_path / "tools.sqlite3")))
+    assert restarted.invoke({"query": "北京 天气"}) == "结果:北京 天气"
+    assert len(calls) == 3
+
+
+def test_side_effect_tools_are_not_wrapped() -> None:
+    from agent_tools.vectordb import save_vectors_to_qdrant
+    from agent_tools.web_process import web_browser
+
+    by_name = {t.name: t for t in ALL_TOOLS}
+    assert by_name["save_vectors_to_qdrant"] is save_vectors_to_qdrant
+    assert by_name["web_browser"] is not web_browser
+    assert by_name["web_browser"].args == web_browser.args
@@ -0,0 +1,35 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agent.agent_registry import EXPERT_AGENT_PROFILES, get_expert_agent
+from agent_tools import registry
+
+
+def test_profiles_are_subsets_and_smaller_than_all_tools() -> None:
+    all_names = set(registry.TOOL_PROFILES["all"])
+    for profile in EXPERT_AGENT_PROFILES.values():
+        assert set(t.name for t in registry.get_tools(profile)) <= all_names
+    assert "save_vectors_to_qdrant" not in registry.TOOL_PROFILES["doc"]
+    assert registry.get_tools("rewrite") == []
+
+    stats = registry.profile_stats()["profiles"]
+    assert stats["rewrite"]["schema_tokens"] == 0
+    assert 0 < stats["weather"]["schema_tokens"] < stats["all"]["schema_tokens"]
+
+
+def test_toolless_agent_and_run_stats() -> None:
+    model = FakeListChatModel(responses=["改写后的文本"])
+    # 无工具的 profile 不需要 bind_tools，一次模型调用即结束
+    assert registry.get_bound_model(model, "rewrite") is model
+    result = get_expert_agent("rewrite_doc_expert", model).invoke({"messages": [HumanMessage(content="改写")]})
+    assert result["messages"][-1].content == "改写后的文本"
+
+    registry.record_agent_run("weather", {"messages": [
+        HumanMessage(content="天气"),
+        AIMessage(content="", tool_calls=[{"name": "get_current_location", "args": {}, "id": "1"}]),
+        ToolMessage(content="Beijing, China", tool_call_id="1"),
+        AIMessage(content="晴", usage_metadata={"input_tokens": 120, "output_tokens": 5, "total_tokens": 125}),
+    ]})
+    weather = registry.profile_stats()["profiles"]["weather"]
+    assert (weather["model_calls"], weather["tool_calls"], weather["input_tokens"]) == (2, 1, 120)
+    assert weather["estimated_saved_tokens"] == 2 * weather["saved_tokens_per_call"]
@@ -0,0 +1,264 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from base_tools.vertordb import _SimpleHashEmbeddings
+
+
+def test_simple_hash_batch_matrix() -> None:
+    emb = _SimpleHashEmbeddings(dimension=64)
+    matrix = emb.embed_array(["你好，世界", "", "hello"])
+
+    assert matrix.shape == (3, 64)
+    assert matrix.dtype == np.float32
+    assert np.allclose(np.linalg.norm(matrix[[0, 2]], axis=1), 1.0)
+    assert not matrix[1].any()
+    assert emb.embed_query("hello") == matrix[2].tolist()
+
+
+def test_simple_hash_is_stable_across_processes() -> None:
+    code = (
+        "from base_tools.vertordb import _SimpleHashEmbeddings;"
+        "print(_SimpleHashEmbeddings(32).embed_query('稳定哈希 abc'))"
+    )
+    outputs = set()
+    for seed in ("1", "2"):
+        env = {**os.environ, "PYTHONHASHSEED": seed}
+        outputs.add(subprocess.check_output([sys.executable, "-c", code], env=env, text=True).splitlines()[-1])
+    assert len(outputs) == 1
+
+
+def test_ensure_collection_caches_and_checks_dimension() -> None:
+    from qdrant_client import QdrantClient
+
+    from base_tools import vertordb
+
+    client = QdrantClient(":memory:")
+    vertordb.forget_collection("ensure_test")
+    vertordb.ensure_collection("ensure_test", 8, client=client)
+    # 已缓存：即使客户端不可用也不再请求服务端
+    vertordb.ensure_collection("ensure_test", 8, client=None)
+
+    with pytest.raises(ValueError):
+        vertordb.ensure_collection("ensure_test", 16, client=client)
+    vertordb.forget_collection("ensure_test")
+
+
+def test_chunk_ids_are_content_addressed_and_diffed() -> None:
+    from base_tools.vertordb import _diff_chunks, _doc_id_for, _plan_chunks
+
+    doc_id = _doc_id_for("标题")
+    assert doc_id == _doc_id_for(" 标题 ")
+    old = _plan_chunks(doc_id, ["a", "b", "a", "c"])
+    new = _plan_chunks(doc_id, ["b", "a", "d"])
+
+    # 相同内容 + 相同出现序号 -> 相同 ID
+    assert new[0][0] == old[1][0]
+    assert new[1][0] == old[0][0]
+
+    existing = {pid: idx for pid, _, idx, _ in old}
+    todo, moved, stale = _diff_chunks(new, existing)
+    assert [chunk for _, _, _, chunk in todo] == ["d"]
+    assert moved == {old[1][0]: 0, old[0][0]: 1}
+    assert sorted(stale) == sorted([old[2][0], old[3][0]])
+
+
+def test_streaming_split_is_bounded_and_lossless() -> None:
+    import io
+
+    from base_tools.vertordb import _get_text_splitter, _iter_text_chunks, _split_text_into_chunks
+
+    assert _get_text_splitter(200) is _get_text_splitter(200)
+    paragraphs = [f"第{i}段。" + "内容" * (i % 40) for i in range(2000)]
+    text = "\n\n".join(paragraphs)
+
+    streamed = list(_iter_text_chunks(io.StringIO(text), max_len=200, window=1000))
+    assert all(len(c) <= 200 for c in streamed)
+    joined = "\n".join(streamed)
+    assert all(p in joined for p in paragraphs)
+    # 窗口足够大时与一次性切分完全一致
+    assert list(_iter_text_chunks(text, max_len=200, window=len(text) + 1)) == _split_text_into_chunks(text, 200)
+
+
+def test_onnx_backend_falls_back_when_unavailable(monkeypatch) -> None:
+    from base_tools import vertordb
+
+    monkeypatch.setenv("EMBEDDING_MODEL", "onnx-int8")
+    monkeypatch.setattr(vertordb, "ONNX_AVAILABLE", False)
+    monkeypatch.setattr(vertordb, "HUGGINGFACE_AVAILABLE", False)
+    assert isinstance(vertordb._get_embedding_model(), vertordb._SimpleHashEmbeddings)
+
+
+def test_ensure_collection_creates_only_missing_payload_indexes() -> None:
+    from qdrant_client import models as qmodels
+
+    from base_tools import vertordb
+    from base_tools.local_index import NumpyVectorStore
+
+    store = NumpyVectorStore()
+    vertordb.forget_collection("index_test")
+    vertordb.ensure_collection("index_test", 8, client=store)
+    assert store.get_collection("index_test").payload_schema == vertordb.PAYLOAD_INDEXES
+
+    # 已存在的集合只补齐缺失的索引
+    store.create_collection("partial", vectors_config=qmodels.VectorParams(size=8, distance=qmodels.Distance.COSINE))
+    store.create_payload_index("partial", "doc_id", qmodels.PayloadSchemaType.KEYWORD)
+    created = []
+    create_payload_index = store.create_payload_index
+
+    def counting_create(name, field_name, field_schema):
+        created.append(field_name)
+        return create_payload_index(name, field_name, field_schema)
+
+    store.create_payload_index = counting_create
+    vertordb.forget_collection("partial")
+    vertordb.ensure_collection("partial", 8, client=store)
+    vertordb.forget_collection("index_test")
+    vertordb.forget_collection("partial")
+
+    assert sorted(created) == sorted(set(vertordb.PAYLOAD_INDEXES) - {"doc_id"})
+    assert store.get_collection("partial").payload_schema == vertordb.PAYLOAD_INDEXES
+
+
+def test_doc_metadata_falls_back_to_vector_store_without_mongo(monkeypatch, capsys) -> None:
+    from base_tools import doc_store, vertordb
+    from base_tools.local_index import NumpyVectorStore
+
+    monkeypatch.delenv("MONGO_URI", raising=False)
+    monkeypatch.setattr(vertordb, "_qdrant_client", NumpyVectorStore())
+    monkeypatch.setattr(vertordb, "_default_embedding", vertordb._SimpleHashEmbeddings(16))
+    for name in ("meta_test", doc_store.DOC_META_COLLECTION):
+        vertordb.forget_collection(name)
+
+    try:
+        vertordb.index_generated_doc_to_qdrant("第一段。\n\n第二段。", "写一篇介绍", "meta_test", doc_key="标题")
+        doc_id = vertordb._doc_id_for("标题")
+        first = doc_store.get_doc_metadata(doc_id)
+        vertordb.index_generated_doc_to_qdrant("第一段。", "改写", "meta_test", doc_key="标题")
+        second = doc_store.get_doc_metadata(doc_id)
+        assert doc_store.get_doc_metadata(vertordb._doc_id_for("不存在")) is None
+
+        # 未配置任何存储时跳过写入并打印日志
+        monkeypatch.setattr(doc_store, "DOC_META_COLLECTION", "")
+        assert doc_store.upsert_doc_metadata(doc_id, user_intent="x") is False
+        assert "跳过" in capsys.readouterr().out
+    finally:
+        for name in ("meta_test", doc_store.DOC_META_COLLECTION or "doc_meta"):
+            vertordb.forget_collection(name)
+
+    assert first["_id"] == doc_id and first["doc_key"] == "标题" and first["source"] == "generated_doc"
+    assert (first["user_intent"], second["user_intent"]) == ("写一篇介绍", "改写")
+    assert second["created_at"] == first["created_at"] and second["chunk_count"] == 1
+
+
+@pytest.mark.filterwarnings("ignore:Failed to obtain server version")
+def test_shared_sync_client_and_async_client_per_loop(monkeypatch) -> None:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    from qdrant_client import AsyncQdrantClient
+
+    from base_tools import vertordb
+    from base_tools.local_index import NumpyVectorStore
+
+    created = []
+    create = vertordb._create_qdrant_client
+
+    def counting_create():
+        created.append(create())
+        return created[-1]
+
+    monkeypatch.setattr(vertordb, "_qdrant_client", None)
+    monkeypatch.setattr(vertordb, "_create_qdrant_client", counting_create)
+    monkeypatch.setattr(vertordb, "QDRANT_BACKEND", "numpy")
+    monkeypatch.setattr(vertordb, "QDRANT_LOCAL_PATH", "")
+
+    # 多线程并发获取时只创建一次
+    with ThreadPoolExecutor(8) as pool:
+        clients = list(pool.map(lambda _: vertordb._get_qdrant_client(), range(32)))
+    assert len(created) == 1 and all(c is created[0] for c in clients)
+    assert isinstance(created[0], NumpyVectorStore)
+
+    async def _same_loop():
+        first = vertordb._get_async_qdrant_client()
+        assert vertordb._get_async_qdrant_client() is first
+        await vertordb.aclose_qdrant_client()
+        assert vertordb._get_async_qdrant_client() is not first
+        return first
+
+    # 本地后端：异步客户端转调同一个同步客户端
+    assert asyncio.run(_same_loop())._client is created[0]
+
+    # 服务端后端：每个事件循环一个 AsyncQdrantClient（创建时不连接服务）
+    monkeypatch.setattr(vertordb, "QDRANT_BACKEND", "server")
+    first, second = asyncio.run(_same_loop()), asyncio.run(_same_loop())
+    assert isinstance(first, AsyncQdrantClient) and first is not second
+
+    vertordb.close_qdrant_client()
+    assert vertordb._qdrant_client is None
+    monkeypatch.setattr(vertordb, "QDRANT_BACKEND", "numpy")
+    assert vertordb._get_qdrant_client() is created[1]
+    vertordb.close_qdrant_client()
+
+
+@pytest.mark.filterwarnings("ignore:Failed to obtain server version", "ignore:Local mode performs exact")
+def test_collection_profile_from_env_and_search_params(monkeypatch) -> None:
+    import json
+
+    from qdrant_client import QdrantClient
+    from qdrant_client import models as qmodels
+
+    from base_tools import vertordb
+    from base_tools.retrieval import search, search_batch
+
+    code = (
+        "import json; from base_tools import vertordb as v;"
+        "print(json.dumps([v.get_collection_profile(n).name for n in ('docs', 'pages', 'other', 'bad')]))"
+    )
+    env = {
+        **os.environ,
+        "QDRANT_DEFAULT_PROFILE": "on_disk",
+        "QDRANT_COLLECTION_PROFILES": "docs=int8, pages=pq_on_disk,bad=missing",
+    }
+    output = subprocess.check_output([sys.executable, "-c", code], env=env, text=True).splitlines()[-1]
+    # 未知的配置档名回退到 default
+    assert json.loads(output) == ["int8", "pq_on_disk", "on_disk", "default"]
+
+    class _Recording:
+        def __init__(self, client):
+            self._client, self.calls = client, []
+
+        def __getattr__(self, name):
+            attr = getattr(self._client, name)
+
+            def call(*args, **kwargs):
+                self.calls.append((name, kwargs))
+                return attr(*args, **kwargs)
+
+            return call if callable(attr) else attr
+
+    client = _Recording(QdrantClient(":memory:"))
+    monkeypatch.setattr(vertordb, "_qdrant_client", client)
+    monkeypatch.setattr(vertordb, "_default_embedding", vertordb._SimpleHashEmbeddings(16))
+    monkeypatch.setitem(vertordb.QDRANT_COLLECTION_PROFILES, "profile_test", "int8")
+    vertordb.forget_collection("profile_test")
+    try:
+        vertordb.upsert_points("profile_test", [
+            qmodels.PointStruct(id=1, vector=vertordb._default_embedding.embed_query("文档"), payload={"doc_id": "a"}),
+        ])
+        assert search("文档", "profile_test", top_k=1)[0]["id"] == 1
+        assert search_batch(["文档", "其它"], "profile_test", top_k=1)[0][0]["id"] == 1
+    finally:
+        vertordb.forget_collection("profile_test")
+
+    calls = {}
+    for name, kwargs in client.calls:
+        calls.setdefault(name, kwargs)
+    expected = vertordb.COLLECTION_PROFILES["int8"].search_params()
+    assert expected.quantization.rescore and expected.quantization.oversampling == 2.0
+    assert calls["create_collection"]["quantization_config"] == vertordb.COLLECTION_PROFILES["int8"].quantization_config()
+    assert calls["query_points"]["search_params"] == expected
+    assert [r.params for r in calls["query_batch_points"]["requests"]] == [expected, expected]
@@ -0,0 +1,63 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from base_tools import vertordb
+from base_tools.local_index import NumpyVectorStore
+from base_tools.retrieval import build_filter, iter_scroll
+from base_tools.web_crawler import bulk_index
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path == "/missing":
+            self.send_error(404)
+            return
+        content_type = "text/html; charset=utf-8"
+        if self.path == "/file.bin":
+            content_type, body = "application/octet-stream", b"\0" * 4096
+        elif self.path == "/long":
+            body = ("<html><body><p>长页面开头</p>" + "<p>很长的正文。</p>" * 10000 + "</body></html>").encode()
+        else:
+            body = f"<html><script>x()</script><body><nav>首页</nav><p>页面 {self.path}</p><p>第二段</p></body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_bulk_index_skips_done_and_records_failures(tmp_path, monkeypatch) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(vertordb, "_qdrant_client", NumpyVectorStore())
+    monkeypatch.setattr(vertordb, "_default_embedding", vertordb._SimpleHashEmbeddings(16))
+    monkeypatch.setattr("base_tools.web_crawler.CRAWL_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr("base_tools.web_crawler.CRAWL_MAX_BYTES", 4096)
+    vertordb.forget_collection("crawl_test")
+    progress = str(tmp_path / "progress.jsonl")
+    urls = [f"{base}/a", f"{base}/b", f"{base}/a", f"{base}/missing", f"{base}/file.bin", f"{base}/long"]
+
+    try:
+        first = bulk_index(urls, "crawl_test", progress_path=progress)
+        second = bulk_index(urls, "crawl_test", progress_path=progress)
+        texts = [r.payload["text"] for r in iter_scroll("crawl_test", build_filter(url=f"{base}/a"))]
+        long_chunks = [r.payload["text"] for r in iter_scroll("crawl_test", build_filter(url=f"{base}/long"))]
+        binary = list(iter_scroll("crawl_test", build_filter(url=f"{base}/file.bin")))
+    finally:
+        server.shutdown()
+        vertordb.forget_collection("crawl_test")
+
+    # 非文本响应不读响应体、不入库，计为跳过
+    assert (first.total, first.indexed, first.failed, first.skipped) == (5, 3, 1, 1)
+    assert (second.indexed, second.skipped, second.failed) == (0, 4, 1)
+    assert texts == ["页面 /a\n第二段"] and binary == []
+    # 单页最多读取 CRAWL_MAX_BYTES 字节
+    assert any(c.startswith("长页面开头") for c in long_chunks)
+    assert sum(len(c.encode()) for c in long_chunks) < 4096